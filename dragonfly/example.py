@@ -5,10 +5,16 @@ Dragonfly is 25x faster than Redis on multi-core machines
 """
 
 import json
-import time
+import os
+import sys
 import redis  # Dragonfly is Redis-compatible
-import threading
-from concurrent.futures import ThreadPoolExecutor, as_completed
+
+# The process-scaling sweep (scaling_sweep.py and the resp_bench clients it
+# spawns) lives in ../redis; here it measures Dragonfly's multi-threaded core
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), '..', 'redis'))
+from key_cleanup import unlink_matching
+from resp_bench import BenchConfig
+from scaling_sweep import print_scaling, run_sweep, sweep_steps
 
 # Connect to Dragonfly
 r = redis.Redis(host='localhost', port=6379, db=0, decode_responses=True)
@@ -28,30 +34,21 @@ def demo_basic_operations():
     print(f"JSON storage -> {json.loads(r.get('user:1'))}")
 
 def demo_performance():
-    """Demonstrate Dragonfly's performance"""
+    """Throughput scaling with client processes"""
     print("\n=== Dragonfly Performance Demo ===")
     print("Dragonfly uses all CPU cores efficiently\n")
 
-    def parallel_writes(thread_id, count=1000):
-        for i in range(count):
-            r.set(f'perf:thread{thread_id}:key{i}', f'value_{i}')
-        return thread_id
-
-    # Parallel writes (Dragonfly handles this efficiently)
-    start = time.time()
-    with ThreadPoolExecutor(max_workers=4) as executor:
-        futures = [executor.submit(parallel_writes, i) for i in range(4)]
-        for future in as_completed(futures):
-            print(f"Thread {future.result()} completed")
-    
-    elapsed = time.time() - start
-    print(f"\n4000 parallel writes in {elapsed:.2f} seconds")
-    print(f"Throughput: {4000/elapsed:.0f} ops/sec")
-
-    # Cleanup
-    for i in range(4):
-        for j in range(1000):
-            r.delete(f'perf:thread{i}:key{j}')
+    # Threads sharing one client measure the GIL, not the server: every step
+    # runs separate processes, each with its own connections
+    config = BenchConfig(port=6379, processes=True, pipeline=16, keyspace=10_000,
+                         duration=3, prefix='perf:')
+    steps = sweep_steps(min(os.cpu_count() or 1, 8))
+    print(f"Sweeping {', '.join(map(str, steps))} client processes, 2 connections each, pipeline 16")
+    print_scaling(run_sweep(config, steps, connections=2))
+    print("srv cores: server CPU-seconds per second from INFO cpu; it should grow with the curve")
+
+    # Cleanup: SCAN + pipelined UNLINK
+    print(unlink_matching(r, 'perf:*'))
 
 def demo_memory_efficiency():
     """Show memory efficiency features"""
@@ -3,28 +3,24 @@
 Memcached example - simple key-value caching
 """
 
-import json
+import os
+import sys
 import time
 from pymemcache.client.base import Client
-from pymemcache import serde
 
-def json_serializer(key, value):
-    if isinstance(value, str):
-        return value.encode('utf-8'), 1
-    return json.dumps(value).encode('utf-8'), 2
+# codec.py sits with the Redis examples; it only turns objects into bytes and
+# back, so pymemcache can use it through MemcacheSerde as is
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), '..', 'redis'))
+from codec import Codec, MemcacheSerde, default_codecs, payload_corpus
 
-def json_deserializer(key, value, flags):
-    if flags == 1:
-        return value.decode('utf-8')
-    elif flags == 2:
-        return json.loads(value.decode('utf-8'))
-    return value
+# Objects go through a header-tagged codec; strings and ints stay plain so
+# INCR/DECR keep working and values written with the old JSON flags still load
+codec = Codec('msgpack' if 'msgpack' in Codec.available() else 'json', compress_threshold=1024)
 
 # Connect to Memcached
 client = Client(
     ('localhost', 11212),
-    serializer=json_serializer,
-    deserializer=json_deserializer
+    serde=MemcacheSerde(codec)
 )
 
 def demo_basic_operations():
@@ -175,6 +171,23 @@ def demo_stats():
     except Exception as e:
         print(f"Could not retrieve stats: {e}")
 
+def demo_value_codecs():
+    print("\n=== Value Codecs ===\n")
+
+    # Memcached has no MEMORY USAGE; the 'bytes' stat delta shows what each
+    # codec actually costs in slab memory, item overhead included
+    payload = payload_corpus()['user + history']
+    print(f"{'codec':18} {'value bytes':>12} {'slab bytes/item':>16}")
+    for item_codec in default_codecs():
+        codec_client = Client(('localhost', 11212), serde=MemcacheSerde(item_codec))
+        before = int(codec_client.stats()[b'bytes'])
+        for i in range(100):
+            codec_client.set(f'codec:{item_codec.name}:{i}', payload, expire=60)
+        after = int(codec_client.stats()[b'bytes'])
+        print(f"{item_codec.name:18} {len(item_codec.encode(payload)):12} {(after - before) / 100:16.0f}")
+        codec_client.delete_many([f'codec:{item_codec.name}:{i}' for i in range(100)])
+        codec_client.close()
+
 if __name__ == "__main__":
     try:
         # Test connection
@@ -187,6 +200,7 @@ if __name__ == "__main__":
         demo_increment_decrement()
         demo_cache_pattern()
         demo_multi_get()
+        demo_value_codecs()
         demo_stats()
 
     except Exception as e:
@@ -61,7 +61,7 @@ fi
 
 # Activate virtual environment and install dependencies
 source venv/bin/activate
-pip install -q pymemcache
+pip install -q pymemcache msgpack
 
 echo
 echo "==================================="
@@ -0,0 +1,338 @@
+"""DataLoader-style key coalescing for Redis cache lookups.
+
+Keys requested within one batch window (or one event-loop tick for the
+asyncio variant) are resolved together: one ``MGET`` for the whole batch,
+one origin call for the misses and one pipelined ``SETEX`` batch to fill the
+cache. Duplicate keys in a batch share a single lookup.
+"""
+from __future__ import annotations
+
+import argparse
+import asyncio
+import json
+import random
+import threading
+import time
+from concurrent.futures import Future
+from dataclasses import dataclass
+from typing import Any, Awaitable, Callable, Dict, Iterable, List
+
+import redis
+import redis.asyncio
+
+
+@dataclass
+class LoaderStats:
+    batches: int = 0
+    keys: int = 0
+    misses: int = 0
+    round_trips: int = 0
+
+
+class BatchLoader:
+    """Thread-safe loader; ``load`` returns a future resolved by a dispatcher thread.
+
+    A batch is dispatched ``window`` seconds after its first key arrives, or
+    as soon as it holds ``max_batch`` distinct keys.
+    """
+
+    def __init__(
+        self,
+        client: redis.Redis,
+        fetch_many: Callable[[List[str]], Dict[str, Any]],
+        prefix: str = "cache:user:",
+        ttl: int = 60,
+        window: float = 0.001,
+        max_batch: int = 500,
+        dumps: Callable[[Any], str] = json.dumps,
+        loads: Callable[[str], Any] = json.loads,
+    ) -> None:
+        self.client = client
+        self.fetch_many = fetch_many
+        self.prefix = prefix
+        self.ttl = ttl
+        self.window = window
+        self.max_batch = max_batch
+        self.dumps = dumps
+        self.loads = loads
+        self.stats = LoaderStats()
+        self._pending: Dict[str, List[Future]] = {}
+        self._cond = threading.Condition()
+        self._closed = False
+        self._thread = threading.Thread(target=self._run, name="batch-loader", daemon=True)
+        self._thread.start()
+
+    def load(self, key: str) -> Future:
+        future: Future = Future()
+        with self._cond:
+            self._pending.setdefault(key, []).append(future)
+            self._cond.notify()
+        return future
+
+    def load_many(self, keys: Iterable[str]) -> List[Any]:
+        futures = [self.load(key) for key in keys]
+        return [future.result() for future in futures]
+
+    def close(self) -> None:
+        with self._cond:
+            self._closed = True
+            self._cond.notify()
+        self._thread.join()
+
+    def _run(self) -> None:
+        while True:
+            with self._cond:
+                while not self._pending and not self._closed:
+                    self._cond.wait()
+                if self._closed and not self._pending:
+                    return
+                deadline = time.monotonic() + self.window
+                while len(self._pending) < self.max_batch and not self._closed:
+                    remaining = deadline - time.monotonic()
+                    if remaining <= 0:
+                        break
+                    self._cond.wait(remaining)
+                batch, self._pending = self._pending, {}
+            self._dispatch(batch)
+
+    def _dispatch(self, batch: Dict[str, List[Future]]) -> None:
+        keys = list(batch)
+        try:
+            values = self._resolve(keys, self.client.mget([self.prefix + k for k in keys]))
+        except Exception as exc:
+            for futures in batch.values():
+                for future in futures:
+                    future.set_exception(exc)
+            return
+        for key, futures in batch.items():
+            for future in futures:
+                future.set_result(values[key])
+
+    def _resolve(self, keys: List[str], cached: List[Any]) -> Dict[str, Any]:
+        """Decode cache hits, load misses from the origin and refill the cache."""
+        self.stats.batches += 1
+        self.stats.keys += len(keys)
+        self.stats.round_trips += 1  # MGET
+
+        values: Dict[str, Any] = {}
+        missing: List[str] = []
+        for key, raw in zip(keys, cached):
+            if raw is None:
+                missing.append(key)
+            else:
+                values[key] = self.loads(raw)
+        if not missing:
+            return values
+
+        self.stats.misses += len(missing)
+        loaded = self.fetch_many(missing)
+        pipe = self.client.pipeline(transaction=False)
+        for key in missing:
+            value = loaded.get(key)
+            values[key] = value
+            if value is not None:
+                pipe.setex(self.prefix + key, self.ttl, self.dumps(value))
+        pipe.execute()
+        self.stats.round_trips += 1  # pipelined SETEX batch
+        return values
+
+
+class AsyncBatchLoader:
+    """asyncio variant: keys requested in the same loop tick share one batch.
+
+    With ``window > 0`` the batch stays open for that many seconds instead of
+    a single tick. ``fetch_many`` is a coroutine function.
+    """
+
+    def __init__(
+        self,
+        client: redis.asyncio.Redis,
+        fetch_many: Callable[[List[str]], Awaitable[Dict[str, Any]]],
+        prefix: str = "cache:user:",
+        ttl: int = 60,
+        window: float = 0.0,
+        max_batch: int = 500,
+        dumps: Callable[[Any], str] = json.dumps,
+        loads: Callable[[str], Any] = json.loads,
+    ) -> None:
+        self.client = client
+        self.fetch_many = fetch_many
+        self.prefix = prefix
+        self.ttl = ttl
+        self.window = window
+        self.max_batch = max_batch
+        self.dumps = dumps
+        self.loads = loads
+        self.stats = LoaderStats()
+        self._pending: Dict[str, List[asyncio.Future]] = {}
+        self._scheduled: asyncio.Task | None = None
+
+    async def load(self, key: str) -> Any:
+        loop = asyncio.get_running_loop()
+        future = loop.create_future()
+        self._pending.setdefault(key, []).append(future)
+        if len(self._pending) >= self.max_batch:
+            batch, self._pending = self._pending, {}
+            loop.create_task(self._dispatch(batch))
+        elif self._scheduled is None:
+            self._scheduled = loop.create_task(self._dispatch_later())
+        return await future
+
+    async def load_many(self, keys: Iterable[str]) -> List[Any]:
+        return await asyncio.gather(*(self.load(key) for key in keys))
+
+    async def _dispatch_later(self) -> None:
+        await asyncio.sleep(self.window)
+        self._scheduled = None
+        batch, self._pending = self._pending, {}
+        if batch:
+            await self._dispatch(batch)
+
+    async def _dispatch(self, batch: Dict[str, List[asyncio.Future]]) -> None:
+        keys = list(batch)
+        try:
+            cached = await self.client.mget([self.prefix + k for k in keys])
+            values = await self._resolve(keys, cached)
+        except Exception as exc:
+            for futures in batch.values():
+                for future in futures:
+                    future.set_exception(exc)
+            return
+        for key, futures in batch.items():
+            for future in futures:
+                future.set_result(values[key])
+
+    async def _resolve(self, keys: List[str], cached: List[Any]) -> Dict[str, Any]:
+        self.stats.batches += 1
+        self.stats.keys += len(keys)
+        self.stats.round_trips += 1
+
+        values: Dict[str, Any] = {}
+        missing: List[str] = []
+        for key, raw in zip(keys, cached):
+            if raw is None:
+                missing.append(key)
+            else:
+                values[key] = self.loads(raw)
+        if not missing:
+            return values
+
+        self.stats.misses += len(missing)
+        loaded = await self.fetch_many(missing)
+        pipe = self.client.pipeline(transaction=False)
+        for key in missing:
+            value = loaded.get(key)
+            values[key] = value
+            if value is not None:
+                pipe.setex(self.prefix + key, self.ttl, self.dumps(value))
+        await pipe.execute()
+        self.stats.round_trips += 1
+        return values
+
+
+# --- benchmark ---------------------------------------------------------------
+
+@dataclass
+class PageResult:
+    name: str
+    round_trips_per_page: float
+    ms_per_page: float
+
+
+def fake_user(user_id: str) -> Dict[str, Any]:
+    return {"id": int(user_id), "name": f"User_{user_id}", "email": f"user{user_id}@example.com"}
+
+
+def make_pages(pages: int, lookups: int, users: int, seed: int = 7) -> List[List[str]]:
+    """Each page asks for `lookups` users, with repeats (authors, mentions...)."""
+    rng = random.Random(seed)
+    return [[str(rng.randint(1, users)) for _ in range(lookups)] for _ in range(pages)]
+
+
+def run_page_benchmark(
+    client: redis.Redis,
+    pages: int = 200,
+    lookups: int = 40,
+    users: int = 2000,
+    prefix: str = "loaderbench:user:",
+) -> List[PageResult]:
+    page_keys = make_pages(pages, lookups, users)
+    results: List[PageResult] = []
+
+    def reset() -> None:
+        # Warm half of the users so pages mix hits and misses
+        client.delete(*[prefix + str(i) for i in range(1, users + 1)])
+        pipe = client.pipeline(transaction=False)
+        for i in range(1, users + 1, 2):
+            pipe.setex(prefix + str(i), 60, json.dumps(fake_user(str(i))))
+        pipe.execute()
+
+    # Before: one GET per lookup, one SETEX per miss
+    reset()
+    round_trips = 0
+    start = time.perf_counter()
+    for keys in page_keys:
+        for key in keys:
+            raw = client.get(prefix + key)
+            round_trips += 1
+            if raw is None:
+                client.setex(prefix + key, 60, json.dumps(fake_user(key)))
+                round_trips += 1
+            else:
+                json.loads(raw)
+    elapsed = time.perf_counter() - start
+    results.append(PageResult("per-key GET", round_trips / pages, elapsed / pages * 1000))
+
+    # After, sync: all lookups of a page land in one batch window
+    reset()
+    loader = BatchLoader(client, lambda keys: {k: fake_user(k) for k in keys}, prefix=prefix)
+    start = time.perf_counter()
+    for keys in page_keys:
+        loader.load_many(keys)
+    elapsed = time.perf_counter() - start
+    loader.close()
+    results.append(PageResult("BatchLoader", loader.stats.round_trips / pages, elapsed / pages * 1000))
+
+    # After, asyncio: one batch per event-loop tick
+    reset()
+    pool = client.connection_pool.connection_kwargs
+
+    async def run_async() -> AsyncBatchLoader:
+        aclient = redis.asyncio.Redis(host=pool.get("host", "localhost"), port=pool.get("port", 6379),
+                                      decode_responses=True)
+
+        async def fetch(keys: List[str]) -> Dict[str, Any]:
+            return {k: fake_user(k) for k in keys}
+
+        async_loader = AsyncBatchLoader(aclient, fetch, prefix=prefix)
+        for keys in page_keys:
+            await async_loader.load_many(keys)
+        await aclient.aclose()
+        return async_loader
+
+    start = time.perf_counter()
+    async_loader = asyncio.run(run_async())
+    elapsed = time.perf_counter() - start
+    results.append(PageResult("AsyncBatchLoader", async_loader.stats.round_trips / pages,
+                              elapsed / pages * 1000))
+
+    client.delete(*[prefix + str(i) for i in range(1, users + 1)])
+    return results
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--host", default="localhost")
+    parser.add_argument("--port", type=int, default=6379)
+    parser.add_argument("--pages", type=int, default=200)
+    parser.add_argument("--lookups", type=int, default=40, help="User lookups per page")
+    args = parser.parse_args()
+
+    client = redis.Redis(host=args.host, port=args.port, decode_responses=True)
+    print(f"{'variant':18} {'round trips/page':>17} {'ms/page':>9}")
+    for result in run_page_benchmark(client, pages=args.pages, lookups=args.lookups):
+        print(f"{result.name:18} {result.round_trips_per_page:17.1f} {result.ms_per_page:9.3f}")
+
+
+if __name__ == "__main__":
+    main()
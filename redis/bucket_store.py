@@ -0,0 +1,245 @@
+"""Bucketed hash storage for millions of small objects.
+
+Instead of one top-level key per object (``user:N``), objects are packed into
+bucket hashes: ``users:{N // bucket_size}`` with field ``N``. As long as a
+bucket stays within ``hash-max-listpack-entries`` / ``hash-max-listpack-value``
+(``ziplist`` on Redis < 7) the server stores it as one compact listpack, so
+the per-key overhead (dict entry, robj, key SDS, expire slot) is paid once per
+bucket rather than once per object. The price: no per-object TTL, and reads
+and writes scan a listpack of up to ``bucket_size`` entries.
+"""
+from __future__ import annotations
+
+import argparse
+import json
+import random
+import time
+from dataclasses import dataclass
+from typing import Any, Callable, Dict, Iterable, List, Optional, Tuple
+
+import redis
+
+
+def listpack_limits(client: redis.Redis) -> Optional[Tuple[str, int, int]]:
+    """(config prefix, max entries, max value bytes) for compact hashes, if readable."""
+    for name in ("hash-max-listpack", "hash-max-ziplist"):
+        try:
+            config = client.config_get(f"{name}-*")
+        except redis.ResponseError:
+            return None  # CONFIG disabled (managed service)
+        if config:
+            return name, int(config[f"{name}-entries"]), int(config[f"{name}-value"])
+    return None
+
+
+def ensure_listpack(client: redis.Redis, bucket_size: int, max_value: int = 64) -> Optional[Dict[str, int]]:
+    """Raise the listpack thresholds so full buckets keep the compact encoding.
+
+    The thresholds are server-wide, so this returns the previous values of
+    whatever it changed (``{}`` if nothing needed raising, ``None`` if CONFIG
+    is unavailable); hand them to ``restore_listpack`` when done.
+    """
+    limits = listpack_limits(client)
+    if limits is None:
+        return None
+    name, entries, value = limits
+    previous: Dict[str, int] = {}
+    try:
+        if entries < bucket_size:
+            client.config_set(f"{name}-entries", bucket_size)
+            previous[f"{name}-entries"] = entries
+        if value < max_value:
+            client.config_set(f"{name}-value", max_value)
+            previous[f"{name}-value"] = value
+    except redis.ResponseError:
+        restore_listpack(client, previous)
+        return None
+    return previous
+
+
+def restore_listpack(client: redis.Redis, previous: Optional[Dict[str, int]]) -> None:
+    """Put back the thresholds returned by ``ensure_listpack``."""
+    for name, value in (previous or {}).items():
+        client.config_set(name, value)
+
+
+class BucketedStore:
+    """``get``/``set`` by integer id, stored as fields of bucket hashes."""
+
+    def __init__(
+        self,
+        client: redis.Redis,
+        prefix: str = "users",
+        bucket_size: int = 1000,
+        dumps: Callable[[Any], str] = lambda value: json.dumps(value, separators=(",", ":")),
+        loads: Callable[[str], Any] = json.loads,
+    ) -> None:
+        self.client = client
+        self.prefix = prefix
+        self.bucket_size = bucket_size
+        self.dumps = dumps
+        self.loads = loads
+
+    def key_for(self, object_id: int) -> str:
+        return f"{self.prefix}:{object_id // self.bucket_size}"
+
+    def get(self, object_id: int) -> Any:
+        raw = self.client.hget(self.key_for(object_id), str(object_id))
+        return None if raw is None else self.loads(raw)
+
+    def set(self, object_id: int, value: Any) -> None:
+        self.client.hset(self.key_for(object_id), str(object_id), self.dumps(value))
+
+    def delete(self, object_id: int) -> bool:
+        return bool(self.client.hdel(self.key_for(object_id), str(object_id)))
+
+    def _group(self, object_ids: Iterable[int]) -> Dict[str, List[int]]:
+        buckets: Dict[str, List[int]] = {}
+        for object_id in object_ids:
+            buckets.setdefault(self.key_for(object_id), []).append(object_id)
+        return buckets
+
+    def get_many(self, object_ids: Iterable[int]) -> Dict[int, Any]:
+        """One HMGET per bucket, all in one pipeline."""
+        buckets = self._group(object_ids)
+        pipe = self.client.pipeline(transaction=False)
+        for key, ids in buckets.items():
+            pipe.hmget(key, [str(object_id) for object_id in ids])
+        values: Dict[int, Any] = {}
+        for ids, raws in zip(buckets.values(), pipe.execute()):
+            for object_id, raw in zip(ids, raws):
+                values[object_id] = None if raw is None else self.loads(raw)
+        return values
+
+    def set_many(self, objects: Dict[int, Any]) -> None:
+        """One multi-field HSET per bucket, all in one pipeline."""
+        pipe = self.client.pipeline(transaction=False)
+        for key, ids in self._group(objects).items():
+            pipe.hset(key, mapping={str(object_id): self.dumps(objects[object_id]) for object_id in ids})
+        pipe.execute()
+
+    def buckets(self, object_ids: Iterable[int]) -> List[str]:
+        return list(self._group(object_ids))
+
+
+# --- benchmark ---------------------------------------------------------------
+
+@dataclass
+class StorageResult:
+    mode: str
+    keys: int
+    bytes_per_object: Optional[float]
+    encoding: str
+    writes_per_sec: float
+    reads_per_sec: float
+
+
+def make_user(user_id: int) -> Dict[str, Any]:
+    return {"name": f"User_{user_id}", "email": f"u{user_id}@example.com", "age": 20 + user_id % 50}
+
+
+def _used_memory(client: redis.Redis) -> Optional[int]:
+    try:
+        return int(client.info("memory")["used_memory"])
+    except (redis.ResponseError, KeyError):
+        return None
+
+
+def run_storage_benchmark(client: redis.Redis, users: int = 100_000, bucket_size: int = 1000,
+                          batch: int = 1000, reads: int = 20_000) -> List[StorageResult]:
+    """Plain keys vs per-user hashes vs bucketed hashes: memory and throughput."""
+    previous = ensure_listpack(client, bucket_size)
+    try:
+        return _run_storage_modes(client, users, bucket_size, batch, reads)
+    finally:
+        restore_listpack(client, previous)
+
+
+def _run_storage_modes(client: redis.Redis, users: int, bucket_size: int,
+                       batch: int, reads: int) -> List[StorageResult]:
+    ids = list(range(users))
+    sample = random.Random(1).choices(ids, k=reads)
+    store = BucketedStore(client, prefix="bench:bucket", bucket_size=bucket_size)
+
+    def plain_write(chunk: List[int]) -> None:
+        pipe = client.pipeline(transaction=False)
+        for i in chunk:
+            pipe.set(f"bench:plain:{i}", json.dumps(make_user(i), separators=(",", ":")))
+        pipe.execute()
+
+    def plain_read(chunk: List[int]) -> None:
+        client.mget([f"bench:plain:{i}" for i in chunk])
+
+    def hash_write(chunk: List[int]) -> None:
+        pipe = client.pipeline(transaction=False)
+        for i in chunk:
+            pipe.hset(f"bench:hash:{i}", mapping=make_user(i))
+        pipe.execute()
+
+    def hash_read(chunk: List[int]) -> None:
+        pipe = client.pipeline(transaction=False)
+        for i in chunk:
+            pipe.hgetall(f"bench:hash:{i}")
+        pipe.execute()
+
+    modes = [
+        ("plain keys", plain_write, plain_read, [f"bench:plain:{i}" for i in ids]),
+        ("hash per user", hash_write, hash_read, [f"bench:hash:{i}" for i in ids]),
+        (f"bucketed ({bucket_size}/hash)",
+         lambda chunk: store.set_many({i: make_user(i) for i in chunk}),
+         store.get_many, store.buckets(ids)),
+    ]
+
+    results: List[StorageResult] = []
+    for mode, write, read, keys in modes:
+        before = _used_memory(client)
+        start = time.perf_counter()
+        for first in range(0, users, batch):
+            write(ids[first:first + batch])
+        write_elapsed = time.perf_counter() - start
+        after = _used_memory(client)
+
+        start = time.perf_counter()
+        for first in range(0, reads, 100):
+            read(sample[first:first + 100])
+        read_elapsed = time.perf_counter() - start
+
+        try:
+            encoding = client.object("encoding", keys[0]) or "-"
+        except redis.ResponseError:
+            encoding = "-"
+        results.append(StorageResult(
+            mode=mode,
+            keys=len(keys),
+            bytes_per_object=None if before is None or after is None else (after - before) / users,
+            encoding=encoding,
+            writes_per_sec=users / write_elapsed,
+            reads_per_sec=reads / read_elapsed,
+        ))
+        for first in range(0, len(keys), batch):
+            client.unlink(*keys[first:first + batch])
+    return results
+
+
+def print_storage_results(results: List[StorageResult]) -> None:
+    print(f"{'mode':24} {'keys':>8} {'bytes/user':>11} {'encoding':>10} {'writes/sec':>11} {'reads/sec':>10}")
+    for result in results:
+        per_object = "-" if result.bytes_per_object is None else f"{result.bytes_per_object:.1f}"
+        print(f"{result.mode:24} {result.keys:8} {per_object:>11} {result.encoding:>10} "
+              f"{result.writes_per_sec:11.0f} {result.reads_per_sec:10.0f}")
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--host", default="localhost")
+    parser.add_argument("--port", type=int, default=6379)
+    parser.add_argument("--users", type=int, default=100_000)
+    parser.add_argument("--bucket-size", type=int, default=1000)
+    args = parser.parse_args()
+
+    client = redis.Redis(host=args.host, port=args.port, decode_responses=True)
+    print_storage_results(run_storage_benchmark(client, args.users, args.bucket_size))
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,318 @@
+"""Stampede-protected cache-aside helper for Redis-compatible servers.
+
+Values are stored in an envelope with their logical expiry and the time it
+took to load them. That enables:
+
+* single-flight loading: one caller per key hits the origin, either through a
+  short ``SET NX`` lock key (works across processes) or an in-process future;
+* XFetch-style probabilistic early refresh: the closer a key is to expiry and
+  the slower it is to recompute, the more likely a reader refreshes it early;
+* serve-stale-while-refreshing: keys live ``stale_ttl`` seconds past their
+  logical expiry, and readers get the stale value while one refresh runs.
+"""
+from __future__ import annotations
+
+import argparse
+import json
+import math
+import random
+import threading
+import time
+import uuid
+from concurrent.futures import Future, ThreadPoolExecutor
+from dataclasses import dataclass
+from typing import Any, Callable, Dict, List, Optional
+
+import redis
+
+from script_registry import ScriptRegistry
+
+
+@dataclass
+class CacheStats:
+    hits: int = 0
+    misses: int = 0
+    stale_served: int = 0
+    early_refreshes: int = 0
+    origin_loads: int = 0
+
+
+class CacheAside:
+    """Cache-aside reads with single-flight loading and early refresh.
+
+    ``lock`` selects the single-flight mechanism: ``"redis"`` (SET NX lock
+    key), ``"local"`` (one future per key in this process) or ``"none"``
+    (plain GET -> miss -> SETEX). ``beta`` scales XFetch early refresh; 0
+    disables it. The lock is released by ``release_lock.lua`` from the shared
+    ``ScriptRegistry``.
+    """
+
+    def __init__(
+        self,
+        client: redis.Redis,
+        loader: Callable[[str], Any],
+        ttl: float = 60,
+        stale_ttl: float = 30,
+        lock: str = "redis",
+        lock_ttl: float = 5,
+        beta: float = 1.0,
+        wait_timeout: float = 5,
+        dumps: Callable[[Any], str] = json.dumps,
+        loads: Callable[[str], Any] = json.loads,
+        scripts: Optional[ScriptRegistry] = None,
+    ) -> None:
+        if lock not in ("redis", "local", "none"):
+            raise ValueError(f"unknown lock mode: {lock}")
+        self.client = client
+        self.loader = loader
+        self.ttl = ttl
+        self.stale_ttl = stale_ttl
+        self.lock = lock
+        self.lock_ttl = lock_ttl
+        self.beta = beta
+        self.wait_timeout = wait_timeout
+        self.dumps = dumps
+        self.loads = loads
+        self.stats = CacheStats()
+        self.scripts = scripts or ScriptRegistry(client)
+        self._stats_lock = threading.Lock()  # loaders and readers count from many threads
+        self._inflight: Dict[str, Future] = {}
+        self._inflight_lock = threading.Lock()
+        self._refresher = ThreadPoolExecutor(max_workers=4, thread_name_prefix="cache-refresh")
+
+    def _count(self, counter: str) -> None:
+        with self._stats_lock:
+            setattr(self.stats, counter, getattr(self.stats, counter) + 1)
+
+    # --- envelope -------------------------------------------------------
+
+    def _store(self, key: str, value: Any, delta: float) -> None:
+        envelope = json.dumps({
+            "v": self.dumps(value),
+            "d": delta,
+            "e": time.time() + self.ttl,
+        })
+        self.client.set(key, envelope, px=int((self.ttl + self.stale_ttl) * 1000))
+
+    def _load_and_store(self, key: str) -> Any:
+        started = time.perf_counter()
+        value = self.loader(key)
+        self._count("origin_loads")
+        self._store(key, value, time.perf_counter() - started)
+        return value
+
+    def _should_refresh(self, envelope: Dict[str, Any], now: float) -> bool:
+        if now >= envelope["e"]:
+            return True
+        if self.beta <= 0:
+            return False
+        # XFetch: now - delta * beta * ln(rand) >= expiry
+        return now - envelope["d"] * self.beta * math.log(random.random() or 1e-12) >= envelope["e"]
+
+    # --- single-flight --------------------------------------------------
+
+    def _acquire_lock(self, key: str) -> Optional[str]:
+        token = uuid.uuid4().hex
+        if self.client.set(f"lock:{key}", token, nx=True, px=int(self.lock_ttl * 1000)):
+            return token
+        return None
+
+    def _release_lock(self, key: str, token: str) -> None:
+        self.scripts.call("release_lock", keys=[f"lock:{key}"], args=[token])
+
+    def _load_single_flight(self, key: str) -> Any:
+        if self.lock == "none":
+            return self._load_and_store(key)
+
+        if self.lock == "local":
+            with self._inflight_lock:
+                future = self._inflight.get(key)
+                owner = future is None
+                if owner:
+                    future = self._inflight[key] = Future()
+            if not owner:
+                return future.result(timeout=self.wait_timeout)
+            try:
+                future.set_result(self._load_and_store(key))
+            except Exception as exc:
+                future.set_exception(exc)
+            finally:
+                with self._inflight_lock:
+                    self._inflight.pop(key, None)
+            return future.result()
+
+        # Redis lock: the winner loads, everyone else polls for the value
+        deadline = time.monotonic() + self.wait_timeout
+        while True:
+            token = self._acquire_lock(key)
+            if token is not None:
+                try:
+                    return self._load_and_store(key)
+                finally:
+                    self._release_lock(key, token)
+            time.sleep(0.005)
+            raw = self.client.get(key)
+            if raw is not None:
+                return self.loads(json.loads(raw)["v"])
+            if time.monotonic() >= deadline:
+                return self._load_and_store(key)
+
+    def _refresh_in_background(self, key: str) -> None:
+        if self.lock == "local":
+            with self._inflight_lock:
+                if key in self._inflight:
+                    return
+                self._inflight[key] = future = Future()
+
+            def run() -> None:
+                try:
+                    future.set_result(self._load_and_store(key))
+                except Exception as exc:
+                    future.set_exception(exc)
+                finally:
+                    with self._inflight_lock:
+                        self._inflight.pop(key, None)
+
+            self._refresher.submit(run)
+            return
+
+        token = self._acquire_lock(key) if self.lock == "redis" else ""
+        if token is None:
+            return  # someone else is already refreshing
+
+        def run_locked() -> None:
+            try:
+                self._load_and_store(key)
+            finally:
+                if token:
+                    self._release_lock(key, token)
+
+        self._refresher.submit(run_locked)
+
+    # --- public API -----------------------------------------------------
+
+    def get(self, key: str) -> Any:
+        raw = self.client.get(key)
+        if raw is None:
+            self._count("misses")
+            return self._load_single_flight(key)
+
+        envelope = json.loads(raw)
+        now = time.time()
+        if self._should_refresh(envelope, now):
+            if now >= envelope["e"]:
+                self._count("stale_served")
+            else:
+                self._count("early_refreshes")
+            self._refresh_in_background(key)
+        else:
+            self._count("hits")
+        return self.loads(envelope["v"])
+
+    def set(self, key: str, value: Any) -> None:
+        """Write-through: store a freshly computed value."""
+        self._store(key, value, 0.0)
+
+    def invalidate(self, key: str) -> None:
+        self.client.delete(key)
+
+    def close(self) -> None:
+        self._refresher.shutdown(wait=True)
+
+
+@dataclass
+class StampedeResult:
+    mode: str
+    origin_hits: int
+    requests: int
+    p50_ms: float
+    p99_ms: float
+    max_ms: float
+
+
+def run_stampede_benchmark(
+    client: redis.Redis,
+    mode: str,
+    beta: float,
+    stale_ttl: float,
+    threads: int = 64,
+    duration: float = 3.0,
+    ttl: float = 1.0,
+    origin_latency: float = 0.05,
+) -> StampedeResult:
+    """Hammer one hot key with a short TTL and count origin hits at expiry."""
+    key = f"stampede:{mode}:{beta}:{stale_ttl}"
+    client.delete(key, f"lock:{key}")
+    origin_calls = [0]
+    calls_lock = threading.Lock()
+
+    def origin(_: str) -> Dict[str, Any]:
+        with calls_lock:
+            origin_calls[0] += 1
+        time.sleep(origin_latency)
+        return {"id": 1, "name": "hot", "at": time.time()}
+
+    cache = CacheAside(client, origin, ttl=ttl, stale_ttl=stale_ttl, lock=mode, beta=beta)
+    latencies: List[float] = []
+    stop = time.monotonic() + duration
+
+    def worker() -> None:
+        local: List[float] = []
+        while time.monotonic() < stop:
+            started = time.perf_counter()
+            cache.get(key)
+            local.append((time.perf_counter() - started) * 1000)
+        with calls_lock:
+            latencies.extend(local)
+
+    pool = [threading.Thread(target=worker) for _ in range(threads)]
+    for t in pool:
+        t.start()
+    for t in pool:
+        t.join()
+    cache.close()
+    client.delete(key, f"lock:{key}")
+
+    latencies.sort()
+    label = mode + (f"+xfetch(beta={beta})" if beta else "") + (f"+stale({stale_ttl}s)" if stale_ttl else "")
+    return StampedeResult(
+        mode=label,
+        origin_hits=origin_calls[0],
+        requests=len(latencies),
+        p50_ms=latencies[len(latencies) // 2],
+        p99_ms=latencies[int(len(latencies) * 0.99)],
+        max_ms=latencies[-1],
+    )
+
+
+STAMPEDE_SCENARIOS = [
+    ("none", 0.0, 0.0),
+    ("redis", 0.0, 0.0),
+    ("local", 0.0, 0.0),
+    ("redis", 1.0, 1.0),
+    ("local", 1.0, 1.0),
+]
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--host", default="localhost")
+    parser.add_argument("--port", type=int, default=6379)
+    parser.add_argument("--threads", type=int, default=64)
+    parser.add_argument("--duration", type=float, default=3.0)
+    parser.add_argument("--ttl", type=float, default=1.0)
+    parser.add_argument("--origin-latency", type=float, default=0.05)
+    args = parser.parse_args()
+
+    client = redis.Redis(host=args.host, port=args.port, decode_responses=True,
+                         max_connections=args.threads + 8)
+    print(f"{'mode':36} {'origin':>7} {'requests':>9} {'p50':>8} {'p99':>8} {'max':>8}")
+    for mode, beta, stale_ttl in STAMPEDE_SCENARIOS:
+        result = run_stampede_benchmark(client, mode, beta, stale_ttl, args.threads,
+                                        args.duration, args.ttl, args.origin_latency)
+        print(f"{result.mode:36} {result.origin_hits:7} {result.requests:9} "
+              f"{result.p50_ms:7.2f}ms {result.p99_ms:7.2f}ms {result.max_ms:7.2f}ms")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,7 @@
+-- Compare-and-swap: set KEYS[1] to ARGV[2] only if it currently equals ARGV[1]
+local current = redis.call('get', KEYS[1])
+if current == ARGV[1] then
+    redis.call('set', KEYS[1], ARGV[2])
+    return 1
+end
+return 0
@@ -0,0 +1,233 @@
+"""Key distribution and hot-slot analyzer for Redis Cluster.
+
+Keys come either from ``SCAN`` on every primary (with ``MEMORY USAGE`` for a
+size estimate) or from a key log: ``[ts] [CMD] key ...`` per line, i.e. a bare key, ``ts key``,
+``CMD key`` or ``ts CMD key`` (``1718000000.12 GET user:42``); only lines
+with a timestamp feed the per-slot rates. For each key the
+slot and, through the ``CLUSTER SLOTS`` map, the owning node are computed
+locally. The report covers:
+
+* per-node key count and memory, with skew (max / mean) across primaries;
+* per-slot operation rates from the key log (or from ``SlotTracker.record``
+  calls made by a benchmark), flagging slots far above the mean; ``SCAN``
+  sees keys, not traffic, so in that mode hot slots are reported as n/a;
+* hash-tag groups large enough to pin a disproportionate share of keys or
+  memory to a single slot, which resharding cannot split.
+
+Run it before moving slots: a hot slot moves its load with it, and an
+oversized tag group can only move as a whole.
+"""
+from __future__ import annotations
+
+import argparse
+import time
+from collections import Counter, defaultdict
+from dataclasses import dataclass, field
+from typing import Dict, Iterable, List, Optional, Tuple
+
+from redis.cluster import RedisCluster
+
+from cluster_pipeline import Node, SlotMap, hash_tag, key_slot
+
+
+@dataclass
+class NodeStats:
+    node: Node
+    slots: int = 0
+    keys: int = 0
+    memory: int = 0
+
+
+@dataclass
+class TagGroup:
+    tag: str
+    slot: int
+    keys: int
+    memory: int
+
+
+@dataclass
+class DistributionReport:
+    nodes: List[NodeStats]
+    sampled_keys: int
+    key_skew: float
+    memory_skew: float
+    hot_slots: List[Tuple[int, float]] = field(default_factory=list)  # (slot, ops/sec)
+    mean_slot_rate: float = 0.0
+    tag_groups: List[TagGroup] = field(default_factory=list)
+
+
+class SlotTracker:
+    """Per-slot operation counts over a time window."""
+
+    def __init__(self) -> None:
+        self.ops: Counter = Counter()
+        self.first: Optional[float] = None
+        self.last: Optional[float] = None
+
+    def record(self, key: str, ts: Optional[float] = None) -> None:
+        ts = time.time() if ts is None else ts
+        self.first = ts if self.first is None else min(self.first, ts)
+        self.last = ts if self.last is None else max(self.last, ts)
+        self.ops[key_slot(key)] += 1
+
+    @property
+    def window(self) -> float:
+        if self.first is None or self.last is None:
+            return 0.0
+        return max(self.last - self.first, 1.0)
+
+    def rates(self) -> Dict[int, float]:
+        window = self.window or 1.0
+        return {slot: count / window for slot, count in self.ops.items()}
+
+    def hot_slots(self, factor: float = 5.0, top: int = 10) -> Tuple[List[Tuple[int, float]], float]:
+        """Slots above `factor` x the mean rate of active slots, hottest first."""
+        rates = self.rates()
+        if not rates:
+            return [], 0.0
+        mean = sum(rates.values()) / len(rates)
+        hot = sorted(((s, r) for s, r in rates.items() if r >= mean * factor), key=lambda item: -item[1])
+        return hot[:top], mean
+
+
+def sample_keys(rc: RedisCluster, per_node: int = 10_000, match: str = "*",
+                with_memory: bool = True) -> Iterable[Tuple[str, int]]:
+    """(key, MEMORY USAGE bytes) for up to `per_node` keys from every primary."""
+    for node in rc.get_primaries():
+        conn = rc.get_redis_connection(node)
+        keys: List[str] = []
+        for key in conn.scan_iter(match=match, count=1000):
+            keys.append(key)
+            if len(keys) >= per_node:
+                break
+        sizes = [0] * len(keys)
+        if with_memory and keys:
+            pipe = conn.pipeline(transaction=False)
+            for key in keys:
+                pipe.memory_usage(key)
+            # Expired keys give None, servers without MEMORY USAGE an error: count as 0
+            sizes = [size if isinstance(size, int) else 0 for size in pipe.execute(raise_on_error=False)]
+        yield from zip(keys, sizes)
+
+
+def read_key_log(path: str, tracker: Optional[SlotTracker] = None) -> Iterable[Tuple[str, int]]:
+    """Distinct keys from ``[ts] [CMD] key ...`` lines; timestamped lines also feed `tracker`."""
+    seen = set()
+    with open(path) as f:
+        for line in f:
+            parts = line.split()
+            if not parts:
+                continue
+            try:
+                ts: Optional[float] = float(parts[0])
+                parts = parts[1:]
+            except ValueError:
+                ts = None
+            if not parts:
+                continue
+            # One token left is the key itself; otherwise the key follows the command
+            key = parts[0] if len(parts) == 1 else parts[1]
+            if tracker is not None and ts is not None:
+                tracker.record(key, ts)
+            if key not in seen:
+                seen.add(key)
+                yield key, 0
+
+
+def _skew(values: List[int]) -> float:
+    if not values or not sum(values):
+        return 1.0
+    return max(values) / (sum(values) / len(values))
+
+
+def analyze(keys: Iterable[Tuple[str, int]], slot_map: SlotMap, tracker: Optional[SlotTracker] = None,
+            hot_factor: float = 5.0, tag_share: float = 0.01, tag_min_keys: int = 100) -> DistributionReport:
+    """Place every key on its slot and node and summarise the distribution.
+
+    A hash-tag group is reported when it holds at least `tag_min_keys` keys
+    and at least `tag_share` of the sampled keys or memory.
+    """
+    stats: Dict[Node, NodeStats] = {node: NodeStats(node) for node in slot_map.nodes()}
+    for owner in slot_map.owners:
+        if owner is not None:
+            stats[owner].slots += 1
+
+    tags: Dict[str, List[int]] = defaultdict(lambda: [0, 0])  # tag -> [keys, memory]
+    total_keys = total_memory = 0
+    for key, memory in keys:
+        node = slot_map.node_for(key_slot(key))
+        stats[node].keys += 1
+        stats[node].memory += memory
+        total_keys += 1
+        total_memory += memory
+        tag = hash_tag(key)
+        if len(tag) != len(key.encode()):
+            group = tags[tag.decode(errors="replace")]
+            group[0] += 1
+            group[1] += memory
+
+    nodes = sorted(stats.values(), key=lambda s: s.node)
+    report = DistributionReport(
+        nodes=nodes,
+        sampled_keys=total_keys,
+        key_skew=_skew([s.keys for s in nodes]),
+        memory_skew=_skew([s.memory for s in nodes]),
+    )
+    if tracker is not None:
+        report.hot_slots, report.mean_slot_rate = tracker.hot_slots(hot_factor)
+    for tag, (count, memory) in tags.items():
+        share = max(count / total_keys if total_keys else 0, memory / total_memory if total_memory else 0)
+        if count >= tag_min_keys and share >= tag_share:
+            report.tag_groups.append(TagGroup(tag, key_slot(tag), count, memory))
+    report.tag_groups.sort(key=lambda g: -g.keys)
+    return report
+
+
+def print_report(report: DistributionReport, slot_map: SlotMap) -> None:
+    print(f"Sampled keys: {report.sampled_keys}")
+    print(f"{'node':22} {'slots':>6} {'keys':>8} {'share':>7} {'memory':>10}")
+    for s in report.nodes:
+        share = s.keys / report.sampled_keys if report.sampled_keys else 0
+        print(f"{s.node[0] + ':' + str(s.node[1]):22} {s.slots:6} {s.keys:8} {share:7.1%} "
+              f"{s.memory / 1024:9.1f}K")
+    memory_skew = f"{report.memory_skew:.2f}" if any(s.memory for s in report.nodes) else "-"
+    print(f"Skew (max/mean): keys {report.key_skew:.2f}, memory {memory_skew}")
+    if not report.mean_slot_rate:
+        print("Hot slots: n/a (no per-slot rates; use --key-log with timestamped lines)")
+    elif report.hot_slots:
+        print(f"Hot slots (mean {report.mean_slot_rate:.1f} ops/sec per active slot):")
+        for slot, rate in report.hot_slots:
+            owner = slot_map.node_for(slot)
+            print(f"  slot {slot:5} on {owner[0]}:{owner[1]}: {rate:.1f} ops/sec")
+    if report.tag_groups:
+        print("Oversized hash-tag groups (move as one slot):")
+        for group in report.tag_groups:
+            print(f"  {{{group.tag}}} slot {group.slot}: {group.keys} keys, {group.memory / 1024:.1f}K")
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--host", default="localhost")
+    parser.add_argument("--port", type=int, default=7000)
+    parser.add_argument("--key-log", default=None, help="Analyze keys from a '[ts] [CMD] key' log instead of SCAN; "
+                        "only a timestamped log gives hot-slot rates")
+    parser.add_argument("--per-node", type=int, default=10_000, help="Max keys sampled per primary")
+    parser.add_argument("--match", default="*")
+    parser.add_argument("--hot-factor", type=float, default=5.0)
+    parser.add_argument("--tag-min-keys", type=int, default=100)
+    args = parser.parse_args()
+
+    slot_map = SlotMap([(args.host, args.port)])
+    tracker = SlotTracker()
+    if args.key_log:
+        keys = read_key_log(args.key_log, tracker)
+    else:
+        rc = RedisCluster(host=args.host, port=args.port, decode_responses=True)
+        keys = sample_keys(rc, args.per_node, args.match)
+    report = analyze(keys, slot_map, tracker, args.hot_factor, tag_min_keys=args.tag_min_keys)
+    print_report(report, slot_map)
+
+
+if __name__ == "__main__":
+    main()
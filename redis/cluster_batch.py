@@ -0,0 +1,161 @@
+"""Scatter-gather MGET / MSET / delete for keys that span cluster slots.
+
+A multi-key command in Redis Cluster must keep every key in one slot, so
+``MGET a b c`` fails with ``CROSSSLOT`` unless the keys share a hash tag.
+``ClusterBatch`` splits a batch of keys by slot, builds one ``MGET`` /
+``MSET`` / ``UNLINK`` per slot (at most ``chunk`` keys each), and sends them
+through ``ClusterBulkExecutor``: one pipeline per primary, all primaries in
+parallel, with ``MOVED`` / ``ASK`` / ``TRYAGAIN`` handled there. Results are
+reassembled in the caller's key order.
+
+A failed slot command does not fail the batch: its keys are listed in
+``BatchResult.errors`` with the exception, and their values are ``None``.
+"""
+from __future__ import annotations
+
+import argparse
+import statistics
+import time
+from dataclasses import dataclass, field
+from typing import Any, Dict, List, Mapping, Sequence, Tuple
+
+from redis.cluster import RedisCluster
+
+from cluster_pipeline import ClusterBulkExecutor, key_slot
+
+
+@dataclass
+class BatchResult:
+    values: List[Any]
+    errors: Dict[str, Exception] = field(default_factory=dict)
+    count: int = 0  # keys written (mset) or removed (delete_many)
+
+    @property
+    def ok(self) -> bool:
+        return not self.errors
+
+
+class ClusterBatch:
+    """Cross-slot ``mget``/``mset``/``delete_many`` on top of per-node pipelines."""
+
+    def __init__(self, executor: ClusterBulkExecutor, chunk: int = 500) -> None:
+        self.executor = executor
+        self.chunk = chunk
+
+    def _by_slot(self, keys: Sequence[str]) -> List[List[int]]:
+        """Key positions grouped by slot, split into chunks of at most `chunk` keys."""
+        slots: Dict[int, List[int]] = {}
+        for index, key in enumerate(keys):
+            slots.setdefault(key_slot(key), []).append(index)
+        return [positions[i:i + self.chunk]
+                for positions in slots.values() for i in range(0, len(positions), self.chunk)]
+
+    def _run(self, groups: List[List[int]], commands: List[Tuple[Any, ...]],
+             keys: Sequence[str]) -> Tuple[List[Any], Dict[str, Exception]]:
+        replies = self.executor.execute(commands)
+        errors: Dict[str, Exception] = {}
+        for positions, reply in zip(groups, replies):
+            if isinstance(reply, Exception):
+                errors.update((keys[i], reply) for i in positions)
+        return replies, errors
+
+    def mget(self, keys: Sequence[str]) -> BatchResult:
+        groups = self._by_slot(keys)
+        replies, errors = self._run(groups, [("MGET", *(keys[i] for i in g)) for g in groups], keys)
+        values: List[Any] = [None] * len(keys)
+        for positions, reply in zip(groups, replies):
+            if not isinstance(reply, Exception):
+                for i, value in zip(positions, reply):
+                    values[i] = value
+        return BatchResult(values, errors)
+
+    def mset(self, mapping: Mapping[str, Any]) -> BatchResult:
+        """``values`` holds True per key whose slot command succeeded."""
+        keys = list(mapping)
+        groups = self._by_slot(keys)
+        commands = [("MSET", *(part for i in g for part in (keys[i], mapping[keys[i]]))) for g in groups]
+        _, errors = self._run(groups, commands, keys)
+        return BatchResult([key not in errors for key in keys], errors, len(keys) - len(errors))
+
+    def delete_many(self, keys: Sequence[str]) -> BatchResult:
+        """``UNLINK`` per slot; ``count`` is how many of the keys existed."""
+        groups = self._by_slot(keys)
+        replies, errors = self._run(groups, [("UNLINK", *(keys[i] for i in g)) for g in groups], keys)
+        removed = sum(reply for reply in replies if not isinstance(reply, Exception))
+        return BatchResult([key not in errors for key in keys], errors, removed)
+
+
+# --- benchmark ---------------------------------------------------------------
+
+@dataclass
+class BatchLatency:
+    size: int
+    serial_ms: float
+    batch_ms: float
+
+    @property
+    def speedup(self) -> float:
+        return self.serial_ms / self.batch_ms if self.batch_ms else 0.0
+
+
+def _check_batch(operation: str, result: BatchResult, keys: Sequence[str], expected: Sequence[Any]) -> None:
+    """Raise on the first failed slot command, then on the first key whose value is wrong."""
+    if result.errors:
+        key, error = next(iter(result.errors.items()))
+        raise RuntimeError(f"{operation}: slot {key_slot(key)} failed for {len(result.errors)} keys "
+                           f"(first {key!r}): {error}")
+    for key, value, want in zip(keys, result.values, expected):
+        if value != want:
+            raise RuntimeError(f"{operation}: slot {key_slot(key)} key {key!r} returned {value!r}, expected {want!r}")
+
+
+def run_batch_latency(rc: RedisCluster, batch: ClusterBatch, sizes: Sequence[int] = (10, 100, 1000, 10_000),
+                      repeats: int = 5, prefix: str = "batch:key:") -> List[BatchLatency]:
+    """Median latency of reading `size` keys: per-key GET vs scatter-gather MGET."""
+    keys = [f"{prefix}{i}" for i in range(max(sizes))]
+    expected = [f"value_{i}" for i in range(len(keys))]
+    _check_batch("scatter MSET", batch.mset(dict(zip(keys, expected))), keys, [True] * len(keys))
+
+    results: List[BatchLatency] = []
+    for size in sizes:
+        subset = keys[:size]
+        serial, scattered = [], []
+        for _ in range(repeats):
+            start = time.perf_counter()
+            for key in subset:
+                rc.get(key)
+            serial.append(time.perf_counter() - start)
+
+            start = time.perf_counter()
+            result = batch.mget(subset)
+            scattered.append(time.perf_counter() - start)
+            _check_batch(f"scatter MGET of {size} keys", result, subset, expected[:size])
+        results.append(BatchLatency(size, statistics.median(serial) * 1000, statistics.median(scattered) * 1000))
+        if size >= 1000:
+            repeats = max(1, repeats // 2)  # serial 10k reads dominate the run time
+    batch.delete_many(keys)
+    return results
+
+
+def print_latency(results: List[BatchLatency]) -> None:
+    print(f"{'keys':>6} {'serial GET':>12} {'scatter MGET':>13} {'speedup':>8}")
+    for result in results:
+        print(f"{result.size:6} {result.serial_ms:10.2f}ms {result.batch_ms:11.2f}ms {result.speedup:7.1f}x")
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--host", default="localhost")
+    parser.add_argument("--port", type=int, default=7000)
+    parser.add_argument("--sizes", type=int, nargs="+", default=[10, 100, 1000, 10_000])
+    parser.add_argument("--chunk", type=int, default=500, help="Max keys per per-slot command")
+    args = parser.parse_args()
+
+    rc = RedisCluster(host=args.host, port=args.port, decode_responses=True)
+    executor = ClusterBulkExecutor([(args.host, args.port)])
+    print_latency(run_batch_latency(rc, ClusterBatch(executor, args.chunk), args.sizes))
+    executor.close()
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,308 @@
+"""Slot-aware parallel pipelines for Redis Cluster.
+
+``RedisCluster`` sends single-key commands one round trip at a time, and its
+pipelines are cheapest when every key shares a hash tag. ``ClusterBulkExecutor``
+takes an arbitrary batch of single-key commands and:
+
+1. computes each key's slot locally (CRC16/XMODEM of the key or its ``{tag}``);
+2. groups the commands by the primary that owns the slot (from ``CLUSTER SLOTS``);
+3. sends one pipeline per node, all nodes concurrently;
+4. merges the replies back into the original command order.
+
+Replies that come back as ``MOVED`` refresh the slot map and only those
+commands are retried; ``ASK`` replies are retried on the importing node behind
+an ``ASKING`` prefix without touching the map; ``TRYAGAIN`` (multi-key command
+during migration) is retried after a short pause. A node that cannot be
+reached (failover) triggers a refresh and its commands go to the new owner.
+Errors that survive ``max_redirects`` rounds are returned in place of the
+reply rather than raised.
+"""
+from __future__ import annotations
+
+import argparse
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+from dataclasses import dataclass
+from typing import Any, Dict, List, Optional, Sequence, Tuple, Union
+
+import redis
+from redis.cluster import RedisCluster
+
+SLOTS = 16384
+Node = Tuple[str, int]
+Command = Sequence[Any]  # (name, key, *args)
+
+
+def _crc16_table() -> List[int]:
+    table = []
+    for byte in range(256):
+        crc = byte << 8
+        for _ in range(8):
+            crc = ((crc << 1) ^ 0x1021) if crc & 0x8000 else crc << 1
+        table.append(crc & 0xFFFF)
+    return table
+
+
+_CRC16_TABLE = _crc16_table()
+
+
+def crc16(data: bytes) -> int:
+    """CRC16/XMODEM, the checksum Redis Cluster uses for key slots."""
+    crc = 0
+    for byte in data:
+        crc = ((crc << 8) & 0xFFFF) ^ _CRC16_TABLE[((crc >> 8) ^ byte) & 0xFF]
+    return crc
+
+
+def hash_tag(key: Union[str, bytes]) -> bytes:
+    """The part of the key that is hashed: the first non-empty ``{...}``, else the key."""
+    data = key.encode() if isinstance(key, str) else key
+    start = data.find(b"{")
+    if start != -1:
+        end = data.find(b"}", start + 1)
+        if end > start + 1:
+            return data[start + 1:end]
+    return data
+
+
+def key_slot(key: Union[str, bytes]) -> int:
+    return crc16(hash_tag(key)) % SLOTS
+
+
+class SlotMap:
+    """slot -> primary address, loaded from ``CLUSTER SLOTS`` of any reachable node."""
+
+    def __init__(self, startup_nodes: Sequence[Node]) -> None:
+        self.startup_nodes = list(startup_nodes)
+        self.owners: List[Optional[Node]] = [None] * SLOTS
+        self.lock = threading.Lock()
+        self.refreshes = 0
+        self.refresh()
+
+    def refresh(self) -> None:
+        last_error: Optional[Exception] = None
+        for host, port in self.startup_nodes:
+            try:
+                conn = redis.Redis(host=host, port=port, socket_timeout=5)
+                ranges = conn.execute_command("CLUSTER SLOTS")
+                conn.close()
+            except redis.RedisError as exc:
+                last_error = exc
+                continue
+            owners: List[Optional[Node]] = [None] * SLOTS
+            for entry in ranges:
+                start, end, primary = entry[0], entry[1], entry[2]
+                host_name = primary[0].decode() if isinstance(primary[0], bytes) else primary[0]
+                node = (host_name, int(primary[1]))
+                for slot in range(int(start), int(end) + 1):
+                    owners[slot] = node
+            with self.lock:
+                self.owners = owners
+                self.refreshes += 1
+                # Any node of the current topology can serve the next refresh
+                self.startup_nodes = list(dict.fromkeys(self.startup_nodes + [n for n in owners if n]))
+            return
+        raise redis.ConnectionError(f"no startup node answered CLUSTER SLOTS: {last_error}")
+
+    def node_for(self, slot: int) -> Node:
+        node = self.owners[slot]
+        if node is None:
+            raise redis.exceptions.ClusterDownError(f"slot {slot} is not served by any node")
+        return node
+
+    def nodes(self) -> List[Node]:
+        return sorted({node for node in self.owners if node is not None})
+
+
+@dataclass
+class BulkStats:
+    commands: int = 0
+    pipelines: int = 0
+    rounds: int = 0
+    moved: int = 0
+    ask: int = 0
+    tryagain: int = 0
+    connection_errors: int = 0
+
+
+class ClusterBulkExecutor:
+    """Run batches of single-key commands as concurrent per-node pipelines."""
+
+    def __init__(self, startup_nodes: Sequence[Node] = (("localhost", 7000),), max_redirects: int = 5,
+                 max_workers: int = 16, **connection_kwargs: Any) -> None:
+        self.slot_map = SlotMap(startup_nodes)
+        self.max_redirects = max_redirects
+        self.connection_kwargs = {"decode_responses": True, **connection_kwargs}
+        self.stats = BulkStats()
+        self._clients: Dict[Node, redis.Redis] = {}
+        self._clients_lock = threading.Lock()
+        self._pool = ThreadPoolExecutor(max_workers=max_workers, thread_name_prefix="cluster-pipe")
+
+    def client_for(self, node: Node) -> redis.Redis:
+        with self._clients_lock:
+            client = self._clients.get(node)
+            if client is None:
+                client = self._clients[node] = redis.Redis(host=node[0], port=node[1], **self.connection_kwargs)
+            return client
+
+    def _run_pipeline(self, node: Node, batch: List[Tuple[int, Command]], asking: bool) -> List[Tuple[int, Any]]:
+        pipe = self.client_for(node).pipeline(transaction=False)
+        for _, command in batch:
+            if asking:
+                pipe.execute_command("ASKING")
+            pipe.execute_command(*command)
+        try:
+            replies = pipe.execute(raise_on_error=False)
+        except (redis.ConnectionError, redis.TimeoutError) as exc:
+            # Node down or failing over: every command of this pipeline gets the error
+            return [(index, exc) for index, _ in batch]
+        if asking:
+            replies = replies[1::2]
+        return [(index, reply) for (index, _), reply in zip(batch, replies)]
+
+    def execute(self, commands: Sequence[Command]) -> List[Any]:
+        """Replies in command order; per-command errors are returned, not raised."""
+        results: List[Any] = [None] * len(commands)
+        self.stats.commands += len(commands)
+
+        # (node, asking) -> [(original index, command)]
+        pending: Dict[Tuple[Node, bool], List[Tuple[int, Command]]] = {}
+        for index, command in enumerate(commands):
+            node = self.slot_map.node_for(key_slot(command[1]))
+            pending.setdefault((node, False), []).append((index, command))
+
+        for attempt in range(self.max_redirects + 1):
+            if not pending:
+                break
+            self.stats.rounds += 1
+            self.stats.pipelines += len(pending)
+            futures = [self._pool.submit(self._run_pipeline, node, batch, asking)
+                       for (node, asking), batch in pending.items()]
+
+            last_round = attempt == self.max_redirects
+            retry: Dict[Tuple[Node, bool], List[Tuple[int, Command]]] = {}
+            reroute: List[Tuple[int, Command]] = []  # retried on the owner after a map refresh
+            refresh = tryagain = False
+            for future in futures:
+                for index, reply in future.result():
+                    command = commands[index]
+                    if last_round or not isinstance(reply, Exception):
+                        results[index] = reply
+                    elif isinstance(reply, redis.exceptions.MovedError):
+                        self.stats.moved += 1
+                        refresh = True
+                        retry.setdefault((reply.node_addr, False), []).append((index, command))
+                    elif isinstance(reply, redis.exceptions.AskError):
+                        self.stats.ask += 1
+                        retry.setdefault((reply.node_addr, True), []).append((index, command))
+                    elif isinstance(reply, redis.exceptions.TryAgainError):
+                        self.stats.tryagain += 1
+                        tryagain = True
+                        reroute.append((index, command))
+                    elif isinstance(reply, (redis.ConnectionError, redis.TimeoutError)):
+                        self.stats.connection_errors += 1
+                        refresh = True
+                        reroute.append((index, command))
+                    else:
+                        results[index] = reply
+            if refresh:
+                # One refresh per round, however many commands were redirected
+                self.slot_map.refresh()
+            for index, command in reroute:
+                node = self.slot_map.node_for(key_slot(command[1]))
+                retry.setdefault((node, False), []).append((index, command))
+            if tryagain:
+                time.sleep(0.01)
+            pending = retry
+        return results
+
+    # --- convenience ----------------------------------------------------
+
+    def set_many(self, mapping: Dict[str, Any]) -> List[Any]:
+        return self.execute([("SET", key, value) for key, value in mapping.items()])
+
+    def get_many(self, keys: Sequence[str]) -> List[Any]:
+        return self.execute([("GET", key) for key in keys])
+
+    def close(self) -> None:
+        self._pool.shutdown(wait=True)
+        for client in self._clients.values():
+            client.close()
+
+
+# --- benchmark ---------------------------------------------------------------
+
+@dataclass
+class ThroughputResult:
+    name: str
+    ops: int
+    elapsed: float
+
+    @property
+    def ops_per_sec(self) -> float:
+        return self.ops / self.elapsed if self.elapsed else 0.0
+
+
+def _check_replies(operation: str, keys: Sequence[str], replies: List[Any], expected: List[Any]) -> None:
+    """Raise on the first reply that is an error or differs from what was written."""
+    if len(replies) != len(expected):
+        raise RuntimeError(f"{operation}: {len(replies)} replies for {len(expected)} commands")
+    for key, reply, want in zip(keys, replies, expected):
+        if isinstance(reply, Exception):
+            raise RuntimeError(f"{operation} {key!r} failed: {reply}")
+        if reply != want:
+            raise RuntimeError(f"{operation} {key!r} returned {reply!r}, expected {want!r}")
+
+
+def run_throughput_comparison(rc: RedisCluster, executor: ClusterBulkExecutor, keys: int = 10_000,
+                              batch: int = 1000, prefix: str = "perf:key:") -> List[ThroughputResult]:
+    """Sequential RedisCluster SET/GET vs slot-aware parallel pipelines."""
+    names = [f"{prefix}{i}" for i in range(keys)]
+    results: List[ThroughputResult] = []
+
+    start = time.perf_counter()
+    for i, name in enumerate(names):
+        rc.set(name, f"value_{i}")
+    results.append(ThroughputResult("sequential SET", keys, time.perf_counter() - start))
+
+    start = time.perf_counter()
+    for name in names:
+        rc.get(name)
+    results.append(ThroughputResult("sequential GET", keys, time.perf_counter() - start))
+
+    start = time.perf_counter()
+    for first in range(0, keys, batch):
+        chunk = names[first:first + batch]
+        replies = executor.set_many({name: f"value_{first + i}" for i, name in enumerate(chunk)})
+        _check_replies("pipelined SET", chunk, replies, [True] * len(chunk))
+    results.append(ThroughputResult(f"pipelined SET (batch {batch})", keys, time.perf_counter() - start))
+
+    start = time.perf_counter()
+    for first in range(0, keys, batch):
+        chunk = names[first:first + batch]
+        _check_replies("pipelined GET", chunk, executor.get_many(chunk),
+                       [f"value_{first + i}" for i in range(len(chunk))])
+    results.append(ThroughputResult(f"pipelined GET (batch {batch})", keys, time.perf_counter() - start))
+    return results
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--host", default="localhost")
+    parser.add_argument("--port", type=int, default=7000)
+    parser.add_argument("--keys", type=int, default=10_000)
+    parser.add_argument("--batch", type=int, default=1000)
+    args = parser.parse_args()
+
+    rc = RedisCluster(host=args.host, port=args.port, decode_responses=True)
+    executor = ClusterBulkExecutor([(args.host, args.port)])
+    print(f"Primaries: {', '.join(f'{h}:{p}' for h, p in executor.slot_map.nodes())}")
+    for result in run_throughput_comparison(rc, executor, args.keys, args.batch):
+        print(f"{result.name:28} {result.elapsed:7.3f}s {result.ops_per_sec:10.0f} ops/sec")
+    print(f"Redirects: {executor.stats.moved} MOVED, {executor.stats.ask} ASK")
+    executor.close()
+
+
+if __name__ == "__main__":
+    main()
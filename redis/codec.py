@@ -0,0 +1,257 @@
+"""Pluggable value codecs for cached objects.
+
+Every encoded value starts with one header byte: the low nibble is the
+serialization format, bit ``0x10`` marks zlib compression. Values longer than
+``compress_threshold`` bytes are compressed; smaller ones are not worth the
+CPU. ``decode`` dispatches on the header, not on the codec's own settings,
+so switching format or threshold keeps existing keys readable. A first byte
+that is not one of the eight header values marks a header-less legacy value
+(plain JSON or text written before the codec existed), which still decodes.
+
+Unpickling runs arbitrary code, so a reader refuses pickle values unless it
+is a pickle codec itself or was built with ``allow_pickle=True``: a JSON
+reader on a shared cache cannot be made to execute what someone else wrote.
+
+Only the benchmark talks to Redis; the codecs themselves need no redis-py
+and are shared with the memcached example.
+"""
+from __future__ import annotations
+
+import argparse
+import json
+import pickle
+import time
+import zlib
+from dataclasses import dataclass
+from typing import Any, Callable, Dict, List, Optional, Tuple
+
+try:
+    import redis
+except ImportError:  # only run_codec_benchmark needs it
+    redis = None
+
+try:
+    import msgpack
+except ImportError:  # optional: pip install msgpack
+    msgpack = None
+
+RAW = 0x00
+JSON = 0x01
+MSGPACK = 0x02
+PICKLE = 0x03
+ZLIB = 0x10
+FORMAT_MASK = 0x0F
+
+FORMATS = {"raw": RAW, "json": JSON, "msgpack": MSGPACK, "pickle": PICKLE}
+HEADERS = frozenset(fmt | flag for fmt in FORMATS.values() for flag in (0, ZLIB))
+
+
+def _dumps(fmt: int, value: Any) -> bytes:
+    if fmt == JSON:
+        return json.dumps(value, separators=(",", ":")).encode()
+    if fmt == MSGPACK:
+        return msgpack.packb(value, use_bin_type=True)
+    if fmt == PICKLE:
+        return pickle.dumps(value, protocol=pickle.HIGHEST_PROTOCOL)
+    return value if isinstance(value, bytes) else str(value).encode()
+
+
+def _loads(fmt: int, data: bytes) -> Any:
+    if fmt == JSON:
+        return json.loads(data)
+    if fmt == MSGPACK:
+        if msgpack is None:
+            raise RuntimeError("value was written with msgpack; pip install msgpack")
+        return msgpack.unpackb(data, raw=False)
+    if fmt == PICKLE:
+        return pickle.loads(data)
+    return data
+
+
+class Codec:
+    """Encode values to header-prefixed bytes and back.
+
+    ``fmt`` is one of ``FORMATS``; ``compress_threshold=None`` disables zlib.
+    ``allow_pickle`` lets a non-pickle codec read pickle values; only set it
+    for caches no untrusted party can write to. Use with a client created
+    with ``decode_responses=False``.
+    """
+
+    def __init__(self, fmt: str = "json", compress_threshold: Optional[int] = 1024, level: int = 1,
+                 allow_pickle: bool = False) -> None:
+        if fmt not in FORMATS:
+            raise ValueError(f"unknown codec format: {fmt}")
+        if fmt == "msgpack" and msgpack is None:
+            raise RuntimeError("msgpack codec requires: pip install msgpack")
+        self.fmt = fmt
+        self.format_id = FORMATS[fmt]
+        self.compress_threshold = compress_threshold
+        self.level = level
+        self.allow_pickle = allow_pickle or fmt == "pickle"
+
+    @staticmethod
+    def available() -> List[str]:
+        return [name for name in FORMATS if name != "msgpack" or msgpack is not None]
+
+    @property
+    def name(self) -> str:
+        return self.fmt + (f"+zlib>{self.compress_threshold}" if self.compress_threshold is not None else "")
+
+    def encode(self, value: Any) -> bytes:
+        header = self.format_id
+        body = _dumps(header, value)
+        if self.compress_threshold is not None and len(body) > self.compress_threshold:
+            compressed = zlib.compress(body, self.level)
+            if len(compressed) < len(body):
+                header |= ZLIB
+                body = compressed
+        return bytes((header,)) + body
+
+    def decode(self, data: Optional[bytes]) -> Any:
+        if data is None:
+            return None
+        if isinstance(data, str):
+            data = data.encode()
+        if not data or data[0] not in HEADERS:
+            # Legacy value written without a header: JSON, or else plain text
+            try:
+                return json.loads(data)
+            except ValueError:
+                return data.decode(errors="replace")
+        header, body = data[0], data[1:]
+        if header & FORMAT_MASK == PICKLE and not self.allow_pickle:
+            raise ValueError("refusing to unpickle a cached value; use allow_pickle=True for trusted caches only")
+        if header & ZLIB:
+            body = zlib.decompress(body)
+        return _loads(header & FORMAT_MASK, body)
+
+
+class MemcacheSerde:
+    """pymemcache ``serde``: strings and ints stay plain so INCR/DECR work.
+
+    Flags 1 (text) and 2 (JSON) match the old ``json_serializer``, so values
+    written before the codec remain readable; flag 3 marks codec values.
+    """
+
+    TEXT, LEGACY_JSON, CODEC = 1, 2, 3
+
+    def __init__(self, codec: Codec) -> None:
+        self.codec = codec
+
+    def serialize(self, key: Any, value: Any) -> Tuple[bytes, int]:
+        if isinstance(value, str):
+            return value.encode(), self.TEXT
+        if isinstance(value, int) and not isinstance(value, bool):
+            return str(value).encode(), self.LEGACY_JSON
+        return self.codec.encode(value), self.CODEC
+
+    def deserialize(self, key: Any, value: bytes, flags: int) -> Any:
+        if flags == self.TEXT:
+            return value.decode()
+        if flags == self.LEGACY_JSON:
+            return json.loads(value)
+        if flags == self.CODEC:
+            return self.codec.decode(value)
+        return value
+
+
+# --- benchmark ---------------------------------------------------------------
+
+def payload_corpus() -> Dict[str, Any]:
+    """Representative cached objects, from a tiny session to a fat profile."""
+    user = {
+        "id": 1042,
+        "name": "User_1042",
+        "email": "user1042@example.com",
+        "created_at": "2024-03-01T12:00:00Z",
+        "roles": ["reader", "writer"],
+        "settings": {"theme": "dark", "lang": "en", "notifications": True},
+    }
+    return {
+        "session (small)": {"user_id": 1042, "token": "a" * 32, "expires": 1735689600},
+        "user": user,
+        "user + history": dict(user, history=[
+            {"ts": 1700000000 + i * 60, "action": "view", "item": f"product:{i % 50}", "price": 19.99 + i % 7}
+            for i in range(200)
+        ]),
+        "feed page (100 users)": [dict(user, id=i, name=f"User_{i}") for i in range(100)],
+    }
+
+
+@dataclass
+class CodecResult:
+    codec: str
+    payload: str
+    encoded_bytes: int
+    encode_ns: float
+    decode_ns: float
+    memory_usage: Optional[int]
+
+
+def _time_ns(fn: Callable[[], Any], iterations: int) -> float:
+    start = time.perf_counter_ns()
+    for _ in range(iterations):
+        fn()
+    return (time.perf_counter_ns() - start) / iterations
+
+
+def default_codecs() -> List[Codec]:
+    codecs = [Codec("json", None), Codec("json", 1024), Codec("pickle", None), Codec("pickle", 1024)]
+    if msgpack is not None:
+        codecs[2:2] = [Codec("msgpack", None), Codec("msgpack", 1024)]
+    return codecs
+
+
+def run_codec_benchmark(client: Optional[redis.Redis] = None, codecs: Optional[List[Codec]] = None,
+                        iterations: int = 2000, prefix: str = "codecbench:") -> List[CodecResult]:
+    """Encode/decode ns per op and, with a client, MEMORY USAGE per key."""
+    results: List[CodecResult] = []
+    for codec in codecs or default_codecs():
+        for name, payload in payload_corpus().items():
+            encoded = codec.encode(payload)
+            if codec.decode(encoded) != payload:
+                raise ValueError(f"{codec.name} does not round-trip the {name!r} payload")
+            memory = None
+            if client is not None:
+                key = f"{prefix}{codec.name}:{name}"
+                client.set(key, encoded)
+                try:
+                    memory = client.memory_usage(key)
+                except redis.ResponseError:
+                    memory = None  # MEMORY USAGE not supported by this server
+                client.delete(key)
+            results.append(CodecResult(
+                codec=codec.name,
+                payload=name,
+                encoded_bytes=len(encoded),
+                encode_ns=_time_ns(lambda: codec.encode(payload), iterations),
+                decode_ns=_time_ns(lambda: codec.decode(encoded), iterations),
+                memory_usage=memory,
+            ))
+    return results
+
+
+def print_results(results: List[CodecResult]) -> None:
+    print(f"{'codec':18} {'payload':22} {'bytes':>7} {'encode ns':>10} {'decode ns':>10} {'MEMORY USAGE':>13}")
+    for result in results:
+        memory = "-" if result.memory_usage is None else str(result.memory_usage)
+        print(f"{result.codec:18} {result.payload:22} {result.encoded_bytes:7} "
+              f"{result.encode_ns:10.0f} {result.decode_ns:10.0f} {memory:>13}")
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--host", default="localhost")
+    parser.add_argument("--port", type=int, default=6379)
+    parser.add_argument("--iterations", type=int, default=2000)
+    parser.add_argument("--offline", action="store_true", help="Skip MEMORY USAGE (no server needed)")
+    args = parser.parse_args()
+
+    if not args.offline and redis is None:
+        parser.error("redis-py is not installed; pip install redis or use --offline")
+    client = None if args.offline else redis.Redis(host=args.host, port=args.port)
+    print_results(run_codec_benchmark(client, iterations=args.iterations))
+
+
+if __name__ == "__main__":
+    main()
@@ -3,13 +3,29 @@
 Redis example - various data structures and patterns
 """
 
+import asyncio
 import json
 import time
 import redis
 from datetime import datetime, timedelta
 
+from batch_loader import BatchLoader, run_page_benchmark
+from bucket_store import (BucketedStore, ensure_listpack, print_storage_results, restore_listpack,
+                          run_storage_benchmark)
+from cache_aside import CacheAside, STAMPEDE_SCENARIOS, run_stampede_benchmark
+from codec import Codec, print_results, run_codec_benchmark
+from near_cache import NearCache, print_near_cache_results, run_near_cache_benchmark
+from pubsub_async import FanoutConfig, print_result, run_fanout_benchmark
+from script_registry import ScriptRegistry, run_script_benchmark
+from server_sampler import print_summary, sample_under_load
+from stream_queue import StreamQueue, run_queue_benchmark
+
 # Connect to Redis
 r = redis.Redis(host='localhost', port=6379, db=0, decode_responses=True)
+scripts = ScriptRegistry(r)
+# Binary connection for codec-encoded values (header byte + payload)
+rb = redis.Redis(host='localhost', port=6379, db=0)
+codec = Codec('json', compress_threshold=1024)
 
 def demo_basic_operations():
     print("=== Basic Redis Operations ===\n")
@@ -64,10 +80,37 @@ def demo_list_operations():
     item = r.rpop('queue')
     print(f"RPOP queue -> {item}")
 
-    # Blocking pop (timeout after 1 second)
-    print("BLPOP queue 1 (blocking pop with 1s timeout)...")
-    item = r.blpop('queue', timeout=1)
-    print(f"Result -> {item}")
+    # Work queue: a stream with a consumer group instead of LPUSH/BLPOP.
+    # A popped list item is gone even if its worker crashes; a stream entry
+    # stays pending until XACK and can be taken over with XAUTOCLAIM.
+    print("\n--- Work queue on Streams ---")
+    r.delete('tasks:stream')
+    # No MAXLEN: a length cap could trim tasks that are still pending
+    queue = StreamQueue(r, stream='tasks:stream', group='workers')
+    queue.ensure_group()
+    ids = queue.enqueue_many({'task': f'task{i}'} for i in range(1, 6))
+    print(f"XADD tasks:stream x5 -> {ids[0]} .. {ids[-1]}")
+
+    batch = queue.read('worker-1', count=3, block_ms=100)
+    print(f"XREADGROUP GROUP workers worker-1 COUNT 3 -> {[fields['payload'] for _, fields in batch]}")
+    print("worker-1 crashes before XACK...")
+    print(f"XPENDING tasks:stream workers -> {queue.pending()} pending")
+
+    claimed = queue.claim_stuck('worker-2', min_idle_ms=0)
+    print(f"XAUTOCLAIM by worker-2 -> {len(claimed)} messages taken over")
+    acked = queue.ack([message_id for message_id, _ in claimed])
+    rest = queue.read('worker-2', count=10, block_ms=100)
+    acked += queue.ack([message_id for message_id, _ in rest])
+    print(f"XACK -> {acked} acked, {queue.pending()} pending")
+    print(f"XTRIM MINID ~ below the oldest unacked entry -> {queue.trim_acked()} trimmed "
+          f"(radix-tree nodes go whole, so small streams may keep everything)")
+
+    print("\nList BLPOP vs Streams XREADGROUP (2000 tasks):")
+    print(f"{'queue':18} {'consumers':>9} {'tasks/sec':>10} {'p50':>9} {'p99':>9}")
+    for result in run_queue_benchmark(tasks=2000, consumer_counts=(1, 8, 64)):
+        print(f"{result.name:18} {result.consumers:9} {result.tasks_per_sec:10.0f} "
+              f"{result.p50_ms:8.2f}ms {result.p99_ms:8.2f}ms")
+    r.delete('queue', 'tasks:stream')
 
 def demo_set_operations():
     print("\n=== Set Operations ===\n")
@@ -158,6 +201,26 @@ def demo_hash_operations():
     fields = r.hkeys('user:1')
     print(f"HKEYS user:1 -> {fields}")
 
+    # Millions of small users: pack them into bucket hashes (users:{N//1000},
+    # field N) so each bucket stays a compact listpack and the per-key
+    # overhead is paid once per 1000 users
+    print("\nBucketed storage:")
+    previous = ensure_listpack(r, bucket_size=1000)
+    try:
+        users = BucketedStore(r, prefix='users', bucket_size=1000)
+        users.set(1234567, {'name': 'Bob', 'age': 41, 'city': 'LA'})
+        print(f"set(1234567) -> HSET {users.key_for(1234567)} 1234567 <json>")
+        print(f"get(1234567) -> {users.get(1234567)}")
+        users.set_many({i: {'name': f'User_{i}'} for i in range(1234000, 1234010)})
+        print(f"get_many(1234000..1234002) -> {users.get_many([1234000, 1234001, 1234002])}")
+        print(f"HLEN {users.key_for(1234567)} -> {r.hlen(users.key_for(1234567))}")
+        r.delete(users.key_for(1234567))
+    finally:
+        restore_listpack(r, previous)
+
+    print("\nPlain keys vs hash per user vs bucketed hashes (50,000 users):")
+    print_storage_results(run_storage_benchmark(r, users=50_000))
+
 def demo_pub_sub():
     print("\n=== Pub/Sub Pattern ===\n")
 
@@ -192,6 +255,15 @@ def demo_pub_sub():
 
     sub_thread.join()
 
+def demo_pub_sub_throughput():
+    print("\n=== Pub/Sub Fan-out Throughput (asyncio) ===\n")
+
+    # 16 channels, 8 channel subscribers + 2 pattern subscribers, one slow consumer
+    config = FanoutConfig(duration=3.0, slow_subscribers=1)
+    print(f"{config.publishers} publishers -> {config.channels} channels -> "
+          f"{config.subscribers} + {config.pattern_subscribers} (pattern) subscribers\n")
+    print_result(asyncio.run(run_fanout_benchmark(config=config)))
+
 def demo_transactions():
     print("\n=== Transactions (MULTI/EXEC) ===\n")
 
@@ -220,19 +292,9 @@ def demo_transactions():
 def demo_lua_scripting():
     print("\n=== Lua Scripting ===\n")
 
-    # Define a Lua script for atomic compare and swap
-    lua_script = """
-    local current = redis.call('get', KEYS[1])
-    if current == ARGV[1] then
-        redis.call('set', KEYS[1], ARGV[2])
-        return 1
-    else
-        return 0
-    end
-    """
-
-    # Register script
-    cas = r.register_script(lua_script)
+    # Scripts from redis/*.lua are SCRIPT LOADed once and called via EVALSHA
+    print(f"Loaded scripts: {sorted(scripts.sources)}")
+    cas = scripts['cas']
 
     # Set initial value
     r.set('counter', '100')
@@ -248,6 +310,16 @@ def demo_lua_scripting():
     print(f"CAS counter: if 100 then set 300 -> Success: {result}")
     print(f"  Value unchanged: {r.get('counter')}")
 
+    # script.lua: GET + add + SET counter
+    value = scripts.call('script', keys=['counter:lua'], args=[5])
+    print(f"EVALSHA script.lua counter:lua 5 -> {value}")
+
+    print("\nEVAL vs EVALSHA vs INCRBY (5000 calls):")
+    print(f"{'variant':20} {'ops/sec':>10} {'payload bytes':>14}")
+    for result in run_script_benchmark(r, iterations=5000):
+        print(f"{result.name:20} {result.ops_per_sec:10.0f} {result.request_bytes:14}")
+    r.delete('counter:lua')
+
 def demo_persistence_info():
     print("\n=== Persistence Info ===\n")
 
@@ -267,23 +339,18 @@ def demo_persistence_info():
 def demo_cache_patterns():
     print("\n=== Cache Patterns ===\n")
 
-    # Cache-Aside Pattern
-    def get_user(user_id):
-        cache_key = f'cache:user:{user_id}'
-
-        # Try cache
-        cached = r.get(cache_key)
-        if cached:
-            print(f"  Cache HIT for user {user_id}")
-            return json.loads(cached)
-
+    # Cache-Aside Pattern with single-flight loading and early refresh
+    def load_user(cache_key):
         # Simulate DB fetch
-        print(f"  Cache MISS for user {user_id}, fetching from DB...")
-        user = {'id': user_id, 'name': f'User_{user_id}', 'timestamp': str(datetime.now())}
+        user_id = int(cache_key.rsplit(':', 1)[1])
+        print(f"  Loading user {user_id} from DB...")
+        return {'id': user_id, 'name': f'User_{user_id}', 'timestamp': str(datetime.now())}
 
-        # Store in cache with TTL
-        r.setex(cache_key, 60, json.dumps(user))
-        return user
+    users = CacheAside(r, load_user, ttl=60, stale_ttl=30, lock='redis')
+    users.invalidate('cache:user:1')
+
+    def get_user(user_id):
+        return users.get(f'cache:user:{user_id}')
 
     print("Cache-Aside Pattern:")
     user = get_user(1)
@@ -291,13 +358,15 @@ def demo_cache_patterns():
 
     user = get_user(1)  # Should hit cache
     print(f"  Result: {user}")
+    print(f"  Stats: {users.stats}")
 
-    # Write-Through Pattern
+    # Write-Through Pattern: write through the same CacheAside, so the value
+    # keeps the envelope its readers expect
     def update_user(user_id, data):
         cache_key = f'cache:user:{user_id}'
 
         # Update cache
-        r.setex(cache_key, 60, json.dumps(data))
+        users.set(cache_key, data)
 
         # Simulate DB update
         print(f"  Updated user {user_id} in cache and DB")
@@ -306,6 +375,85 @@ def demo_cache_patterns():
     print("\nWrite-Through Pattern:")
     updated = update_user(1, {'id': 1, 'name': 'Updated_User_1'})
     print(f"  Result: {updated}")
+    print(f"  Read back: {get_user(1)}")
+    users.close()
+
+def demo_value_codecs():
+    print("\n=== Value Codecs ===\n")
+
+    # A value written before the codec (plain JSON) still decodes
+    r.set('codec:legacy', json.dumps({'id': 7, 'name': 'Legacy'}))
+    print(f"Legacy JSON value -> {codec.decode(rb.get('codec:legacy'))}")
+
+    # Values carry their own header byte, so a reader does not need to know
+    # which codec the writer used
+    packed = Codec('msgpack' if 'msgpack' in Codec.available() else 'json', compress_threshold=64)
+    rb.set('codec:new', packed.encode({'id': 8, 'tags': ['a'] * 50}))
+    print(f"{packed.name} value, decoded by a json codec -> {codec.decode(rb.get('codec:new'))['id']}")
+
+    # ...except pickle: unpickling runs code, so only readers that opt in accept it
+    rb.set('codec:pickled', Codec('pickle').encode({'id': 9}))
+    try:
+        codec.decode(rb.get('codec:pickled'))
+    except ValueError as e:
+        print(f"pickle value, decoded by a json codec -> {e}")
+    r.delete('codec:legacy', 'codec:new', 'codec:pickled')
+
+    print("\nEncode/decode cost and MEMORY USAGE per key:")
+    print_results(run_codec_benchmark(rb, iterations=500))
+
+def demo_cache_stampede():
+    print("\n=== Cache Stampede Protection ===\n")
+
+    # 32 threads read one hot key whose TTL expires every second;
+    # the origin takes 50ms per load
+    client = redis.Redis(host='localhost', port=6379, db=0, decode_responses=True,
+                         max_connections=64)
+    print(f"{'mode':36} {'origin':>7} {'requests':>9} {'p99':>8} {'max':>8}")
+    for mode, beta, stale_ttl in STAMPEDE_SCENARIOS:
+        result = run_stampede_benchmark(client, mode, beta, stale_ttl, threads=32, duration=2.5)
+        print(f"{result.mode:36} {result.origin_hits:7} {result.requests:9} "
+              f"{result.p99_ms:7.2f}ms {result.max_ms:7.2f}ms")
+
+def demo_batched_lookups():
+    print("\n=== Batched Cache Lookups (DataLoader) ===\n")
+
+    def fetch_users(user_ids):
+        print(f"  Loading users {user_ids} from DB in one query")
+        return {uid: {'id': int(uid), 'name': f'User_{uid}'} for uid in user_ids}
+
+    r.delete(*[f'cache:user:{i}' for i in range(1, 6)])
+    loader = BatchLoader(r, fetch_users, prefix='cache:user:')
+
+    # Lookups issued together are coalesced into one MGET + one SETEX pipeline
+    futures = [loader.load(uid) for uid in ['1', '2', '3', '2', '1']]
+    print(f"  Results: {[f.result()['name'] for f in futures]}")
+    print(f"  Second page: {[u['name'] for u in loader.load_many(['1', '4', '5'])]}")
+    print(f"  Stats: {loader.stats}")
+    loader.close()
+
+    print("\nRound trips per page (40 lookups/page):")
+    for result in run_page_benchmark(r, pages=100):
+        print(f"  {result.name:18} {result.round_trips_per_page:6.1f} round trips, "
+              f"{result.ms_per_page:.3f} ms/page")
+
+def demo_near_cache():
+    print("\n=== Client-Side Near-Cache (CLIENT TRACKING) ===\n")
+
+    r.set('config:feature_flags', json.dumps({'new_ui': True}))
+    cache = NearCache(max_entries=1000)
+    cache.get('config:feature_flags')           # miss: read from the server, now tracked
+    cache.get('config:feature_flags')           # hit: served from process memory
+    r.set('config:feature_flags', json.dumps({'new_ui': False}))  # another client writes
+    time.sleep(0.05)                            # invalidation push arrives
+    print(f"After remote write: {cache.get('config:feature_flags')} (stats: {cache.stats})")
+    cache.close()
+    r.delete('config:feature_flags')
+
+    print("\nReads with a concurrent writer (hot 10% of keys take 90% of reads):")
+    results = run_near_cache_benchmark(duration=3)
+    results += run_near_cache_benchmark(duration=3, prefixes=['near:key:'])[1:]  # broadcast mode
+    print_near_cache_results(results)
 
 def demo_monitoring():
     print("\n=== Monitoring & Stats ===\n")
@@ -328,11 +476,17 @@ def demo_monitoring():
             print(f"  Command: {' '.join(query['command'])[:50]}...")
             print(f"  Duration: {query['duration']} microseconds")
 
+    # Continuous sampling: rates from INFO deltas, new SLOWLOG entries,
+    # LATENCY LATEST, one JSON line per sample when output= is set
+    print()
+    print_summary(sample_under_load(r, duration=3, interval=0.5))
+
 if __name__ == "__main__":
     try:
         # Test connection
         r.ping()
         print("Connected to Redis successfully!\n")
+        scripts.load()
 
         # Run demos
         demo_basic_operations()
@@ -341,10 +495,15 @@ if __name__ == "__main__":
         demo_sorted_set_operations()
         demo_hash_operations()
         demo_pub_sub()
+        demo_pub_sub_throughput()
         demo_transactions()
         demo_lua_scripting()
         demo_persistence_info()
         demo_cache_patterns()
+        demo_value_codecs()
+        demo_cache_stampede()
+        demo_batched_lookups()
+        demo_near_cache()
         demo_monitoring()
 
         print("\n=== Demo Complete ===")
@@ -7,8 +7,15 @@ import time
 import redis
 from redis.cluster import RedisCluster
 from redis.cluster import ClusterNode
+from redis.exceptions import RedisClusterException
 import json
 
+from cluster_analyzer import SlotTracker, analyze, print_report, sample_keys
+from cluster_batch import ClusterBatch, print_latency, run_batch_latency
+from cluster_pipeline import ClusterBulkExecutor, SlotMap, key_slot, run_throughput_comparison
+from key_cleanup import unlink_matching
+from script_registry import ScriptRegistry
+
 def demo_cluster_connection():
     """Connect to Redis Cluster"""
     print("=== Redis Cluster Connection ===\n")
@@ -51,16 +58,16 @@ def demo_sharding(rc):
 
     print(f"Set {keys_to_set} keys")
 
-    # Check distribution
-    nodes = rc.cluster_nodes()
-    print("\nKey distribution across nodes:")
+    # Simulated skewed traffic: every other read hits the same key
+    tracker = SlotTracker()
+    now = time.time()
+    for i in range(10_000):
+        tracker.record("key:0" if i % 2 else f"key:{i % keys_to_set}", now + i / 10_000)
 
-    for node in nodes:
-        if node['flags'] == 'master':
-            slots = node['slots']
-            if slots:
-                slot_range = f"{slots[0][0]}-{slots[0][1]}" if slots else "none"
-                print(f"  Node {node['host']}:{node['port']}: slots {slot_range}")
+    # Slot and node of every key are computed locally, memory comes from MEMORY USAGE
+    slot_map = SlotMap([(node.host, node.port) for node in rc.get_primaries()])
+    print("\nKey distribution across nodes:")
+    print_report(analyze(sample_keys(rc, match="key:*"), slot_map, tracker), slot_map)
 
 def demo_hash_tags(rc):
     """Demonstrate hash tags for key grouping"""
@@ -81,6 +88,27 @@ def demo_hash_tags(rc):
     for key, value in zip(keys, values):
         print(f"  {key}: {value[:50]}...")
 
+    # Without a shared tag the keys land in different slots and MGET is refused
+    keys = [f"user:{i}:name" for i in range(5)]
+    try:
+        rc.mget(keys)
+    except (RedisClusterException, redis.ResponseError) as e:
+        print(f"\nCross-slot MGET: {e}")
+
+    # Scatter-gather: one MGET/MSET per slot, one pipeline per master, in parallel
+    executor = ClusterBulkExecutor([(node.host, node.port) for node in rc.get_primaries()])
+    batch = ClusterBatch(executor)
+    batch.mset({key: f"User {i}" for i, key in enumerate(keys)})
+    result = batch.mget(keys)
+    print(f"Scatter-gather MGET over {len({key_slot(k) for k in keys})} slots: {result.values}")
+    if not result.ok:
+        print(f"  failed keys: {sorted(result.errors)}")
+    print(f"Deleted {batch.delete_many(keys).count} keys")
+
+    print("\nRead latency, per-key GET vs scatter-gather MGET:")
+    print_latency(run_batch_latency(rc, batch))
+    executor.close()
+
 def demo_cluster_failover(rc):
     """Demonstrate cluster resilience"""
     print("\n=== Cluster Failover ===\n")
@@ -135,34 +163,28 @@ def demo_cluster_operations(rc):
     final_balance = rc.get("{trans}:balance")
     print(f"Final balance after transaction: {final_balance}")
 
+    # Lua scripts: SCRIPT LOAD on every master, then EVALSHA routed by key slot
+    print("\nLua scripts via EVALSHA:")
+    scripts = ScriptRegistry(rc)
+    print(f"SCRIPT LOAD {sorted(scripts.sources)} on {scripts.load()} masters")
+    rc.set("{trans}:state", "pending")
+    swapped = scripts.call("cas", keys=["{trans}:state"], args=["pending", "done"])
+    print(f"CAS {{trans}}:state pending -> done: {swapped}")
+
 def demo_cluster_performance(rc):
     """Performance testing on cluster"""
     print("\n=== Cluster Performance ===\n")
 
-    # Parallel writes across cluster
-    start = time.time()
-
-    for i in range(10000):
-        # Keys distributed across all nodes
-        rc.set(f"perf:key:{i}", f"value_{i}")
-
-    elapsed = time.time() - start
-    print(f"10,000 distributed writes in {elapsed:.3f} seconds")
-    print(f"Throughput: {10000/elapsed:.0f} ops/sec")
-
-    # Parallel reads
-    start = time.time()
+    # Sequential single-key calls vs slot-aware pipelines: slots computed
+    # locally, one pipeline per master, all masters in parallel
+    executor = ClusterBulkExecutor([(node.host, node.port) for node in rc.get_primaries()])
+    for result in run_throughput_comparison(rc, executor, keys=10000, batch=1000):
+        print(f"10,000 {result.name:26} in {result.elapsed:.3f} seconds ({result.ops_per_sec:.0f} ops/sec)")
+    print(f"Redirects handled: {executor.stats.moved} MOVED, {executor.stats.ask} ASK")
+    executor.close()
 
-    for i in range(10000):
-        rc.get(f"perf:key:{i}")
-
-    elapsed = time.time() - start
-    print(f"10,000 distributed reads in {elapsed:.3f} seconds")
-    print(f"Throughput: {10000/elapsed:.0f} ops/sec")
-
-    # Cleanup
-    for i in range(10000):
-        rc.delete(f"perf:key:{i}")
+    # Cleanup: SCAN each master, pipelined UNLINK
+    print(unlink_matching(rc, "perf:key:*"))
 
 def demo_cluster_monitoring(rc):
     """Monitor cluster health"""
@@ -210,6 +232,9 @@ def demo_cluster_resharding():
     print("1. Reshard away from node: redis-cli --cluster reshard")
     print("2. Remove node: redis-cli --cluster del-node")
 
+    print("\nResharding under load (latency, MOVED/ASK and errors per second):")
+    print("  python3 reshard_under_load.py --workers 8 --slots 1000")
+
 # Standalone demos that work without cluster
 def demo_standalone_features():
     """Features that work in standalone Redis"""
@@ -0,0 +1,322 @@
+"""Client-side near-cache kept coherent by server-assisted invalidation.
+
+``NearCache`` answers ``get`` from a bounded in-process LRU and goes to the
+server only on a miss. Coherence comes from ``CLIENT TRACKING`` (Redis 6+,
+Valkey): every data connection turns tracking on as it connects, with
+invalidations redirected to one subscriber connection listening on
+``__redis__:invalidate``:
+
+* default mode - the server remembers which keys each connection read and
+  sends an invalidation when one of them changes;
+* broadcast mode (``prefixes=[...]``) - the server sends invalidations for
+  every key under the prefixes, read or not; no per-key state on the server.
+
+Invalidations travel on a different connection than the replies, so a reply
+can arrive after the invalidation for the same key. A key invalidated while
+its ``GET`` is in flight is therefore not stored. When the subscriber
+connection drops, invalidations may have been missed: the cache is flushed,
+nothing is cached until the listener is back, and the data connections are
+reset so tracking is re-enabled towards the new subscriber.
+"""
+from __future__ import annotations
+
+import argparse
+import random
+import threading
+import time
+import uuid
+from collections import OrderedDict
+from dataclasses import dataclass
+from typing import Any, Callable, Dict, List, Optional, Sequence
+
+import redis
+
+INVALIDATE_CHANNEL = "__redis__:invalidate"
+
+
+@dataclass
+class NearCacheStats:
+    hits: int = 0
+    misses: int = 0
+    invalidations: int = 0
+    evictions: int = 0
+    flushes: int = 0
+
+    @property
+    def hit_ratio(self) -> float:
+        total = self.hits + self.misses
+        return self.hits / total if total else 0.0
+
+
+class NearCache:
+    """``get``/``set``/``delete`` with a tracked in-process LRU in front."""
+
+    def __init__(
+        self,
+        host: str = "localhost",
+        port: int = 6379,
+        max_entries: int = 10_000,
+        prefixes: Sequence[str] = (),
+        protocol: int = 3,
+        on_invalidate: Optional[Callable[[List[str]], None]] = None,
+        **connection_kwargs: Any,
+    ) -> None:
+        self.max_entries = max_entries
+        self.prefixes = list(prefixes)
+        self.on_invalidate = on_invalidate
+        self.stats = NearCacheStats()
+        self._cache: "OrderedDict[str, Any]" = OrderedDict()
+        self._inflight: Dict[str, List[Any]] = {}  # key -> [readers, invalidated meanwhile]
+        self._lock = threading.Lock()
+        self._epoch = 0  # bumped by every flush; loads that straddle one are not stored
+        self._redirect: Optional[int] = None
+        self._stop = threading.Event()
+
+        kwargs = {"host": host, "port": port, "protocol": protocol, "decode_responses": True, **connection_kwargs}
+        self._name = f"near-cache-{uuid.uuid4().hex[:8]}"
+        self._control = redis.Redis(**kwargs)  # looks up the subscriber's client id
+        self._listener = redis.Redis(client_name=self._name, **kwargs)
+        self._pubsub = self._listener.pubsub(ignore_subscribe_messages=True)
+        self._pubsub.subscribe(INVALIDATE_CHANNEL)
+        self._pubsub.connection.register_connect_callback(self._on_listener_connect)
+        self._redirect = self._listener_id()
+
+        self.client = redis.Redis(redis_connect_func=self._enable_tracking, **kwargs)
+        self._thread = threading.Thread(target=self._listen, name="near-cache-invalidations", daemon=True)
+        self._thread.start()
+
+    # --- tracking -------------------------------------------------------
+
+    def _listener_id(self) -> int:
+        # Only the subscriber connection carries the name: the control client has none
+        for entry in self._control.client_list():
+            if entry.get("name") == self._name:
+                return int(entry["id"])
+        raise redis.ConnectionError("invalidation subscriber is not connected")
+
+    def _enable_tracking(self, connection: redis.connection.AbstractConnection) -> None:
+        """redis_connect_func: runs on every new or re-established data connection."""
+        connection.on_connect()
+        if self._redirect is None:
+            raise redis.ConnectionError("invalidation subscriber is not connected")
+        args: List[Any] = ["CLIENT", "TRACKING", "ON", "REDIRECT", self._redirect]
+        if self.prefixes:
+            args.append("BCAST")
+            for prefix in self.prefixes:
+                args += ["PREFIX", prefix]
+        connection.send_command(*args)
+        if redis.utils.str_if_bytes(connection.read_response()) != "OK":
+            raise redis.ConnectionError("CLIENT TRACKING was not enabled")
+
+    def _on_listener_connect(self, connection: redis.connection.AbstractConnection) -> None:
+        # The subscriber reconnected with a new client id: data connections still
+        # redirect to the old one, and anything sent meanwhile was lost
+        self.flush()
+        self._redirect = self._listener_id()
+        self.client.connection_pool.disconnect()
+
+    def _listen(self) -> None:
+        while not self._stop.is_set():
+            try:
+                message = self._pubsub.get_message(timeout=1.0)
+            except (redis.ConnectionError, redis.TimeoutError):
+                # Server unreachable: serve nothing from memory until it is back
+                self.flush()
+                self._redirect = None
+                self._stop.wait(1.0)
+                continue
+            if message and message["type"] == "message":
+                self._invalidate(message["data"])
+
+    def _invalidate(self, keys: Optional[List[str]]) -> None:
+        if keys is None:  # FLUSHALL / FLUSHDB
+            self.flush()
+            return
+        with self._lock:
+            for key in keys:
+                self._cache.pop(key, None)
+                if key in self._inflight:
+                    self._inflight[key][1] = True
+            self.stats.invalidations += len(keys)
+        if self.on_invalidate is not None:
+            self.on_invalidate(keys)
+
+    # --- cache ----------------------------------------------------------
+
+    def get(self, key: str) -> Any:
+        with self._lock:
+            if key in self._cache:
+                self._cache.move_to_end(key)
+                self.stats.hits += 1
+                return self._cache[key]
+            self.stats.misses += 1
+            pending = self._inflight.setdefault(key, [0, False])
+            pending[0] += 1
+            epoch = self._epoch
+        value: Any = None
+        loaded = False
+        try:
+            value = self.client.get(key)
+            loaded = True
+        finally:
+            # Release and store under one lock, so no invalidation slips in between
+            with self._lock:
+                pending[0] -= 1
+                if pending[0] == 0:
+                    del self._inflight[key]
+                if loaded and not pending[1] and epoch == self._epoch and self._redirect is not None:
+                    self._cache[key] = value
+                    if len(self._cache) > self.max_entries:
+                        self._cache.popitem(last=False)
+                        self.stats.evictions += 1
+        return value
+
+    def set(self, key: str, value: Any, **kwargs: Any) -> Any:
+        # Tracking invalidates other clients' copies and, once it arrives, ours;
+        # dropping ours now keeps read-your-writes for this process
+        with self._lock:
+            self._cache.pop(key, None)
+        return self.client.set(key, value, **kwargs)
+
+    def delete(self, *keys: str) -> int:
+        with self._lock:
+            for key in keys:
+                self._cache.pop(key, None)
+        return self.client.delete(*keys)
+
+    def flush(self) -> None:
+        with self._lock:
+            self._cache.clear()
+            for pending in self._inflight.values():
+                pending[1] = True
+            self._epoch += 1
+            self.stats.flushes += 1
+
+    def __len__(self) -> int:
+        return len(self._cache)
+
+    def close(self) -> None:
+        self._stop.set()
+        self._thread.join()
+        self._pubsub.close()
+        self._listener.close()
+        self._control.close()
+        self.client.close()
+
+
+# --- benchmark ---------------------------------------------------------------
+
+@dataclass
+class NearCacheResult:
+    name: str
+    reads_per_sec: float
+    hit_ratio: Optional[float]
+    staleness_p50_ms: Optional[float]
+    staleness_p99_ms: Optional[float]
+    staleness_max_ms: Optional[float]
+
+
+def _percentile(values: List[float], q: float) -> float:
+    values = sorted(values)
+    return values[min(int(len(values) * q), len(values) - 1)] if values else 0.0
+
+
+def _hot_key(rng: random.Random, keys: int) -> str:
+    # 90% of reads go to the hottest 10% of keys
+    hot = max(1, keys // 10)
+    return f"near:key:{rng.randrange(hot) if rng.random() < 0.9 else rng.randrange(keys)}"
+
+
+def run_near_cache_benchmark(host: str = "localhost", port: int = 6379, keys: int = 1000,
+                             duration: float = 5.0, writes_per_sec: float = 50.0,
+                             max_entries: int = 10_000, prefixes: Sequence[str] = ()) -> List[NearCacheResult]:
+    """Read QPS with and without the near-cache while another client keeps writing.
+
+    Staleness is the time from a write to the arrival of its invalidation:
+    the window in which this process could still serve the old value.
+    """
+    plain = redis.Redis(host=host, port=port, decode_responses=True)
+    pipe = plain.pipeline(transaction=False)
+    for i in range(keys):
+        pipe.set(f"near:key:{i}", f"value_{i}")
+    pipe.execute()
+
+    written: Dict[str, float] = {}
+    staleness: List[float] = []
+    lock = threading.Lock()
+
+    def on_invalidate(invalidated: List[str]) -> None:
+        now = time.perf_counter()
+        with lock:
+            for key in invalidated:
+                if key in written:
+                    staleness.append((now - written.pop(key)) * 1000)
+
+    def writer(stop: threading.Event) -> None:
+        client = redis.Redis(host=host, port=port, decode_responses=True)
+        rng = random.Random(2)
+        while not stop.wait(1.0 / writes_per_sec):
+            key = _hot_key(rng, keys)
+            with lock:
+                written[key] = time.perf_counter()
+            client.set(key, f"value_{time.time()}")
+
+    def read_loop(get: Callable[[str], Any]) -> float:
+        rng = random.Random(1)
+        stop = threading.Event()
+        thread = threading.Thread(target=writer, args=(stop,), daemon=True)
+        thread.start()
+        reads, deadline = 0, time.perf_counter() + duration
+        start = time.perf_counter()
+        while time.perf_counter() < deadline:
+            get(_hot_key(rng, keys))
+            reads += 1
+        elapsed = time.perf_counter() - start
+        stop.set()
+        thread.join()
+        return reads / elapsed
+
+    results = [NearCacheResult("GET over the network", read_loop(plain.get), None, None, None, None)]
+
+    cache = NearCache(host, port, max_entries=max_entries, prefixes=prefixes, on_invalidate=on_invalidate)
+    mode = f"broadcast {','.join(prefixes)}" if prefixes else "default"
+    qps = read_loop(cache.get)
+    time.sleep(0.2)  # let trailing invalidations arrive
+    results.append(NearCacheResult(
+        f"near-cache ({mode})", qps, cache.stats.hit_ratio,
+        _percentile(staleness, 0.5), _percentile(staleness, 0.99), max(staleness, default=0.0),
+    ))
+    cache.close()
+    plain.delete(*[f"near:key:{i}" for i in range(keys)])
+    return results
+
+
+def print_near_cache_results(results: List[NearCacheResult]) -> None:
+    print(f"{'mode':28} {'reads/sec':>10} {'hit ratio':>10} {'stale p50':>10} {'p99':>8} {'max':>8}")
+    for r in results:
+        if r.hit_ratio is None:
+            print(f"{r.name:28} {r.reads_per_sec:10.0f} {'-':>10} {'-':>10} {'-':>8} {'-':>8}")
+        else:
+            print(f"{r.name:28} {r.reads_per_sec:10.0f} {r.hit_ratio:10.1%} {r.staleness_p50_ms:8.2f}ms "
+                  f"{r.staleness_p99_ms:6.2f}ms {r.staleness_max_ms:6.2f}ms")
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--host", default="localhost")
+    parser.add_argument("--port", type=int, default=6379)
+    parser.add_argument("--keys", type=int, default=1000)
+    parser.add_argument("--duration", type=float, default=5.0)
+    parser.add_argument("--writes-per-sec", type=float, default=50.0)
+    parser.add_argument("--max-entries", type=int, default=10_000)
+    parser.add_argument("--bcast", action="store_true", help="Broadcast mode on the near:key: prefix")
+    args = parser.parse_args()
+
+    print_near_cache_results(run_near_cache_benchmark(
+        args.host, args.port, args.keys, args.duration, args.writes_per_sec, args.max_entries,
+        prefixes=["near:key:"] if args.bcast else (),
+    ))
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,241 @@
+"""asyncio Pub/Sub fan-out benchmark built on ``redis.asyncio``.
+
+Publishers spread messages over many channels; N subscribers listen either
+to every channel explicitly or through a pattern subscription. Each message
+carries its publish timestamp, so subscribers measure publish-to-receive
+latency. While the run is in progress a monitor samples ``CLIENT LIST TYPE
+pubsub`` for output-buffer growth (slow-consumer backpressure) and counts
+subscribers the server disconnects for exceeding
+``client-output-buffer-limit pubsub``.
+"""
+from __future__ import annotations
+
+import argparse
+import asyncio
+import time
+from dataclasses import dataclass, field
+from typing import Dict, List, Optional
+
+import redis
+import redis.asyncio
+
+
+@dataclass
+class FanoutConfig:
+    channels: int = 16
+    subscribers: int = 8
+    pattern_subscribers: int = 2
+    slow_subscribers: int = 0
+    slow_delay: float = 0.01
+    publishers: int = 4
+    duration: float = 5.0
+    payload_size: int = 64
+    output_buffer_limit: Optional[str] = None  # e.g. "1mb 256kb 5"
+    prefix: str = "fanout"
+
+
+@dataclass
+class SubscriberState:
+    name: str
+    latencies: List[float] = field(default_factory=list)
+    received: int = 0
+    disconnected: bool = False
+
+
+@dataclass
+class FanoutResult:
+    published: int
+    publish_rate: float
+    delivered: int
+    delivery_rate: float
+    expected: int
+    p50_ms: float
+    p99_ms: float
+    p999_ms: float
+    max_omem: Dict[str, int]
+    disconnects: int
+    server_disconnects: int
+
+
+def percentile(values: List[float], q: float) -> float:
+    if not values:
+        return 0.0
+    return values[min(int(len(values) * q), len(values) - 1)]
+
+
+async def subscriber(client: redis.asyncio.Redis, config: FanoutConfig, state: SubscriberState,
+                     pattern: bool, delay: float, ready: asyncio.Event, stop: asyncio.Event) -> None:
+    pubsub = client.pubsub()
+    await client.client_setname(state.name)
+    if pattern:
+        await pubsub.psubscribe(f"{config.prefix}:*")
+    else:
+        await pubsub.subscribe(*[f"{config.prefix}:{i}" for i in range(config.channels)])
+    ready.set()
+
+    try:
+        while not stop.is_set():
+            message = await pubsub.get_message(ignore_subscribe_messages=True, timeout=0.1)
+            if message is None:
+                continue
+            sent_ns = int(message["data"].split(b":", 1)[0])
+            state.latencies.append((time.time_ns() - sent_ns) / 1e6)
+            state.received += 1
+            if delay:
+                await asyncio.sleep(delay)
+    except (redis.ConnectionError, ConnectionError):
+        # Killed by the server once its output buffer exceeded the limit
+        state.disconnected = True
+    finally:
+        try:
+            await pubsub.aclose()
+        except Exception:
+            pass
+
+
+async def publisher(client: redis.asyncio.Redis, config: FanoutConfig, index: int,
+                    stop: asyncio.Event, counts: List[int], receivers: List[int]) -> None:
+    padding = b"x" * config.payload_size
+    channel = index
+    while not stop.is_set():
+        # Small pipelines keep the event loop busy without one round trip per message
+        pipe = client.pipeline(transaction=False)
+        for _ in range(50):
+            pipe.publish(f"{config.prefix}:{channel % config.channels}",
+                         b"%d:" % time.time_ns() + padding)
+            channel += config.publishers
+        for delivered_to in await pipe.execute():
+            receivers[0] += delivered_to
+        counts[index] += 50
+
+
+async def monitor(client: redis.asyncio.Redis, stop: asyncio.Event, max_omem: Dict[str, int]) -> None:
+    while not stop.is_set():
+        for entry in await client.client_list(_type="pubsub"):
+            name = entry.get("name") or entry.get("id")
+            max_omem[name] = max(max_omem.get(name, 0), int(entry.get("omem", 0)))
+        await asyncio.sleep(0.2)
+
+
+async def run_fanout_benchmark(host: str = "localhost", port: int = 6379,
+                               config: Optional[FanoutConfig] = None) -> FanoutResult:
+    config = config or FanoutConfig()
+    admin = redis.asyncio.Redis(host=host, port=port, decode_responses=True)
+
+    previous_limit = None
+    if config.output_buffer_limit:
+        previous_limit = (await admin.config_get("client-output-buffer-limit"))["client-output-buffer-limit"]
+        await admin.config_set("client-output-buffer-limit", f"pubsub {config.output_buffer_limit}")
+    stats_before = await admin.info("stats")
+
+    stop = asyncio.Event()
+    states: List[SubscriberState] = []
+    tasks = []
+    ready_events = []
+    clients = []
+
+    total = config.subscribers + config.pattern_subscribers
+    for i in range(total):
+        pattern = i >= config.subscribers
+        slow = i < config.slow_subscribers
+        state = SubscriberState(name=f"{'psub' if pattern else 'sub'}-{i}{'-slow' if slow else ''}")
+        states.append(state)
+        client = redis.asyncio.Redis(host=host, port=port)
+        clients.append(client)
+        ready = asyncio.Event()
+        ready_events.append(ready)
+        tasks.append(asyncio.create_task(subscriber(
+            client, config, state, pattern, config.slow_delay if slow else 0.0, ready, stop)))
+    await asyncio.gather(*(event.wait() for event in ready_events))
+
+    max_omem: Dict[str, int] = {}
+    counts = [0] * config.publishers
+    receivers = [0]
+    pub_client = redis.asyncio.Redis(host=host, port=port, max_connections=config.publishers + 1)
+    stop_publishing = asyncio.Event()
+    pub_tasks = [asyncio.create_task(publisher(pub_client, config, i, stop_publishing, counts, receivers))
+                 for i in range(config.publishers)]
+    monitor_task = asyncio.create_task(monitor(admin, stop, max_omem))
+
+    started = time.perf_counter()
+    await asyncio.sleep(config.duration)
+    stop_publishing.set()
+    await asyncio.gather(*pub_tasks)
+    elapsed = time.perf_counter() - started
+
+    # Let subscribers drain what is already buffered
+    await asyncio.sleep(1.0)
+    stop.set()
+    await asyncio.gather(*tasks, monitor_task)
+
+    stats_after = await admin.info("stats")
+    if previous_limit is not None:
+        await admin.config_set("client-output-buffer-limit", previous_limit)
+    for client in clients:
+        await client.aclose()
+    await pub_client.aclose()
+    await admin.aclose()
+
+    latencies = sorted(lat for state in states for lat in state.latencies)
+    delivered = sum(state.received for state in states)
+    published = sum(counts)
+    key = "client_output_buffer_limit_disconnections"
+    return FanoutResult(
+        published=published,
+        publish_rate=published / elapsed,
+        delivered=delivered,
+        delivery_rate=delivered / elapsed,
+        expected=receivers[0],
+        p50_ms=percentile(latencies, 0.5),
+        p99_ms=percentile(latencies, 0.99),
+        p999_ms=percentile(latencies, 0.999),
+        max_omem=max_omem,
+        disconnects=sum(1 for state in states if state.disconnected),
+        server_disconnects=int(stats_after.get(key, 0)) - int(stats_before.get(key, 0)),
+    )
+
+
+def print_result(result: FanoutResult) -> None:
+    print(f"Published: {result.published} ({result.publish_rate:.0f} msg/sec)")
+    print(f"Delivered: {result.delivered} of {result.expected} ({result.delivery_rate:.0f} msg/sec)")
+    print(f"Publish->receive latency: p50={result.p50_ms:.2f}ms p99={result.p99_ms:.2f}ms "
+          f"p99.9={result.p999_ms:.2f}ms")
+    worst = sorted(result.max_omem.items(), key=lambda item: item[1], reverse=True)[:3]
+    print(f"Peak output buffers: {', '.join(f'{name}={omem / 1024:.0f}KB' for name, omem in worst)}")
+    print(f"Slow-consumer disconnects: {result.disconnects} seen by clients, "
+          f"{result.server_disconnects} reported by server")
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--host", default="localhost")
+    parser.add_argument("--port", type=int, default=6379)
+    parser.add_argument("--channels", type=int, default=16)
+    parser.add_argument("--subscribers", type=int, default=8)
+    parser.add_argument("--pattern-subscribers", type=int, default=2)
+    parser.add_argument("--slow-subscribers", type=int, default=0,
+                        help="Subscribers that sleep --slow-delay after every message")
+    parser.add_argument("--slow-delay", type=float, default=0.01)
+    parser.add_argument("--publishers", type=int, default=4)
+    parser.add_argument("--duration", type=float, default=5.0)
+    parser.add_argument("--payload-size", type=int, default=64)
+    parser.add_argument("--output-buffer-limit", default=None,
+                        help='Temporary pubsub limit, e.g. "1mb 256kb 5"')
+    args = parser.parse_args()
+
+    config = FanoutConfig(
+        channels=args.channels,
+        subscribers=args.subscribers,
+        pattern_subscribers=args.pattern_subscribers,
+        slow_subscribers=args.slow_subscribers,
+        slow_delay=args.slow_delay,
+        publishers=args.publishers,
+        duration=args.duration,
+        payload_size=args.payload_size,
+        output_buffer_limit=args.output_buffer_limit,
+    )
+    print_result(asyncio.run(run_fanout_benchmark(args.host, args.port, config)))
+
+
+if __name__ == "__main__":
+    main()
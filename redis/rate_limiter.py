@@ -0,0 +1,198 @@
+"""Atomic rate limiters, one ``EVALSHA`` per decision or per batch.
+
+A fixed window built from ``INCR`` + ``EXPIRE`` lets a client send the full
+limit at the end of one window and again at the start of the next: 2x the
+rate across the boundary. The three variants here each run as a single Lua
+script (``ratelimit_*.lua``, loaded through ``ScriptRegistry``), read the
+clock with ``TIME`` on the server so clients with skewed clocks agree, and
+answer ``(allowed, remaining, retry_after_ms)``:
+
+* ``sliding_log``    - a sorted set of request timestamps; exact, but memory
+  grows with the limit (one member per request in the window);
+* ``sliding_window`` - current and previous window counters, the previous one
+  weighted by its overlap; approximate, constant memory per client;
+* ``token_bucket``   - tokens refilled continuously; allows bursts up to the
+  limit, constant memory per client.
+
+``allow_many`` checks many clients in one call: all keys go to one script
+invocation (per slot on a cluster, where keys of one call must share a slot).
+"""
+from __future__ import annotations
+
+import argparse
+import time
+from dataclasses import dataclass
+from typing import Dict, List, Optional, Sequence, Union
+
+import redis
+from redis.cluster import RedisCluster
+
+from cluster_pipeline import key_slot
+from script_registry import ScriptRegistry
+
+ALGORITHMS = ("sliding_log", "sliding_window", "token_bucket")
+# The log is a ZSET and the other two are hashes with different fields, so
+# limiters of different algorithms sharing a prefix would hit WRONGTYPE or
+# misread each other's state
+DEFAULT_PREFIXES = {"sliding_log": "rate:log", "sliding_window": "rate:window", "token_bucket": "rate:bucket"}
+
+
+@dataclass
+class Decision:
+    key: str
+    allowed: bool
+    remaining: int
+    retry_after_ms: int
+
+
+class RateLimiter:
+    """`limit` requests per `window` seconds per client id.
+
+    Keys are ``{prefix}:{client_id}``; `prefix` defaults per algorithm
+    (``DEFAULT_PREFIXES``).
+    """
+
+    def __init__(
+        self,
+        client: Union[redis.Redis, RedisCluster],
+        limit: int,
+        window: float,
+        algorithm: str = "sliding_window",
+        prefix: Optional[str] = None,
+        scripts: Optional[ScriptRegistry] = None,
+    ) -> None:
+        if algorithm not in ALGORITHMS:
+            raise ValueError(f"unknown algorithm {algorithm!r}; choose from {', '.join(ALGORITHMS)}")
+        self.client = client
+        self.limit = limit
+        self.window_ms = int(window * 1000)
+        self.algorithm = algorithm
+        self.prefix = prefix or DEFAULT_PREFIXES[algorithm]
+        self.scripts = scripts or ScriptRegistry(client)
+        self.script = f"ratelimit_{algorithm}"
+
+    def key_for(self, client_id: str) -> str:
+        return f"{self.prefix}:{client_id}"
+
+    def _check(self, keys: List[str], cost: int) -> List[Decision]:
+        reply = self.scripts.call(self.script, keys=keys, args=[self.limit, self.window_ms, cost])
+        return [Decision(key, bool(reply[i * 3]), int(reply[i * 3 + 1]), int(reply[i * 3 + 2]))
+                for i, key in enumerate(keys)]
+
+    def allow(self, client_id: str, cost: int = 1) -> Decision:
+        return self._check([self.key_for(client_id)], cost)[0]
+
+    def allow_many(self, client_ids: Sequence[str], cost: int = 1) -> List[Decision]:
+        """One decision per id, in order; one script call (per slot on a cluster)."""
+        keys = [self.key_for(client_id) for client_id in client_ids]
+        if not isinstance(self.client, RedisCluster):
+            return self._check(keys, cost)
+        by_slot: Dict[int, List[int]] = {}
+        for index, key in enumerate(keys):
+            by_slot.setdefault(key_slot(key), []).append(index)
+        decisions: List[Optional[Decision]] = [None] * len(keys)
+        for positions in by_slot.values():
+            for index, decision in zip(positions, self._check([keys[i] for i in positions], cost)):
+                decisions[index] = decision
+        return decisions  # type: ignore[return-value]
+
+    def reset(self, client_id: str) -> None:
+        self.client.delete(self.key_for(client_id))
+
+
+# --- benchmark ---------------------------------------------------------------
+
+@dataclass
+class LimiterResult:
+    name: str
+    decisions_per_sec: float
+    batch_decisions_per_sec: Optional[float]
+    bytes_per_client: Optional[float]
+
+
+def _used_memory(client: redis.Redis) -> Optional[int]:
+    try:
+        return int(client.info("memory")["used_memory"])
+    except (redis.ResponseError, KeyError):
+        return None
+
+
+def run_limiter_benchmark(client: redis.Redis, clients: int = 10_000, decisions: int = 20_000,
+                          limit: int = 100, window: float = 60.0, per_client: int = 10,
+                          batch: int = 100) -> List[LimiterResult]:
+    """Single and batched decisions/sec, and memory per tracked client.
+
+    Every client first makes `per_client` requests so the sliding log holds
+    that many members, as it would at a steady per-client rate.
+    """
+    ids = [str(i) for i in range(clients)]
+    sample = [ids[i % clients] for i in range(0, decisions * 7, 7)]
+    scripts = ScriptRegistry(client)
+    scripts.load()
+    results: List[LimiterResult] = []
+
+    # Baseline: the fixed window from INCR + EXPIRE in a pipeline
+    start = time.perf_counter()
+    for client_id in sample:
+        pipe = client.pipeline()
+        pipe.incr(f"bench:rate:fixed:{client_id}")
+        pipe.expire(f"bench:rate:fixed:{client_id}", int(window))
+        pipe.execute()
+    results.append(LimiterResult("fixed window (INCR+EXPIRE)", decisions / (time.perf_counter() - start),
+                                 None, None))
+    client.delete(*{f"bench:rate:fixed:{client_id}" for client_id in sample})
+
+    for algorithm in ALGORITHMS:
+        limiter = RateLimiter(client, limit, window, algorithm, prefix=f"bench:rate:{algorithm}", scripts=scripts)
+        before = _used_memory(client)
+        for _ in range(per_client):
+            for first in range(0, clients, batch):
+                limiter.allow_many(ids[first:first + batch])
+        after = _used_memory(client)
+
+        start = time.perf_counter()
+        for client_id in sample:
+            limiter.allow(client_id)
+        single = decisions / (time.perf_counter() - start)
+
+        start = time.perf_counter()
+        for first in range(0, decisions, batch):
+            limiter.allow_many(sample[first:first + batch])
+        batched = decisions / (time.perf_counter() - start)
+
+        results.append(LimiterResult(
+            algorithm, single, batched,
+            None if before is None or after is None else (after - before) / clients,
+        ))
+        keys = [limiter.key_for(client_id) for client_id in ids]
+        for first in range(0, clients, 1000):
+            client.unlink(*keys[first:first + 1000])
+    return results
+
+
+def print_limiter_results(results: List[LimiterResult]) -> None:
+    print(f"{'algorithm':28} {'decisions/sec':>14} {'batched/sec':>12} {'bytes/client':>13}")
+    for result in results:
+        batched = "-" if result.batch_decisions_per_sec is None else f"{result.batch_decisions_per_sec:.0f}"
+        memory = "-" if result.bytes_per_client is None else f"{result.bytes_per_client:.0f}"
+        print(f"{result.name:28} {result.decisions_per_sec:14.0f} {batched:>12} {memory:>13}")
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--host", default="localhost")
+    parser.add_argument("--port", type=int, default=6379)
+    parser.add_argument("--clients", type=int, default=10_000, help="Tracked client ids")
+    parser.add_argument("--decisions", type=int, default=20_000)
+    parser.add_argument("--limit", type=int, default=100)
+    parser.add_argument("--window", type=float, default=60.0, help="Seconds")
+    parser.add_argument("--batch", type=int, default=100, help="Client ids per allow_many call")
+    args = parser.parse_args()
+
+    client = redis.Redis(host=args.host, port=args.port, decode_responses=True)
+    print_limiter_results(run_limiter_benchmark(client, args.clients, args.decisions, args.limit,
+                                                args.window, batch=args.batch))
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,30 @@
+-- Sliding log rate limiter on a sorted set: one member per accepted request,
+-- scored by its time in ms. Exact, memory grows with the limit.
+-- KEYS: one sorted set per client; ARGV[1] limit, ARGV[2] window ms, ARGV[3] cost
+-- Returns {allowed, remaining, retry_after_ms} for every key, flattened.
+local limit, window, cost = tonumber(ARGV[1]), tonumber(ARGV[2]), tonumber(ARGV[3])
+local t = redis.call('TIME')
+local now = t[1] * 1000 + math.floor(t[2] / 1000)
+local result = {}
+for i, key in ipairs(KEYS) do
+    redis.call('ZREMRANGEBYSCORE', key, '-inf', now - window)
+    local count = redis.call('ZCARD', key)
+    if count + cost <= limit then
+        for n = 1, cost do
+            -- count keeps members unique when several requests share a millisecond
+            redis.call('ZADD', key, now, now .. ':' .. (count + n))
+        end
+        redis.call('PEXPIRE', key, window)
+        result[#result + 1] = 1
+        result[#result + 1] = limit - count - cost
+        result[#result + 1] = 0
+    else
+        local oldest = redis.call('ZRANGE', key, count + cost - limit - 1, count + cost - limit - 1, 'WITHSCORES')
+        result[#result + 1] = 0
+        result[#result + 1] = limit - count
+        -- +1 ms: retrying exactly on the boundary can still see the entry.
+        -- A cost above the limit can never pass: report a full window
+        result[#result + 1] = oldest[2] and tonumber(oldest[2]) + window - now + 1 or window
+    end
+end
+return result
@@ -0,0 +1,45 @@
+-- Sliding window counter: counts for the current and previous fixed window,
+-- the previous one weighted by how much of it still overlaps the sliding
+-- window. Approximate, constant memory (one small hash per client).
+-- KEYS: one hash per client; ARGV[1] limit, ARGV[2] window ms, ARGV[3] cost
+-- Returns {allowed, remaining, retry_after_ms} for every key, flattened.
+local limit, window, cost = tonumber(ARGV[1]), tonumber(ARGV[2]), tonumber(ARGV[3])
+local t = redis.call('TIME')
+local now = t[1] * 1000 + math.floor(t[2] / 1000)
+local start = now - now % window
+local result = {}
+for i, key in ipairs(KEYS) do
+    local state = redis.call('HMGET', key, 'start', 'cur', 'prev')
+    local stored, cur, prev = tonumber(state[1]), tonumber(state[2]) or 0, tonumber(state[3]) or 0
+    if stored ~= start then
+        prev = (stored == start - window) and cur or 0
+        cur = 0
+    end
+    local overlap = (window - (now - start)) / window
+    local estimate = prev * overlap + cur
+    if estimate + cost <= limit then
+        cur = cur + cost
+        redis.call('HSET', key, 'start', start, 'cur', cur, 'prev', prev)
+        redis.call('PEXPIRE', key, 2 * window)
+        result[#result + 1] = 1
+        result[#result + 1] = math.floor(limit - estimate - cost)
+        result[#result + 1] = 0
+    else
+        -- The previous window's share decays linearly: wait until enough of it is
+        -- gone, or past the rollover, where this window's count starts decaying
+        local left = start + window - now
+        local excess = estimate + cost - limit
+        local retry = window  -- a cost above the limit can never pass
+        if cost <= limit then
+            if prev > 0 and excess * window / prev <= left then
+                retry = math.ceil(excess * window / prev)
+            else
+                retry = left + math.ceil(window * (1 - (limit - cost) / math.max(cur, 1)))
+            end
+        end
+        result[#result + 1] = 0
+        result[#result + 1] = math.max(0, math.floor(limit - estimate))
+        result[#result + 1] = retry
+    end
+end
+return result
@@ -0,0 +1,31 @@
+-- Token bucket: capacity ARGV[1] tokens, refilled at capacity per window, so
+-- bursts up to the capacity are allowed and the long-run rate is the limit.
+-- KEYS: one hash per client; ARGV[1] capacity, ARGV[2] window ms, ARGV[3] cost
+-- Returns {allowed, remaining, retry_after_ms} for every key, flattened.
+local capacity, window, cost = tonumber(ARGV[1]), tonumber(ARGV[2]), tonumber(ARGV[3])
+local rate = capacity / window  -- tokens per ms
+local t = redis.call('TIME')
+local now = t[1] * 1000 + math.floor(t[2] / 1000)
+local result = {}
+for i, key in ipairs(KEYS) do
+    local state = redis.call('HMGET', key, 'tokens', 'ts')
+    local tokens, ts = tonumber(state[1]) or capacity, tonumber(state[2]) or now
+    tokens = math.min(capacity, tokens + (now - ts) * rate)
+    local allowed = 0
+    if tokens >= cost then
+        tokens = tokens - cost
+        allowed = 1
+    end
+    redis.call('HSET', key, 'tokens', tokens, 'ts', now)
+    -- A full bucket is the same as no bucket, so the key can go once it would be full
+    redis.call('PEXPIRE', key, math.ceil((capacity - tokens) / rate) + 1)
+    result[#result + 1] = allowed
+    result[#result + 1] = math.floor(tokens)
+    local retry = 0
+    if allowed == 0 then
+        -- A cost above the capacity can never pass: report a full window
+        retry = cost > capacity and window or math.ceil((cost - tokens) / rate)
+    end
+    result[#result + 1] = retry
+end
+return result
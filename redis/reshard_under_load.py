@@ -0,0 +1,297 @@
+"""Resharding-under-load scenario for the local Docker cluster.
+
+Brings the cluster up with ``setup_cluster.sh``, starts a steady read/write
+load from worker threads, and walks through four phases while it runs:
+
+1. ``baseline``  - no topology changes;
+2. ``migrate``   - ``redis-cli --cluster reshard`` moves slots from the first
+   master to the second;
+3. ``add-node``  - a seventh node joins (port 7006) and ``rebalance`` gives
+   it slots;
+4. ``del-node``  - its slots are rebalanced away and the node is removed.
+
+Every operation is timed, and the ``MOVED`` / ``ASK`` replies it had to follow
+(``ClusterBulkExecutor`` follows them and counts them) and any error that
+survived the retries are recorded in one-second buckets. The report prints
+the per-second timeline and per-phase latency percentiles, then
+``stop_cluster.sh`` tears everything down (``--keep`` skips that).
+
+Needs Docker and the ``redis:latest`` image, like ``setup_cluster.sh``.
+"""
+from __future__ import annotations
+
+import argparse
+import os
+import random
+import re
+import subprocess
+import threading
+import time
+from dataclasses import dataclass, field
+from typing import Dict, List, Optional, Tuple
+
+import redis
+
+from cluster_pipeline import ClusterBulkExecutor
+
+SCRIPT_DIR = os.path.dirname(os.path.abspath(__file__))
+NETWORK = "redis-cluster-net"
+IMAGE = "redis:latest"
+NEW_PORT = 7006
+
+
+# --- cluster control ---------------------------------------------------------
+
+def _run(*command: str) -> str:
+    return subprocess.run(command, check=True, capture_output=True, text=True).stdout
+
+
+def redis_cli(*args: str) -> str:
+    """redis-cli in a throwaway container on the cluster network."""
+    return _run("docker", "run", "--rm", "--net", NETWORK, IMAGE, "redis-cli", *args)
+
+
+def container_ip(port: int) -> str:
+    return _run("docker", "inspect", "-f", "{{range.NetworkSettings.Networks}}{{.IPAddress}}{{end}}",
+                f"redis-node-{port}").strip()
+
+
+def node_address(port: int) -> str:
+    return f"{container_ip(port)}:{port}"
+
+
+def node_id(port: int) -> str:
+    return _run("docker", "exec", f"redis-node-{port}", "redis-cli", "-p", str(port), "cluster", "myid").strip()
+
+
+def masters(port: int = 7000) -> List[Tuple[str, int, int]]:
+    """(node id, port, slot count) of every master, from CLUSTER NODES."""
+    result = []
+    for line in _run("docker", "exec", f"redis-node-{port}", "redis-cli", "-p", str(port),
+                     "cluster", "nodes").splitlines():
+        parts = line.split()
+        if "master" not in parts[2].split(","):
+            continue
+        slots = 0
+        for spec in parts[8:]:
+            match = re.fullmatch(r"(\d+)(?:-(\d+))?", spec)  # skip [slot->-id] migration markers
+            if match:
+                slots += int(match.group(2) or match.group(1)) - int(match.group(1)) + 1
+        result.append((parts[0], int(parts[1].split(":")[1].split("@")[0]), slots))
+    return sorted(result, key=lambda m: m[1])
+
+
+def start_node(port: int) -> None:
+    """Same container layout as create_redis_node in setup_cluster.sh."""
+    data = f"/tmp/redis-cluster/{port}"
+    os.makedirs(data, exist_ok=True)
+    with open(os.path.join(data, "redis.conf"), "w") as f:
+        f.write(f"port {port}\ncluster-enabled yes\ncluster-config-file nodes.conf\n"
+                "cluster-node-timeout 5000\nappendonly yes\nprotected-mode no\nbind 0.0.0.0\n")
+    _run("docker", "run", "-d", "--name", f"redis-node-{port}", "--net", NETWORK,
+         "-p", f"{port}:{port}", "-p", f"{port + 10000}:{port + 10000}",
+         "-v", f"{data}:/data", IMAGE, "redis-server", "/data/redis.conf")
+    for _ in range(50):
+        try:
+            _run("docker", "exec", f"redis-node-{port}", "redis-cli", "-p", str(port), "ping")
+            return
+        except subprocess.CalledProcessError:
+            time.sleep(0.1)
+
+
+def stop_node(port: int) -> None:
+    subprocess.run(["docker", "rm", "-f", f"redis-node-{port}"], capture_output=True)
+
+
+# --- load --------------------------------------------------------------------
+
+@dataclass
+class Bucket:
+    ops: int = 0
+    errors: int = 0
+    moved: int = 0
+    ask: int = 0
+    latencies: List[float] = field(default_factory=list)  # ms
+
+
+def _percentile(values: List[float], q: float) -> float:
+    values = sorted(values)
+    return values[min(int(len(values) * q), len(values) - 1)] if values else 0.0
+
+
+class LoadGenerator:
+    """Worker threads issuing single-key GET/SET, bucketed per second."""
+
+    def __init__(self, startup_nodes: List[Tuple[str, int]], workers: int = 8, keys: int = 10_000,
+                 write_ratio: float = 0.2, value_size: int = 100, prefix: str = "reshard:") -> None:
+        self.startup_nodes = startup_nodes
+        self.workers = workers
+        self.keys = keys
+        self.write_ratio = write_ratio
+        self.value = "x" * value_size
+        self.prefix = prefix
+        self.buckets: Dict[int, Bucket] = {}
+        self.phases: List[Tuple[float, str]] = []
+        self._lock = threading.Lock()
+        self._stop = threading.Event()
+        self._threads: List[threading.Thread] = []
+
+    def preload(self) -> None:
+        executor = ClusterBulkExecutor(self.startup_nodes)
+        for first in range(0, self.keys, 1000):
+            executor.set_many({f"{self.prefix}{i}": self.value for i in range(first, min(first + 1000, self.keys))})
+        executor.close()
+
+    def _worker(self, seed: int) -> None:
+        rng = random.Random(seed)
+        # One executor per worker: its own slot map, connections and redirect counters
+        executor = ClusterBulkExecutor(self.startup_nodes, max_workers=1, socket_timeout=2)
+        stats = executor.stats
+        while not self._stop.is_set():
+            key = f"{self.prefix}{rng.randrange(self.keys)}"
+            command = ("SET", key, self.value) if rng.random() < self.write_ratio else ("GET", key)
+            moved, ask = stats.moved, stats.ask
+            start = time.perf_counter()
+            try:
+                failed = isinstance(executor.execute([command])[0], Exception)
+            except redis.RedisError:  # no node answered CLUSTER SLOTS, slot uncovered
+                failed = True
+                time.sleep(0.01)
+            elapsed = (time.perf_counter() - start) * 1000
+            with self._lock:
+                bucket = self.buckets.setdefault(int(time.time()), Bucket())
+                bucket.ops += 1
+                bucket.errors += failed
+                bucket.moved += stats.moved - moved
+                bucket.ask += stats.ask - ask
+                if not failed:
+                    bucket.latencies.append(elapsed)
+        executor.close()
+
+    def mark(self, phase: str) -> None:
+        print(f"[{time.strftime('%H:%M:%S')}] phase: {phase}")
+        self.phases.append((time.time(), phase))
+
+    def start(self) -> None:
+        self._stop.clear()
+        self._threads = [threading.Thread(target=self._worker, args=(i,), daemon=True)
+                         for i in range(self.workers)]
+        for thread in self._threads:
+            thread.start()
+
+    def stop(self) -> None:
+        self._stop.set()
+        for thread in self._threads:
+            thread.join()
+
+    def phase_at(self, second: int) -> str:
+        current = "-"
+        for ts, phase in self.phases:
+            if ts <= second + 1:
+                current = phase
+        return current
+
+
+def print_timeline(load: LoadGenerator) -> None:
+    seconds = sorted(load.buckets)
+    if not seconds:
+        return
+    print(f"{'t':>4} {'phase':10} {'ops/s':>7} {'p50ms':>7} {'p99ms':>7} {'MOVED':>6} {'ASK':>5} {'err/s':>6}")
+    for second in seconds:
+        b = load.buckets[second]
+        print(f"{second - seconds[0]:4} {load.phase_at(second):10} {b.ops:7} "
+              f"{_percentile(b.latencies, 0.5):7.2f} {_percentile(b.latencies, 0.99):7.2f} "
+              f"{b.moved:6} {b.ask:5} {b.errors:6}")
+
+
+def print_phase_summary(load: LoadGenerator) -> None:
+    phases: Dict[str, Bucket] = {}
+    counts: Dict[str, int] = {}
+    for second, b in load.buckets.items():
+        phase = load.phase_at(second)
+        total = phases.setdefault(phase, Bucket())
+        total.ops += b.ops
+        total.errors += b.errors
+        total.moved += b.moved
+        total.ask += b.ask
+        total.latencies.extend(b.latencies)
+        counts[phase] = counts.get(phase, 0) + 1
+    print(f"\n{'phase':10} {'ops/s':>7} {'p50ms':>7} {'p95ms':>7} {'p99ms':>7} {'maxms':>8} "
+          f"{'MOVED':>6} {'ASK':>5} {'errors':>6}")
+    for _, phase in load.phases:
+        if phase not in phases:
+            continue
+        t = phases[phase]
+        print(f"{phase:10} {t.ops / counts[phase]:7.0f} {_percentile(t.latencies, 0.5):7.2f} "
+              f"{_percentile(t.latencies, 0.95):7.2f} {_percentile(t.latencies, 0.99):7.2f} "
+              f"{max(t.latencies, default=0):8.2f} {t.moved:6} {t.ask:5} {t.errors:6}")
+
+
+# --- scenario ----------------------------------------------------------------
+
+def run_scenario(load: LoadGenerator, settle: float, slots: int) -> None:
+    load.mark("baseline")
+    time.sleep(settle)
+
+    source, target = masters()[:2]
+    load.mark("migrate")
+    redis_cli("--cluster", "reshard", node_address(7000), "--cluster-from", source[0],
+              "--cluster-to", target[0], "--cluster-slots", str(slots), "--cluster-yes")
+    time.sleep(settle)
+
+    load.mark("add-node")
+    start_node(NEW_PORT)
+    redis_cli("--cluster", "add-node", node_address(NEW_PORT), node_address(7000))
+    time.sleep(2)  # gossip: every node must know the newcomer before slots move to it
+    redis_cli("--cluster", "rebalance", node_address(7000), "--cluster-use-empty-masters", "--cluster-yes")
+    time.sleep(settle)
+
+    load.mark("del-node")
+    new_id = node_id(NEW_PORT)
+    redis_cli("--cluster", "rebalance", node_address(7000), "--cluster-weight", f"{new_id}=0", "--cluster-yes")
+    redis_cli("--cluster", "del-node", node_address(7000), new_id)
+    stop_node(NEW_PORT)
+    time.sleep(settle)
+    load.mark("done")
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--workers", type=int, default=8)
+    parser.add_argument("--keys", type=int, default=10_000)
+    parser.add_argument("--write-ratio", type=float, default=0.2)
+    parser.add_argument("--value-size", type=int, default=100)
+    parser.add_argument("--slots", type=int, default=1000, help="Slots moved in the migrate phase")
+    parser.add_argument("--settle", type=float, default=10.0, help="Seconds of load between phases")
+    parser.add_argument("--skip-setup", action="store_true", help="Use an already running cluster")
+    parser.add_argument("--keep", action="store_true", help="Do not run stop_cluster.sh at the end")
+    args = parser.parse_args()
+
+    if not args.skip_setup:
+        subprocess.run([os.path.join(SCRIPT_DIR, "setup_cluster.sh")], check=True)
+
+    load = LoadGenerator([("localhost", 7000)], args.workers, args.keys, args.write_ratio, args.value_size)
+    error: Optional[BaseException] = None
+    try:
+        load.preload()
+        load.start()
+        run_scenario(load, args.settle, args.slots)
+    except (subprocess.CalledProcessError, redis.RedisError) as exc:
+        error = exc
+        print(f"Scenario aborted: {exc}")
+        if isinstance(exc, subprocess.CalledProcessError):
+            print(exc.stderr)
+    finally:
+        load.stop()
+        stop_node(NEW_PORT)
+        print()
+        print_timeline(load)
+        print_phase_summary(load)
+        if not args.keep:
+            subprocess.run([os.path.join(SCRIPT_DIR, "stop_cluster.sh")])
+    if error is not None:
+        raise SystemExit(1)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,253 @@
+"""redis-benchmark-style load generator for any RESP endpoint.
+
+Every client (a thread, or a process with ``--processes`` so the Python
+client itself is not the bottleneck) owns one connection and, until the
+duration is up, sends pipelines of ``--pipeline`` commands drawn from a
+weighted command mix over a fixed keyspace with values from a size
+distribution. The keyspace is filled before the clock starts so reads hit.
+
+Latency is the round trip of the pipeline a command travelled in (what
+``redis-benchmark -P`` reports too), kept in a log-bucketed histogram so
+results from processes merge cheaply. The report gives ops/sec and
+p50/p95/p99/max per command and in total.
+
+The same run works against Redis, Valkey or Dragonfly (only ``--port``
+changes), or against an in-process stand-in with ``--fake`` (needs
+``pip install fakeredis``; threads only) to measure the client side alone::
+
+    python3 resp_bench.py --port 6379 --clients 16 --pipeline 16 \\
+        --mix get=80,set=20 --value-size 32-1024 --duration 10
+"""
+from __future__ import annotations
+
+import argparse
+import math
+import multiprocessing
+import random
+import threading
+import time
+from collections import Counter
+from dataclasses import dataclass, field
+from typing import Any, Callable, Dict, List, Optional, Tuple
+
+import redis
+
+from key_cleanup import unlink_matching
+
+try:
+    import fakeredis
+except ImportError:  # optional: pip install fakeredis
+    fakeredis = None
+
+# name -> (queue the command on a pipeline, needs a value)
+COMMANDS: Dict[str, Tuple[Callable[[Any, str, bytes], Any], bool]] = {
+    "get": (lambda pipe, key, value: pipe.get(key), False),
+    "set": (lambda pipe, key, value: pipe.set(key, value), True),
+    "incr": (lambda pipe, key, value: pipe.incr(key + ":n"), False),
+    "lpush": (lambda pipe, key, value: pipe.lpush(key + ":l", value), True),
+    "lpop": (lambda pipe, key, value: pipe.lpop(key + ":l"), False),
+    "sadd": (lambda pipe, key, value: pipe.sadd(key + ":s", value[:16]), True),
+    "hset": (lambda pipe, key, value: pipe.hset(key + ":h", "f", value), True),
+    "hget": (lambda pipe, key, value: pipe.hget(key + ":h", "f"), False),
+    "zadd": (lambda pipe, key, value: pipe.zadd(key + ":z", {value[:16]: len(value)}), True),
+}
+
+BUCKETS_PER_DOUBLING = 16  # ~4.4% bucket width
+PAYLOAD_BYTES = 1 << 20
+
+
+@dataclass
+class BenchConfig:
+    host: str = "localhost"
+    port: int = 6379
+    clients: int = 8
+    processes: bool = False
+    pipeline: int = 1
+    keyspace: int = 100_000
+    value_size: str = "100"  # "100", "32-1024" (uniform) or "64:9,4096:1" (weighted)
+    mix: str = "get=80,set=20"
+    duration: float = 10.0
+    prefix: str = "bench:"
+    fake: bool = False
+
+
+def parse_mix(spec: str) -> List[Tuple[str, int]]:
+    mix = []
+    for part in spec.split(","):
+        name, _, weight = part.partition("=")
+        name = name.strip().lower()
+        if name not in COMMANDS:
+            raise ValueError(f"unknown command {name!r}; choose from {', '.join(COMMANDS)}")
+        mix.append((name, int(weight or 1)))
+    return mix
+
+
+def value_sampler(spec: str, rng: random.Random) -> Callable[[], int]:
+    """Value sizes: fixed ``N``, uniform ``A-B`` or weighted ``size:weight,...``."""
+    if ":" in spec:
+        pairs = [part.split(":") for part in spec.split(",")]
+        sizes, weights = [int(s) for s, _ in pairs], [float(w) for _, w in pairs]
+        return lambda: rng.choices(sizes, weights)[0]
+    if "-" in spec:
+        low, high = (int(x) for x in spec.split("-"))
+        return lambda: rng.randint(low, high)
+    size = int(spec)
+    return lambda: size
+
+
+@dataclass
+class CommandStats:
+    ops: int = 0
+    histogram: Counter = field(default_factory=Counter)  # bucket -> count, microseconds
+
+    def record(self, micros: float, count: int = 1) -> None:
+        self.ops += count
+        self.histogram[int(math.log2(max(micros, 1.0)) * BUCKETS_PER_DOUBLING)] += count
+
+    def merge(self, other: "CommandStats") -> None:
+        self.ops += other.ops
+        self.histogram.update(other.histogram)
+
+    def percentile(self, q: float) -> float:
+        """Latency in ms at quantile `q` (upper edge of the bucket)."""
+        if not self.ops:
+            return 0.0
+        rank, seen = q * self.ops, 0
+        for bucket in sorted(self.histogram):
+            seen += self.histogram[bucket]
+            if seen >= rank:
+                return 2 ** ((bucket + 1) / BUCKETS_PER_DOUBLING) / 1000
+        return 0.0
+
+    @property
+    def max_ms(self) -> float:
+        return self.percentile(1.0)
+
+
+_fake_server: Optional[Any] = None
+
+
+def make_client(config: BenchConfig) -> redis.Redis:
+    global _fake_server
+    if config.fake:
+        if fakeredis is None:
+            raise RuntimeError("--fake requires: pip install fakeredis")
+        if _fake_server is None:
+            _fake_server = fakeredis.FakeServer()
+        return fakeredis.FakeRedis(server=_fake_server)
+    return redis.Redis(host=config.host, port=config.port)
+
+
+def prefill(config: BenchConfig, batch: int = 1000) -> None:
+    client = make_client(config)
+    sizes = value_sampler(config.value_size, random.Random(0))
+    for first in range(0, config.keyspace, batch):
+        pipe = client.pipeline(transaction=False)
+        for i in range(first, min(first + batch, config.keyspace)):
+            pipe.set(f"{config.prefix}{i}", b"x" * sizes())
+        pipe.execute()
+
+
+def run_client(config: BenchConfig, seed: int, start_at: float) -> Dict[str, CommandStats]:
+    """One client's loop; module-level so it can run in a worker process."""
+    rng = random.Random(seed)
+    client = make_client(config)
+    mix = parse_mix(config.mix)
+    names = [name for name, _ in mix]
+    weights = [weight for _, weight in mix]
+    sizes = value_sampler(config.value_size, rng)
+    payload = random.Random(seed).randbytes(PAYLOAD_BYTES)
+    stats: Dict[str, CommandStats] = {name: CommandStats() for name in names}
+
+    time.sleep(max(0.0, start_at - time.time()))  # all clients start together
+    deadline = time.perf_counter() + config.duration
+    while time.perf_counter() < deadline:
+        batch = rng.choices(names, weights, k=config.pipeline)
+        pipe = client.pipeline(transaction=False)
+        for name in batch:
+            queue, needs_value = COMMANDS[name]
+            value = b""
+            if needs_value:
+                # Random slice: distinct set/zset members, incompressible values
+                size = min(sizes(), PAYLOAD_BYTES)
+                offset = rng.randrange(PAYLOAD_BYTES - size + 1)
+                value = payload[offset:offset + size]
+            queue(pipe, f"{config.prefix}{rng.randrange(config.keyspace)}", value)
+        start = time.perf_counter()
+        pipe.execute(raise_on_error=False)
+        micros = (time.perf_counter() - start) * 1_000_000
+        for name, count in Counter(batch).items():
+            stats[name].record(micros, count)
+    return stats
+
+
+def run_benchmark(config: BenchConfig) -> Tuple[Dict[str, CommandStats], float]:
+    """Per-command stats merged over all clients, and the seconds they ran together."""
+    if config.fake and config.processes:
+        raise ValueError("--fake keeps the server in this process; use threads")
+    prefill(config)
+    # Spawned processes need time to import before the common start
+    start_at = time.time() + (2.0 if config.processes else 0.2)
+    if config.processes:
+        ctx = multiprocessing.get_context("spawn")
+        with ctx.Pool(config.clients) as pool:
+            results = pool.starmap(run_client, [(config, seed, start_at) for seed in range(config.clients)])
+    else:
+        results = [{} for _ in range(config.clients)]
+
+        def worker(seed: int) -> None:
+            results[seed] = run_client(config, seed, start_at)
+
+        threads = [threading.Thread(target=worker, args=(seed,)) for seed in range(config.clients)]
+        for thread in threads:
+            thread.start()
+        for thread in threads:
+            thread.join()
+
+    merged: Dict[str, CommandStats] = {}
+    for stats in results:
+        for name, command in stats.items():
+            merged.setdefault(name, CommandStats()).merge(command)
+    return merged, config.duration
+
+
+def print_report(stats: Dict[str, CommandStats], elapsed: float) -> None:
+    print(f"{'command':8} {'ops/sec':>10} {'p50ms':>8} {'p95ms':>8} {'p99ms':>8} {'maxms':>8}")
+    total = CommandStats()
+    for name, command in stats.items():
+        total.merge(command)
+        print(f"{name:8} {command.ops / elapsed:10.0f} {command.percentile(0.5):8.3f} "
+              f"{command.percentile(0.95):8.3f} {command.percentile(0.99):8.3f} {command.max_ms:8.3f}")
+    print(f"{'total':8} {total.ops / elapsed:10.0f} {total.percentile(0.5):8.3f} "
+          f"{total.percentile(0.95):8.3f} {total.percentile(0.99):8.3f} {total.max_ms:8.3f}")
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--host", default="localhost")
+    parser.add_argument("--port", type=int, default=6379)
+    parser.add_argument("--clients", type=int, default=8)
+    parser.add_argument("--processes", action="store_true", help="One process per client instead of threads")
+    parser.add_argument("--pipeline", type=int, default=1, help="Commands per round trip")
+    parser.add_argument("--keyspace", type=int, default=100_000)
+    parser.add_argument("--value-size", default="100", help="N, A-B (uniform) or size:weight,...")
+    parser.add_argument("--mix", default="get=80,set=20", help=f"Weights over: {', '.join(COMMANDS)}")
+    parser.add_argument("--duration", type=float, default=10.0)
+    parser.add_argument("--fake", action="store_true", help="In-process fakeredis server (threads only)")
+    parser.add_argument("--keep", action="store_true", help="Leave the benchmark keys in place")
+    args = parser.parse_args()
+
+    config = BenchConfig(args.host, args.port, args.clients, args.processes, args.pipeline, args.keyspace,
+                         args.value_size, args.mix, args.duration, fake=args.fake)
+    target = "in-process fakeredis" if config.fake else f"{config.host}:{config.port}"
+    print(f"{target}: {config.clients} {'processes' if config.processes else 'threads'}, "
+          f"pipeline {config.pipeline}, keyspace {config.keyspace}, values {config.value_size}B, "
+          f"mix {config.mix}, {config.duration:.0f}s")
+    stats, elapsed = run_benchmark(config)
+    print_report(stats, elapsed)
+    if not args.keep:
+        print(unlink_matching(make_client(config), f"{config.prefix}*"))
+
+
+if __name__ == "__main__":
+    main()
@@ -63,7 +63,7 @@ fi
 
 # Activate virtual environment and install dependencies
 source venv/bin/activate
-pip install -q redis
+pip install -q redis msgpack
 
 echo
 echo "==================================="
@@ -0,0 +1,151 @@
+"""Core-scaling sweep: throughput from 1 to N client processes.
+
+A single Python process cannot load a multi-threaded server: the GIL and one
+connection pool cap it first. Each step here runs ``resp_bench`` clients in
+``P`` spawned processes, every process with its own set of ``--connections``
+connections (one thread each), all starting together on a prefilled
+keyspace. ``P`` grows 1, 2, 4, ... up to ``--max-processes``.
+
+Per step the report gives ops/sec, speedup over one process, scaling
+efficiency (speedup / P), p50/p99, and the server side from ``INFO cpu``:
+cores busy (``used_cpu_sys + used_cpu_user`` delta per second) and ops per
+CPU-second. Throughput that keeps rising while cores busy climbs means the
+server spreads the load; a flat curve at ~1 core busy is a single-threaded
+server (or a saturated client host, so keep P under its core count)::
+
+    python3 scaling_sweep.py --port 6379 --max-processes 16 --pipeline 16
+"""
+from __future__ import annotations
+
+import argparse
+import multiprocessing
+import os
+import threading
+import time
+from dataclasses import dataclass
+from typing import Dict, List, Optional, Sequence
+
+import redis
+
+from key_cleanup import unlink_matching
+from resp_bench import BenchConfig, CommandStats, prefill, run_client
+
+
+@dataclass
+class ScalingPoint:
+    processes: int
+    connections: int
+    ops_per_sec: float
+    p50_ms: float
+    p99_ms: float
+    server_cores: Optional[float]  # CPU-seconds the server used per wall second
+
+
+def sweep_steps(max_processes: int) -> List[int]:
+    steps, n = [], 1
+    while n < max_processes:
+        steps.append(n)
+        n *= 2
+    return steps + [max_processes]
+
+
+def _cpu_seconds(client: redis.Redis) -> Optional[float]:
+    try:
+        info = client.info("cpu")
+        return float(info["used_cpu_sys"]) + float(info["used_cpu_user"])
+    except (redis.ResponseError, KeyError):
+        return None
+
+
+def run_process(config: BenchConfig, seed: int, start_at: float, connections: int) -> Dict[str, CommandStats]:
+    """One worker process: `connections` clients on threads, merged."""
+    results: List[Dict[str, CommandStats]] = [{} for _ in range(connections)]
+
+    def worker(index: int) -> None:
+        results[index] = run_client(config, seed * connections + index, start_at)
+
+    threads = [threading.Thread(target=worker, args=(i,)) for i in range(connections)]
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join()
+    merged: Dict[str, CommandStats] = {}
+    for stats in results:
+        for name, command in stats.items():
+            merged.setdefault(name, CommandStats()).merge(command)
+    return merged
+
+
+def run_step(config: BenchConfig, processes: int, connections: int = 1) -> ScalingPoint:
+    client = redis.Redis(host=config.host, port=config.port)
+    ctx = multiprocessing.get_context("spawn")
+    with ctx.Pool(processes) as pool:
+        # Spawned processes need time to import before the common start
+        start_at = time.time() + 2.0
+        pending = pool.starmap_async(run_process, [(config, seed, start_at, connections)
+                                                   for seed in range(processes)])
+        time.sleep(max(0.0, start_at - time.time()))
+        cpu_before = _cpu_seconds(client)
+        results = pending.get()
+        cpu_after = _cpu_seconds(client)
+
+    total = CommandStats()
+    for stats in results:
+        for command in stats.values():
+            total.merge(command)
+    cores = None if cpu_before is None or cpu_after is None else (cpu_after - cpu_before) / config.duration
+    client.close()
+    return ScalingPoint(processes, connections, total.ops / config.duration,
+                        total.percentile(0.5), total.percentile(0.99), cores)
+
+
+def run_sweep(config: BenchConfig, steps: Sequence[int], connections: int = 1) -> List[ScalingPoint]:
+    """One step per process count, on a keyspace filled once up front."""
+    prefill(config)
+    points = []
+    for processes in steps:
+        point = run_step(config, processes, connections)
+        print(f"  {processes:3} processes: {point.ops_per_sec:10.0f} ops/sec")
+        points.append(point)
+    return points
+
+
+def print_scaling(points: List[ScalingPoint]) -> None:
+    base = points[0].ops_per_sec / points[0].processes if points and points[0].ops_per_sec else 0.0
+    print(f"{'procs':>5} {'conns':>6} {'ops/sec':>10} {'speedup':>8} {'effic.':>7} {'p50ms':>7} {'p99ms':>7} "
+          f"{'srv cores':>9} {'ops/cpu-s':>10}")
+    for p in points:
+        speedup = p.ops_per_sec / base if base else 0.0
+        cores = "-" if p.server_cores is None else f"{p.server_cores:.2f}"
+        per_cpu = "-" if not p.server_cores else f"{p.ops_per_sec / p.server_cores:.0f}"
+        print(f"{p.processes:5} {p.processes * p.connections:6} {p.ops_per_sec:10.0f} {speedup:7.2f}x "
+              f"{speedup / p.processes:7.0%} {p.p50_ms:7.3f} {p.p99_ms:7.3f} {cores:>9} {per_cpu:>10}")
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--host", default="localhost")
+    parser.add_argument("--port", type=int, default=6379)
+    parser.add_argument("--max-processes", type=int, default=os.cpu_count() or 1)
+    parser.add_argument("--steps", help="Explicit process counts, e.g. 1,2,4,8 (overrides --max-processes)")
+    parser.add_argument("--connections", type=int, default=2, help="Connections per process")
+    parser.add_argument("--pipeline", type=int, default=16, help="Commands per round trip")
+    parser.add_argument("--keyspace", type=int, default=100_000)
+    parser.add_argument("--value-size", default="100", help="N, A-B (uniform) or size:weight,...")
+    parser.add_argument("--mix", default="get=80,set=20")
+    parser.add_argument("--duration", type=float, default=10.0, help="Seconds per step")
+    args = parser.parse_args()
+
+    steps = [int(n) for n in args.steps.split(",")] if args.steps else sweep_steps(args.max_processes)
+    config = BenchConfig(host=args.host, port=args.port, processes=True, pipeline=args.pipeline,
+                         keyspace=args.keyspace, value_size=args.value_size, mix=args.mix,
+                         duration=args.duration, prefix="scaling:")
+    print(f"{config.host}:{config.port}: processes {','.join(map(str, steps))} x {args.connections} connections, "
+          f"pipeline {config.pipeline}, mix {config.mix}, {config.duration:.0f}s per step "
+          f"(client host has {os.cpu_count()} cores)")
+    print_scaling(run_sweep(config, steps, args.connections))
+    print(unlink_matching(redis.Redis(host=config.host, port=config.port), f"{config.prefix}*"))
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,149 @@
+"""Lua script registry: preload once, call through ``EVALSHA``.
+
+Every ``*.lua`` file in a directory (this one by default) is registered under
+its file name without the extension. ``load()`` sends ``SCRIPT LOAD`` once to
+each node - the single server, or every primary of a ``RedisCluster`` - so
+later calls only ship the 40-byte SHA1. If a node answers ``NOSCRIPT``
+(restart, failover, ``SCRIPT FLUSH``, a newly added primary) the registry
+reloads the script on all nodes and retries the call once.
+"""
+from __future__ import annotations
+
+import argparse
+import hashlib
+import os
+import time
+from dataclasses import dataclass
+from typing import Any, Dict, List, Optional, Sequence
+
+import redis
+from redis.cluster import RedisCluster
+
+SCRIPT_DIR = os.path.dirname(os.path.abspath(__file__))
+
+
+class ScriptRegistry:
+    """Named Lua scripts for one client (standalone or cluster)."""
+
+    def __init__(self, client: redis.Redis | RedisCluster, directory: Optional[str] = SCRIPT_DIR) -> None:
+        self.client = client
+        self.sources: Dict[str, str] = {}
+        self.shas: Dict[str, str] = {}
+        if directory is not None:
+            self.load_directory(directory)
+
+    def register(self, name: str, source: str) -> str:
+        self.sources[name] = source
+        self.shas[name] = hashlib.sha1(source.encode()).hexdigest()
+        return self.shas[name]
+
+    def load_directory(self, directory: str) -> List[str]:
+        names = []
+        for filename in sorted(os.listdir(directory)):
+            if filename.endswith(".lua"):
+                with open(os.path.join(directory, filename)) as f:
+                    self.register(filename[:-4], f.read())
+                names.append(filename[:-4])
+        return names
+
+    def _nodes(self) -> List[redis.Redis]:
+        if isinstance(self.client, RedisCluster):
+            return [self.client.get_redis_connection(node) for node in self.client.get_primaries()]
+        return [self.client]
+
+    def load(self, names: Optional[Sequence[str]] = None) -> int:
+        """SCRIPT LOAD the given (default: all) scripts on every node."""
+        nodes = self._nodes()
+        for node in nodes:
+            pipe = node.pipeline(transaction=False)
+            for name in names or self.sources:
+                pipe.script_load(self.sources[name])
+            pipe.execute()
+        return len(nodes)
+
+    def call(self, name: str, keys: Sequence[Any] = (), args: Sequence[Any] = ()) -> Any:
+        sha = self.shas[name]
+        try:
+            return self.client.evalsha(sha, len(keys), *keys, *args)
+        except redis.exceptions.NoScriptError:
+            self.load([name])
+            return self.client.evalsha(sha, len(keys), *keys, *args)
+
+    def __getitem__(self, name: str) -> "BoundScript":
+        return BoundScript(self, name)
+
+
+class BoundScript:
+    """``registry["cas"](keys=[...], args=[...])``, same shape as ``register_script``."""
+
+    def __init__(self, registry: ScriptRegistry, name: str) -> None:
+        self.registry = registry
+        self.name = name
+
+    def __call__(self, keys: Sequence[Any] = (), args: Sequence[Any] = ()) -> Any:
+        return self.registry.call(self.name, keys, args)
+
+
+# --- benchmark ---------------------------------------------------------------
+
+@dataclass
+class ScriptResult:
+    name: str
+    ops_per_sec: float
+    request_bytes: int
+
+
+def run_script_benchmark(client: redis.Redis, iterations: int = 10_000,
+                         key: str = "scriptbench:counter") -> List[ScriptResult]:
+    """EVAL vs EVALSHA vs native INCRBY for the script.lua counter."""
+    registry = ScriptRegistry(client)
+    registry.load(["script"])
+    source = registry.sources["script"]
+    sha = registry.shas["script"]
+
+    def request_size(*parts: Any) -> int:
+        # Argument bytes on the wire, without RESP framing
+        return sum(len(str(part).encode()) for part in parts)
+
+    variants = [
+        ("EVAL script.lua", lambda: client.eval(source, 1, key, 1), request_size(source, 1, key, 1)),
+        ("EVALSHA script.lua", lambda: registry.call("script", [key], [1]), request_size(sha, 1, key, 1)),
+        ("INCRBY", lambda: client.incrby(key, 1), request_size(key, 1)),
+    ]
+    results = []
+    for name, op, size in variants:
+        client.delete(key)
+        start = time.perf_counter()
+        for _ in range(iterations):
+            op()
+        elapsed = time.perf_counter() - start
+        counted = int(client.get(key) or 0)
+        if counted != iterations:
+            raise RuntimeError(f"{name}: counter is {counted} after {iterations} increments")
+        results.append(ScriptResult(name, iterations / elapsed, size))
+    client.delete(key)
+    return results
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--host", default="localhost")
+    parser.add_argument("--port", type=int, default=6379)
+    parser.add_argument("--cluster", action="store_true", help="Preload on every cluster primary")
+    parser.add_argument("--iterations", type=int, default=10_000)
+    args = parser.parse_args()
+
+    if args.cluster:
+        cluster = RedisCluster(host=args.host, port=args.port, decode_responses=True)
+        registry = ScriptRegistry(cluster)
+        print(f"Loaded {len(registry.sources)} scripts on {registry.load()} primaries")
+        return
+
+    client = redis.Redis(host=args.host, port=args.port, decode_responses=True)
+    print(f"{'variant':20} {'ops/sec':>10} {'payload bytes':>14}")
+    for result in run_script_benchmark(client, args.iterations):
+        print(f"{result.name:20} {result.ops_per_sec:10.0f} {result.request_bytes:14}")
+
+
+if __name__ == "__main__":
+    main()
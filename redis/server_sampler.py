@@ -0,0 +1,298 @@
+"""Background INFO / SLOWLOG / LATENCY sampler for Redis-compatible servers.
+
+A daemon thread polls ``INFO`` sections, ``SLOWLOG GET`` (only entries with
+an id newer than the last seen one are kept; the first sample just records
+where the log stands, and ids going backwards after ``SLOWLOG RESET`` or a
+restart start the count again) and ``LATENCY LATEST`` every
+``interval`` seconds. Counters are turned into rates from the deltas between
+consecutive samples: ops/sec, keyspace hit ratio, memory growth, evictions,
+expirations, network and CPU. Each sample is appended to ``samples`` and,
+optionally, written as one JSON line to a file, so a benchmark can attach the
+server-side time series to its own results::
+
+    with ServerSampler(client, interval=1.0, output="run.jsonl") as sampler:
+        run_benchmark()
+    print(sampler.summary())
+
+or wrap any script from the command line::
+
+    python3 server_sampler.py --output run.jsonl -- python3 stream_queue.py
+"""
+from __future__ import annotations
+
+import argparse
+import json
+import subprocess
+import sys
+import threading
+import time
+from typing import Any, Dict, IO, List, Optional, Sequence
+
+import redis
+
+DEFAULT_SECTIONS = ("server", "clients", "memory", "stats", "cpu", "keyspace")
+
+GAUGES = ("connected_clients", "blocked_clients", "used_memory", "used_memory_rss",
+          "mem_fragmentation_ratio", "instantaneous_ops_per_sec")
+
+COUNTERS = ("total_commands_processed", "keyspace_hits", "keyspace_misses", "evicted_keys",
+            "expired_keys", "total_net_input_bytes", "total_net_output_bytes",
+            "rejected_connections", "used_cpu_sys", "used_cpu_user")
+
+
+class ServerSampler:
+    """Poll one server in a background thread and derive per-interval rates."""
+
+    def __init__(
+        self,
+        client: redis.Redis,
+        interval: float = 1.0,
+        sections: Sequence[str] = DEFAULT_SECTIONS,
+        output: Optional[str] = None,
+        slowlog_count: int = 128,
+        echo: bool = False,
+    ) -> None:
+        self.client = client
+        self.interval = interval
+        self.sections = sections
+        self.output = output
+        self.slowlog_count = slowlog_count
+        self.echo = echo
+        self.samples: List[Dict[str, Any]] = []
+        self.slowlog: List[Dict[str, Any]] = []
+        self._last_slowlog_id: Optional[int] = None  # None until the first sample primes it
+        self._previous: Optional[Dict[str, Any]] = None
+        self._stop = threading.Event()
+        self._thread: Optional[threading.Thread] = None
+        self._file: Optional[IO[str]] = None
+
+    # --- polling --------------------------------------------------------
+
+    def _info(self) -> Dict[str, Any]:
+        info: Dict[str, Any] = {}
+        for section in self.sections:
+            info.update(self.client.info(section))
+        return info
+
+    def _new_slowlog_entries(self) -> List[Dict[str, Any]]:
+        try:
+            entries = self.client.slowlog_get(self.slowlog_count)
+        except redis.ResponseError:
+            return []
+        newest = max((e["id"] for e in entries), default=-1)
+        last, self._last_slowlog_id = self._last_slowlog_id, newest
+        if last is None:
+            return []  # entries from before sampling started are not news
+        # Ids only grow, unless SLOWLOG RESET or a restart started them over
+        fresh = [e for e in entries if newest < last or e["id"] > last]
+        return [
+            {
+                "id": e["id"],
+                "start_time": e["start_time"],
+                "duration_us": e["duration"],
+                "command": e["command"] if isinstance(e["command"], str) else
+                " ".join(part.decode(errors="replace") if isinstance(part, bytes) else str(part)
+                         for part in e["command"]),
+            }
+            for e in sorted(fresh, key=lambda e: e["id"])
+        ]
+
+    def _latency_latest(self) -> List[Dict[str, Any]]:
+        try:
+            events = self.client.execute_command("LATENCY LATEST")
+        except redis.ResponseError:
+            return []
+        return [
+            {"event": event if isinstance(event, str) else event.decode(),
+             "timestamp": int(ts), "latest_ms": int(latest), "max_ms": int(worst)}
+            for event, ts, latest, worst in events
+        ]
+
+    def sample(self) -> Dict[str, Any]:
+        """Take one sample now; rates are relative to the previous one."""
+        now = time.time()
+        info = self._info()
+        current: Dict[str, Any] = {"ts": now}
+        for name in GAUGES + COUNTERS:
+            if name in info:
+                current[name] = info[name]
+        current["keys"] = sum(v.get("keys", 0) for k, v in info.items()
+                              if k.startswith("db") and isinstance(v, dict))
+
+        record: Dict[str, Any] = {"ts": round(now, 3)}
+        record.update({name: current[name] for name in GAUGES + COUNTERS if name in current})
+        record["keys"] = current["keys"]
+
+        previous = self._previous
+        if previous is not None:
+            dt = now - previous["ts"]
+
+            def rate(name: str) -> Optional[float]:
+                if name not in current or name not in previous:
+                    return None
+                return (current[name] - previous[name]) / dt
+
+            record["ops_per_sec"] = rate("total_commands_processed")
+            hits = current.get("keyspace_hits", 0) - previous.get("keyspace_hits", 0)
+            misses = current.get("keyspace_misses", 0) - previous.get("keyspace_misses", 0)
+            record["hit_ratio"] = hits / (hits + misses) if hits + misses else None
+            record["memory_growth_bytes_per_sec"] = rate("used_memory")
+            record["evicted_per_sec"] = rate("evicted_keys")
+            record["expired_per_sec"] = rate("expired_keys")
+            record["net_in_kb_per_sec"] = (rate("total_net_input_bytes") or 0) / 1024
+            record["net_out_kb_per_sec"] = (rate("total_net_output_bytes") or 0) / 1024
+            cpu_sys, cpu_user = rate("used_cpu_sys"), rate("used_cpu_user")
+            if cpu_sys is not None and cpu_user is not None:
+                record["cpu_percent"] = (cpu_sys + cpu_user) * 100
+        self._previous = current
+
+        slow = self._new_slowlog_entries()
+        self.slowlog.extend(slow)
+        record["slowlog"] = slow
+        record["latency"] = self._latency_latest()
+
+        self.samples.append(record)
+        if self._file is not None:
+            self._file.write(json.dumps(record) + "\n")
+            self._file.flush()
+        if self.echo and previous is not None:
+            print(format_sample(record))
+        return record
+
+    # --- lifecycle ------------------------------------------------------
+
+    def _run(self) -> None:
+        next_at = time.monotonic()
+        while not self._stop.is_set():
+            try:
+                self.sample()
+            except redis.RedisError as exc:
+                record = {"ts": round(time.time(), 3), "error": str(exc)}
+                self.samples.append(record)
+                if self._file is not None:
+                    self._file.write(json.dumps(record) + "\n")
+            next_at += self.interval
+            self._stop.wait(max(0.0, next_at - time.monotonic()))
+
+    def start(self) -> "ServerSampler":
+        if self.output:
+            self._file = open(self.output, "a")
+        self._stop.clear()
+        self._thread = threading.Thread(target=self._run, name="server-sampler", daemon=True)
+        self._thread.start()
+        return self
+
+    def stop(self) -> None:
+        self._stop.set()
+        if self._thread is not None:
+            self._thread.join()
+        try:
+            self.sample()  # closing sample covers the tail of the run
+        except redis.RedisError:
+            pass
+        if self._file is not None:
+            self._file.close()
+            self._file = None
+
+    def __enter__(self) -> "ServerSampler":
+        return self.start()
+
+    def __exit__(self, *exc: Any) -> None:
+        self.stop()
+
+    def summary(self) -> Dict[str, Any]:
+        """Averages and peaks over all samples that have rates."""
+        rated = [s for s in self.samples if "ops_per_sec" in s]
+        if not rated:
+            return {"samples": len(self.samples)}
+
+        def values(name: str) -> List[float]:
+            return [s[name] for s in rated if s.get(name) is not None]
+
+        ops = values("ops_per_sec")
+        hit_ratios = values("hit_ratio")
+        memory = [s["used_memory"] for s in self.samples if "used_memory" in s]
+        evicted = [s["evicted_keys"] for s in self.samples if "evicted_keys" in s]
+        return {
+            "samples": len(self.samples),
+            "avg_ops_per_sec": sum(ops) / len(ops) if ops else None,
+            "peak_ops_per_sec": max(ops) if ops else None,
+            "avg_hit_ratio": sum(hit_ratios) / len(hit_ratios) if hit_ratios else None,
+            "memory_growth_bytes": memory[-1] - memory[0] if memory else None,
+            "evicted": evicted[-1] - evicted[0] if evicted else None,
+            "slowlog_entries": len(self.slowlog),
+            "latency_events": sorted({e["event"] for s in rated for e in s.get("latency", [])}),
+        }
+
+
+def format_sample(record: Dict[str, Any]) -> str:
+    if "error" in record:
+        return f"error: {record['error']}"
+    hit_ratio = record.get("hit_ratio")
+    cpu = record.get("cpu_percent")
+    return (f"ops/sec={record.get('ops_per_sec') or 0:8.0f} "
+            f"hit={'-' if hit_ratio is None else f'{hit_ratio:.2%}':>7} "
+            f"mem={record.get('used_memory', 0) / 1024 / 1024:7.1f}MB "
+            f"growth={(record.get('memory_growth_bytes_per_sec') or 0) / 1024:8.1f}KB/s "
+            f"evicted/s={record.get('evicted_per_sec') or 0:6.0f} "
+            f"cpu={'-' if cpu is None else f'{cpu:.0f}%':>5} "
+            f"slow+={len(record.get('slowlog', []))}")
+
+
+def sample_under_load(client: redis.Redis, duration: float = 3.0, interval: float = 0.5,
+                      prefix: str = "monitor:key:") -> Dict[str, Any]:
+    """Echo samples while pipelined SET/GET traffic runs; returns the summary."""
+    print(f"Sampling every {interval}s while generating load:")
+    with ServerSampler(client, interval=interval, echo=True) as sampler:
+        deadline = time.time() + duration
+        i = 0
+        while time.time() < deadline:
+            pipe = client.pipeline(transaction=False)
+            for _ in range(100):
+                pipe.set(f"{prefix}{i % 500}", i)
+                pipe.get(f"{prefix}{(i * 7) % 1000}")  # roughly half miss
+                i += 1
+            pipe.execute()
+    client.delete(*[f"{prefix}{n}" for n in range(500)])
+    return sampler.summary()
+
+
+def print_summary(summary: Dict[str, Any]) -> None:
+    def number(name: str, fmt: str) -> str:
+        value = summary.get(name)
+        return "-" if value is None else format(value, fmt)
+
+    print(f"Summary over {summary['samples']} samples:")
+    print(f"  ops/sec avg {number('avg_ops_per_sec', '.0f')}, peak {number('peak_ops_per_sec', '.0f')}")
+    print(f"  hit ratio avg {number('avg_hit_ratio', '.2%')}")
+    print(f"  memory growth {number('memory_growth_bytes', ',')} bytes, evicted {number('evicted', 'd')}")
+    print(f"  new slowlog entries {summary.get('slowlog_entries', 0)}, "
+          f"latency events {', '.join(summary.get('latency_events', [])) or '-'}")
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--host", default="localhost")
+    parser.add_argument("--port", type=int, default=6379)
+    parser.add_argument("--interval", type=float, default=1.0)
+    parser.add_argument("--duration", type=float, default=10.0,
+                        help="Seconds to sample when no command is given")
+    parser.add_argument("--output", default=None, help="Append samples as JSON lines to this file")
+    parser.add_argument("command", nargs=argparse.REMAINDER,
+                        help="Optional command to run while sampling (after --)")
+    args = parser.parse_args()
+
+    client = redis.Redis(host=args.host, port=args.port, decode_responses=True)
+    command = args.command[1:] if args.command[:1] == ["--"] else args.command
+    with ServerSampler(client, args.interval, output=args.output, echo=True) as sampler:
+        if command:
+            returncode = subprocess.call(command)
+        else:
+            time.sleep(args.duration)
+            returncode = 0
+    print(json.dumps(sampler.summary(), indent=2))
+    sys.exit(returncode)
+
+
+if __name__ == "__main__":
+    main()
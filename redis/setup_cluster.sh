@@ -103,7 +103,7 @@ for ip in "${node_ips[@]}"; do
 done
 
 # Execute cluster creation
-docker run --rm -it --net redis-cluster-net redis:latest \
+docker run --rm -i --net redis-cluster-net redis:latest \
     redis-cli --cluster create $CLUSTER_HOSTS \
     --cluster-replicas 1 \
     --cluster-yes
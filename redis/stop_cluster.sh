@@ -7,8 +7,8 @@ echo "    Stopping Redis Cluster"
 echo "======================================="
 echo
 
-# Stop and remove containers
-for port in 7000 7001 7002 7003 7004 7005; do
+# Stop and remove containers (7006 is the extra node added by reshard_under_load.py)
+for port in 7000 7001 7002 7003 7004 7005 7006; do
     echo "Stopping redis-node-$port..."
     docker stop redis-node-$port 2>/dev/null || true
     docker rm redis-node-$port 2>/dev/null || true
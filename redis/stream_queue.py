@@ -0,0 +1,231 @@
+"""Redis Streams work queue with consumer groups.
+
+Producers ``XADD`` tasks, workers read batches with ``XREADGROUP``,
+acknowledge them with ``XACK`` and periodically take over messages another
+worker left pending for too long via ``XAUTOCLAIM``. Unlike
+``LPUSH``/``BLPOP``, a task is not lost when its worker dies: it stays in the
+group's pending entries list until someone acks it.
+
+Trimming decides whether that guarantee holds. By default workers trim with
+``XTRIM MINID ~`` below the oldest entry any group still needs (its oldest
+pending id, or its last delivered id when nothing is pending), so only acked
+entries go and the stream grows while consumers lag. ``maxlen`` instead caps
+the stream at ``XADD ... MAXLEN ~`` for bounded memory, but once the backlog
+exceeds the cap it drops entries that are pending or not yet delivered: the
+pending list still names them, ``XAUTOCLAIM`` returns nothing for them and
+the tasks are lost. Size such a cap well above the worst consumer lag.
+"""
+from __future__ import annotations
+
+import argparse
+import json
+import threading
+import time
+from dataclasses import dataclass
+from typing import Any, Callable, Dict, Iterable, List, Optional, Tuple
+
+import redis
+
+Message = Tuple[str, Dict[str, str]]
+
+
+def _stream_id(value: Any) -> Tuple[int, int]:
+    ms, seq = (value.decode() if isinstance(value, bytes) else value).split("-")
+    return int(ms), int(seq)
+
+
+class StreamQueue:
+    """Work queue on one stream and one consumer group.
+
+    ``maxlen=None`` (default) keeps every unacked entry and trims acked ones
+    from the worker loop; a number caps the stream length on ``XADD`` and may
+    drop unacked tasks (see the module docstring).
+    """
+
+    def __init__(self, client: redis.Redis, stream: str = "tasks:stream",
+                 group: str = "workers", maxlen: Optional[int] = None) -> None:
+        self.client = client
+        self.stream = stream
+        self.group = group
+        self.maxlen = maxlen
+
+    def ensure_group(self) -> None:
+        try:
+            self.client.xgroup_create(self.stream, self.group, id="0", mkstream=True)
+        except redis.ResponseError as exc:
+            if "BUSYGROUP" not in str(exc):
+                raise
+
+    def enqueue(self, payload: Dict[str, Any]) -> str:
+        return self.client.xadd(self.stream, {"payload": json.dumps(payload)},
+                                maxlen=self.maxlen, approximate=self.maxlen is not None)
+
+    def enqueue_many(self, payloads: Iterable[Dict[str, Any]]) -> List[str]:
+        pipe = self.client.pipeline(transaction=False)
+        for payload in payloads:
+            pipe.xadd(self.stream, {"payload": json.dumps(payload)},
+                      maxlen=self.maxlen, approximate=self.maxlen is not None)
+        return pipe.execute()
+
+    def read(self, consumer: str, count: int = 100, block_ms: int = 1000) -> List[Message]:
+        """New messages for this consumer; they stay pending until acked."""
+        response = self.client.xreadgroup(self.group, consumer, {self.stream: ">"},
+                                          count=count, block=block_ms)
+        if not response:
+            return []
+        return response[0][1]
+
+    def ack(self, message_ids: List[str]) -> int:
+        if not message_ids:
+            return 0
+        return self.client.xack(self.stream, self.group, *message_ids)
+
+    def claim_stuck(self, consumer: str, min_idle_ms: int = 30_000, count: int = 100) -> List[Message]:
+        """Take over messages pending on other consumers for at least `min_idle_ms`."""
+        claimed: List[Message] = []
+        start = "0-0"
+        while True:
+            response = self.client.xautoclaim(self.stream, self.group, consumer,
+                                              min_idle_time=min_idle_ms, start_id=start, count=count)
+            start, messages = response[0], response[1]
+            claimed.extend(message for message in messages if message[1])
+            if start in ("0-0", b"0-0") or len(claimed) >= count:
+                return claimed
+
+    def pending(self) -> int:
+        return self.client.xpending(self.stream, self.group)["pending"]
+
+    def trim_acked(self) -> int:
+        """XTRIM MINID ~ below the oldest entry any group has not acked yet."""
+        keep: Optional[Tuple[int, int]] = None
+        for group in self.client.xinfo_groups(self.stream):
+            summary = self.client.xpending(self.stream, group["name"])
+            # Entries up to last-delivered-id that are not pending were acked
+            oldest = _stream_id(summary["min"] if summary["pending"] else group["last-delivered-id"])
+            keep = oldest if keep is None else min(keep, oldest)
+        if keep is None or keep == (0, 0):
+            return 0
+        return self.client.xtrim(self.stream, minid=f"{keep[0]}-{keep[1]}", approximate=True)
+
+    def work(self, consumer: str, handler: Callable[[Dict[str, Any]], None],
+             stop: threading.Event, count: int = 100, block_ms: int = 500,
+             min_idle_ms: int = 30_000, claim_every: float = 5.0) -> int:
+        """Worker loop: reclaim stuck messages and trim acked ones now and then, read, handle, ack."""
+        processed = 0
+        next_claim = time.monotonic()
+        while not stop.is_set():
+            messages: List[Message] = []
+            if time.monotonic() >= next_claim:
+                messages = self.claim_stuck(consumer, min_idle_ms, count)
+                if self.maxlen is None:
+                    self.trim_acked()
+                next_claim = time.monotonic() + claim_every
+            if not messages:
+                messages = self.read(consumer, count, block_ms)
+            done = []
+            for message_id, fields in messages:
+                handler(json.loads(fields["payload"]))
+                done.append(message_id)
+            processed += self.ack(done)
+        return processed
+
+
+# --- benchmark ---------------------------------------------------------------
+
+@dataclass
+class QueueResult:
+    name: str
+    consumers: int
+    tasks_per_sec: float
+    p50_ms: float
+    p99_ms: float
+
+
+def _percentile(values: List[float], q: float) -> float:
+    values = sorted(values)
+    return values[min(int(len(values) * q), len(values) - 1)] if values else 0.0
+
+
+def _run_consumers(consumers: int, tasks: int, produce: Callable[[], None],
+                   consume: Callable[[str, threading.Event, List[float]], None]) -> Tuple[float, List[float]]:
+    stop = threading.Event()
+    latencies: List[float] = []
+    threads = [threading.Thread(target=consume, args=(f"c{i}", stop, latencies))
+               for i in range(consumers)]
+    start = time.perf_counter()
+    for t in threads:
+        t.start()
+    produce()
+    while len(latencies) < tasks and time.perf_counter() - start < 120:
+        time.sleep(0.01)
+    elapsed = time.perf_counter() - start
+    stop.set()
+    for t in threads:
+        t.join()
+    return elapsed, latencies
+
+
+def run_queue_benchmark(host: str = "localhost", port: int = 6379, tasks: int = 20_000,
+                        consumer_counts: Iterable[int] = (1, 8, 64), batch: int = 100) -> List[QueueResult]:
+    results: List[QueueResult] = []
+    for consumers in consumer_counts:
+        client = redis.Redis(host=host, port=port, decode_responses=True,
+                             max_connections=consumers + 4)
+
+        # BLPOP list queue: one task per round trip, lost if the worker dies
+        list_key = "bench:list:queue"
+        client.delete(list_key)
+
+        def produce_list() -> None:
+            for first in range(0, tasks, batch):
+                client.rpush(list_key, *[json.dumps({"n": i, "ts": time.time()})
+                                         for i in range(first, min(first + batch, tasks))])
+
+        def consume_list(name: str, stop: threading.Event, latencies: List[float]) -> None:
+            while not stop.is_set():
+                item = client.blpop(list_key, timeout=1)
+                if item is not None:
+                    latencies.append((time.time() - json.loads(item[1])["ts"]) * 1000)
+
+        elapsed, latencies = _run_consumers(consumers, tasks, produce_list, consume_list)
+        results.append(QueueResult("LIST BLPOP", consumers, len(latencies) / elapsed,
+                                   _percentile(latencies, 0.5), _percentile(latencies, 0.99)))
+
+        # Streams: batched XREADGROUP + XACK
+        queue = StreamQueue(client, stream="bench:stream:queue", group="bench")
+        client.delete(queue.stream)
+        queue.ensure_group()
+
+        def produce_stream() -> None:
+            for first in range(0, tasks, batch):
+                queue.enqueue_many({"n": i, "ts": time.time()}
+                                   for i in range(first, min(first + batch, tasks)))
+
+        def consume_stream(name: str, stop: threading.Event, latencies: List[float]) -> None:
+            queue.work(name, lambda task: latencies.append((time.time() - task["ts"]) * 1000),
+                       stop, count=batch, block_ms=200)
+
+        elapsed, latencies = _run_consumers(consumers, tasks, produce_stream, consume_stream)
+        results.append(QueueResult("STREAM XREADGROUP", consumers, len(latencies) / elapsed,
+                                   _percentile(latencies, 0.5), _percentile(latencies, 0.99)))
+        client.delete(list_key, queue.stream)
+        client.close()
+    return results
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--host", default="localhost")
+    parser.add_argument("--port", type=int, default=6379)
+    parser.add_argument("--tasks", type=int, default=20_000)
+    parser.add_argument("--consumers", type=int, nargs="+", default=[1, 8, 64])
+    args = parser.parse_args()
+
+    print(f"{'queue':18} {'consumers':>9} {'tasks/sec':>10} {'p50':>9} {'p99':>9}")
+    for result in run_queue_benchmark(args.host, args.port, args.tasks, args.consumers):
+        print(f"{result.name:18} {result.consumers:9} {result.tasks_per_sec:10.0f} "
+              f"{result.p50_ms:8.2f}ms {result.p99_ms:8.2f}ms")
+
+
+if __name__ == "__main__":
+    main()
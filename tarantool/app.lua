@@ -5,7 +5,9 @@
 
 local http_server = require('http.server')
 local json = require('json')
+local msgpack = require('msgpack')
 local fiber = require('fiber')
+local clock = require('clock')
 
 -- Configure database
 box.cfg{
@@ -85,6 +87,15 @@ for _, metric in box.space.metrics:pairs() do
     end
 end
 
+-- Per-space modification counters for ETag generation.
+-- Bumped once per committed transaction that wrote to the space (see the
+-- on_replace triggers below the response cache).
+local versions = {
+    users = 0,
+    sessions = 0,
+    metrics = 0
+}
+
 -- Create HTTP server
 local httpd = http_server.new('0.0.0.0', 8080, {
     log_requests = true,
@@ -92,24 +103,366 @@ local httpd = http_server.new('0.0.0.0', 8080, {
 })
 
 -- Helper functions
-local function json_response(req, data, status)
-    local resp = req:render({json = data})
-    resp.status = status or 200
-    return resp
+local JSON_TYPE = 'application/json; charset=utf8'
+local MSGPACK_TYPE = 'application/msgpack'
+
+-- Field order of users tuples, sent with raw-tuple MessagePack responses
+local USER_FIELDS = 'id,name,email,age,created_at'
+
+-- Content negotiation: MessagePack when the client accepts it, JSON otherwise
+local function wants_msgpack(req)
+    local accept = req.headers['accept']
+    return accept ~= nil and string.find(accept, MSGPACK_TYPE, 1, true) ~= nil
+end
+
+local function encode_body(req, data)
+    if wants_msgpack(req) then
+        return msgpack.encode(data), MSGPACK_TYPE
+    end
+    return json.encode(data), JSON_TYPE
+end
+
+local function render_response(req, data, status)
+    local body, content_type = encode_body(req, data)
+    return {
+        status = status or 200,
+        headers = {['content-type'] = content_type, vary = 'Accept'},
+        body = body
+    }
 end
 
 local function error_response(req, message, status)
-    return json_response(req, {error = message}, status or 400)
+    return render_response(req, {error = message}, status or 400)
+end
+
+-- Decode a POST/PUT body sent either as JSON or as MessagePack
+local function read_body(req)
+    local content_type = req.headers['content-type']
+    if content_type ~= nil and string.find(content_type, MSGPACK_TYPE, 1, true) then
+        local ok, data = pcall(msgpack.decode, req:read_cached())
+        if not ok then
+            return nil
+        end
+        return data
+    end
+    return req:json()
+end
+
+local function to_user(tuple)
+    return {
+        id = tuple.id,
+        name = tuple.name,
+        email = tuple.email,
+        age = tuple.age,
+        created_at = tuple.created_at
+    }
+end
+
+-- List of users: MessagePack clients get the tuples encoded as-is (arrays in
+-- USER_FIELDS order), JSON clients get one object per user.
+local function users_response(req, tuples)
+    if wants_msgpack(req) then
+        return {
+            status = 200,
+            headers = {
+                ['content-type'] = MSGPACK_TYPE,
+                vary = 'Accept',
+                ['x-tuple-format'] = USER_FIELDS
+            },
+            body = msgpack.encode(tuples)
+        }
+    end
+
+    local users = {}
+    for _, tuple in ipairs(tuples) do
+        table.insert(users, to_user(tuple))
+    end
+    return render_response(req, users)
 end
 
 -- Track startup time
 local start_time = fiber.time()
 
+-- Counters restart from zero, so the boot time keeps ETags unique across restarts
+local boot_id = string.format('%x', math.floor(start_time * 1000))
+
+-- Small in-process cache of encoded response bodies: key -> {etag, body, content_type}
+local RESPONSE_CACHE_SIZE = 1024
+local response_cache = {}
+local response_cache_keys = {}
+local response_cache_next = 1
+
+local function response_cache_put(key, entry)
+    if response_cache[key] == nil then
+        -- FIFO eviction: overwrite the oldest slot once the ring is full
+        local evicted = response_cache_keys[response_cache_next]
+        if evicted ~= nil then
+            response_cache[evicted] = nil
+        end
+        response_cache_keys[response_cache_next] = key
+        response_cache_next = response_cache_next % RESPONSE_CACHE_SIZE + 1
+    end
+    response_cache[key] = entry
+end
+
+-- Mark every cached body built from a space as stale; it is rebuilt on the
+-- next request. Clearing the ETag keeps the entry in its ring slot.
+local function drop_cached(space_name)
+    for _, entry in pairs(response_cache) do
+        if entry.spaces[space_name] then
+            entry.etag = nil
+        end
+    end
+end
+
+-- A write changes the ETag only once its transaction commits, so a rollback
+-- leaves versions alone. memtx readers can see a write while it waits for the
+-- WAL, so bodies built in that window are dropped on commit and rollback alike.
+local pending_txn = {}
+
+for space_name in pairs(versions) do
+    box.space[space_name]:on_replace(function()
+        local txn = box.txn_id()
+        if pending_txn[space_name] == txn then
+            return  -- already hooked for this transaction
+        end
+        pending_txn[space_name] = txn
+        box.on_commit(function()
+            pending_txn[space_name] = nil
+            versions[space_name] = versions[space_name] + 1
+            drop_cached(space_name)
+        end)
+        box.on_rollback(function()
+            pending_txn[space_name] = nil
+            drop_cached(space_name)
+        end)
+    end)
+end
+
+local function make_etag(req, key, spaces)
+    local parts = {boot_id}
+    for _, space_name in ipairs(spaces) do
+        table.insert(parts, versions[space_name])
+    end
+    -- JSON and MessagePack are different representations of the same resource
+    local format = wants_msgpack(req) and 'mp' or 'js'
+    return string.format('W/"%s-%s-%s"', key, format, table.concat(parts, '.'))
+end
+
+local function etag_matches(req, etag)
+    local header = req.headers['if-none-match']
+    if header == nil then
+        return false
+    end
+    return header == '*' or string.find(header, etag, 1, true) ~= nil
+end
+
+-- Serve a read endpoint with ETag/If-None-Match support.
+-- `spaces` lists the spaces the body is built from; build() returns the
+-- response data, or nil, message, status on error.
+local function cached_response(req, key, spaces, build)
+    local etag = make_etag(req, key, spaces)
+    if etag_matches(req, etag) then
+        return {status = 304, headers = {etag = etag, vary = 'Accept'}}
+    end
+
+    local cache_key = wants_msgpack(req) and key .. ':mp' or key
+    local entry = response_cache[cache_key]
+    if entry == nil or entry.etag ~= etag then
+        local data, message, status = build()
+        if data == nil then
+            return error_response(req, message, status)
+        end
+        local body, content_type = encode_body(req, data)
+        local depends = {}
+        for _, space_name in ipairs(spaces) do
+            depends[space_name] = true
+        end
+        entry = {etag = etag, body = body, content_type = content_type, spaces = depends}
+        response_cache_put(cache_key, entry)
+    end
+
+    return {
+        status = 200,
+        headers = {
+            ['content-type'] = entry.content_type,
+            etag = entry.etag,
+            vary = 'Accept'
+        },
+        body = entry.body
+    }
+end
+
+-- Per-route instrumentation: request/error counters and a latency histogram
+-- (upper bounds in seconds; the last, implicit bucket is +Inf)
+local LATENCY_BUCKETS = {
+    0.0001, 0.00025, 0.0005, 0.001, 0.0025, 0.005,
+    0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1
+}
+
+-- Registration order is kept so /metrics output is stable
+local route_stats = {}
+
+local function new_route_stats(method, path)
+    local buckets = {}
+    for i = 1, #LATENCY_BUCKETS + 1 do
+        buckets[i] = 0
+    end
+    return {method = method, path = path, count = 0, errors = 0, sum = 0, cpu = 0, buckets = buckets}
+end
+
+local function observe(stats, elapsed, cpu, failed)
+    stats.count = stats.count + 1
+    stats.sum = stats.sum + elapsed
+    stats.cpu = stats.cpu + cpu
+    if failed then
+        stats.errors = stats.errors + 1
+    end
+    local i = 1
+    while i <= #LATENCY_BUCKETS and elapsed > LATENCY_BUCKETS[i] do
+        i = i + 1
+    end
+    stats.buckets[i] = stats.buckets[i] + 1
+end
+
+-- Errors are handler exceptions and 5xx responses. Handler CPU time (TX thread,
+-- body encoding included; a handler that yields also pays for other fibers) is
+-- summed per route and returned in X-Server-Cpu-Us, so clients can compare the
+-- server-side cost of JSON and MessagePack responses.
+local function instrument(stats, handler)
+    return function(req)
+        local started, cpu_started = clock.monotonic(), clock.thread()
+        local ok, resp = pcall(handler, req)
+        local cpu = clock.thread() - cpu_started
+        local failed = not ok or (type(resp) == 'table' and (resp.status or 200) >= 500)
+        observe(stats, clock.monotonic() - started, cpu, failed)
+        if not ok then
+            error(resp, 0)
+        end
+        if type(resp) == 'table' then
+            resp.headers = resp.headers or {}
+            resp.headers['x-server-cpu-us'] = string.format('%.1f', cpu * 1e6)
+        end
+        return resp
+    end
+end
+
+local function route(opts, handler)
+    local stats = new_route_stats(opts.method or 'ANY', opts.path)
+    table.insert(route_stats, stats)
+    return httpd:route(opts, instrument(stats, handler))
+end
+
+-- Cost of the wrapper itself: instrumented minus bare calls of a no-op handler
+local function measure_instrumentation_overhead(iterations)
+    local req, response = {}, {status = 200}
+    local function handler()
+        return response
+    end
+    local wrapped = instrument(new_route_stats('GET', '/overhead'), handler)
+
+    local started = clock.monotonic()
+    for _ = 1, iterations do
+        handler(req)
+    end
+    local bare = clock.monotonic() - started
+
+    started = clock.monotonic()
+    for _ = 1, iterations do
+        wrapped(req)
+    end
+    return math.max(clock.monotonic() - started - bare, 0) / iterations
+end
+
+local instrumentation_overhead = measure_instrumentation_overhead(100000)
+
+-- Prometheus text exposition format
+local function render_metrics()
+    local lines = {}
+    local function add(fmt, ...)
+        table.insert(lines, string.format(fmt, ...))
+    end
+
+    add('# HELP tarantool_http_requests_total HTTP requests per route')
+    add('# TYPE tarantool_http_requests_total counter')
+    for _, stats in ipairs(route_stats) do
+        add('tarantool_http_requests_total{method="%s",path="%s"} %d',
+            stats.method, stats.path, stats.count)
+    end
+
+    add('# HELP tarantool_http_request_errors_total Failed HTTP requests (exceptions and 5xx) per route')
+    add('# TYPE tarantool_http_request_errors_total counter')
+    for _, stats in ipairs(route_stats) do
+        add('tarantool_http_request_errors_total{method="%s",path="%s"} %d',
+            stats.method, stats.path, stats.errors)
+    end
+
+    add('# HELP tarantool_http_request_duration_seconds HTTP handler latency per route')
+    add('# TYPE tarantool_http_request_duration_seconds histogram')
+    for _, stats in ipairs(route_stats) do
+        local labels = string.format('method="%s",path="%s"', stats.method, stats.path)
+        local cumulative = 0
+        for i, le in ipairs(LATENCY_BUCKETS) do
+            cumulative = cumulative + stats.buckets[i]
+            add('tarantool_http_request_duration_seconds_bucket{%s,le="%s"} %d',
+                labels, tostring(le), cumulative)
+        end
+        add('tarantool_http_request_duration_seconds_bucket{%s,le="+Inf"} %d', labels, stats.count)
+        add('tarantool_http_request_duration_seconds_sum{%s} %.9f', labels, stats.sum)
+        add('tarantool_http_request_duration_seconds_count{%s} %d', labels, stats.count)
+    end
+
+    add('# HELP tarantool_http_request_cpu_seconds_total TX thread CPU time spent in handlers per route')
+    add('# TYPE tarantool_http_request_cpu_seconds_total counter')
+    for _, stats in ipairs(route_stats) do
+        add('tarantool_http_request_cpu_seconds_total{method="%s",path="%s"} %.9f',
+            stats.method, stats.path, stats.cpu)
+    end
+
+    local box_stat = box.stat()
+    local ops = {}
+    for op in pairs(box_stat) do
+        table.insert(ops, op)
+    end
+    table.sort(ops)
+
+    add('# HELP tarantool_box_requests_total box requests by operation')
+    add('# TYPE tarantool_box_requests_total counter')
+    for _, op in ipairs(ops) do
+        add('tarantool_box_requests_total{op="%s"} %d', op:lower(), box_stat[op].total)
+    end
+    add('# HELP tarantool_box_rps box requests per second by operation')
+    add('# TYPE tarantool_box_rps gauge')
+    for _, op in ipairs(ops) do
+        add('tarantool_box_rps{op="%s"} %d', op:lower(), box_stat[op].rps)
+    end
+
+    local slab = box.slab.info()
+    for _, name in ipairs({'arena_used', 'arena_size', 'quota_used', 'quota_size', 'items_used', 'items_size'}) do
+        add('# TYPE tarantool_slab_%s_bytes gauge', name)
+        add('tarantool_slab_%s_bytes %d', name, slab[name])
+    end
+
+    local fibers = 0
+    for _ in pairs(fiber.info({backtrace = false})) do
+        fibers = fibers + 1
+    end
+    add('# TYPE tarantool_fibers gauge')
+    add('tarantool_fibers %d', fibers)
+
+    add('# HELP tarantool_http_instrumentation_overhead_seconds Per-request cost of the route wrapper')
+    add('# TYPE tarantool_http_instrumentation_overhead_seconds gauge')
+    add('tarantool_http_instrumentation_overhead_seconds %.9f', instrumentation_overhead)
+
+    table.insert(lines, '')
+    return table.concat(lines, '\n')
+end
+
 -- Routes
 
 -- Health check
-httpd:route({path = '/health'}, function(req)
-    return json_response(req, {
+route({path = '/health'}, function(req)
+    return render_response(req, {
         status = 'healthy',
         uptime = fiber.time() - start_time,
         memory = box.slab.info().arena_used,
@@ -117,45 +470,57 @@ httpd:route({path = '/health'}, function(req)
     })
 end)
 
+-- Prometheus metrics
+route({path = '/metrics', method = 'GET'}, function(req)
+    return {
+        status = 200,
+        headers = {['content-type'] = 'text/plain; version=0.0.4'},
+        body = render_metrics()
+    }
+end)
+
 -- Get all users
-httpd:route({path = '/api/users', method = 'GET'}, function(req)
-    local users = {}
-    for _, user in box.space.users:pairs() do
-        table.insert(users, {
-            id = user.id,
-            name = user.name,
-            email = user.email,
-            age = user.age,
-            created_at = user.created_at
-        })
+-- Optional keyset paging: ?limit=N&after=<last seen id>
+route({path = '/api/users', method = 'GET'}, function(req)
+    local limit = tonumber(req:query_param('limit'))
+    local after = tonumber(req:query_param('after'))
+
+    local tuples
+    if after then
+        tuples = box.space.users:select({after}, {iterator = 'GT', limit = limit})
+    else
+        tuples = box.space.users:select({}, {limit = limit})
     end
-    return json_response(req, users)
+    return users_response(req, tuples)
 end)
 
 -- Get user by ID
-httpd:route({path = '/api/users/:id', method = 'GET'}, function(req)
+route({path = '/api/users/:id', method = 'GET'}, function(req)
     local id = tonumber(req:stash('id'))
     if not id then
         return error_response(req, 'Invalid user ID', 400)
     end
 
-    local user = box.space.users:get(id)
-    if not user then
-        return error_response(req, 'User not found', 404)
-    end
+    local key = 'user:' .. id
+    return cached_response(req, key, {'users'}, function()
+        local user = box.space.users:get(id)
+        if not user then
+            return nil, 'User not found', 404
+        end
 
-    return json_response(req, {
-        id = user.id,
-        name = user.name,
-        email = user.email,
-        age = user.age,
-        created_at = user.created_at
-    })
+        return {
+            id = user.id,
+            name = user.name,
+            email = user.email,
+            age = user.age,
+            created_at = user.created_at
+        }
+    end)
 end)
 
 -- Create user
-httpd:route({path = '/api/users', method = 'POST'}, function(req)
-    local body = req:json()
+route({path = '/api/users', method = 'POST'}, function(req)
+    local body = read_body(req)
     if not body or not body.name or not body.email then
         return error_response(req, 'Name and email are required', 400)
     end
@@ -175,7 +540,7 @@ httpd:route({path = '/api/users', method = 'POST'}, function(req)
         fiber.time()
     }
 
-    return json_response(req, {
+    return render_response(req, {
         id = user.id,
         name = user.name,
         email = user.email,
@@ -185,13 +550,13 @@ httpd:route({path = '/api/users', method = 'POST'}, function(req)
 end)
 
 -- Update user
-httpd:route({path = '/api/users/:id', method = 'PUT'}, function(req)
+route({path = '/api/users/:id', method = 'PUT'}, function(req)
     local id = tonumber(req:stash('id'))
     if not id then
         return error_response(req, 'Invalid user ID', 400)
     end
 
-    local body = req:json()
+    local body = read_body(req)
     if not body then
         return error_response(req, 'Invalid request body', 400)
     end
@@ -215,7 +580,7 @@ httpd:route({path = '/api/users/:id', method = 'PUT'}, function(req)
         {'=', 4, body.age or user.age}
     })
 
-    return json_response(req, {
+    return render_response(req, {
         id = user.id,
         name = user.name,
         email = user.email,
@@ -225,7 +590,7 @@ httpd:route({path = '/api/users/:id', method = 'PUT'}, function(req)
 end)
 
 -- Delete user
-httpd:route({path = '/api/users/:id', method = 'DELETE'}, function(req)
+route({path = '/api/users/:id', method = 'DELETE'}, function(req)
     local id = tonumber(req:stash('id'))
     if not id then
         return error_response(req, 'Invalid user ID', 400)
@@ -237,11 +602,11 @@ httpd:route({path = '/api/users/:id', method = 'DELETE'}, function(req)
     end
 
     box.space.users:delete(id)
-    return json_response(req, {message = 'User deleted'})
+    return render_response(req, {message = 'User deleted'})
 end)
 
 -- Search users by email pattern
-httpd:route({path = '/api/users/search', method = 'GET'}, function(req)
+route({path = '/api/users/search', method = 'GET'}, function(req)
     local email_pattern = req:query_param('email')
     if not email_pattern then
         return error_response(req, 'Email parameter required', 400)
@@ -250,22 +615,16 @@ httpd:route({path = '/api/users/search', method = 'GET'}, function(req)
     local users = {}
     for _, user in box.space.users:pairs() do
         if string.find(user.email, email_pattern) then
-            table.insert(users, {
-                id = user.id,
-                name = user.name,
-                email = user.email,
-                age = user.age,
-                created_at = user.created_at
-            })
+            table.insert(users, user)
         end
     end
 
-    return json_response(req, users)
+    return users_response(req, users)
 end)
 
 -- Metrics endpoint
-httpd:route({path = '/api/metrics', method = 'POST'}, function(req)
-    local body = req:json()
+route({path = '/api/metrics', method = 'POST'}, function(req)
+    local body = read_body(req)
     if not body or not body.name or not body.value then
         return error_response(req, 'Name and value are required', 400)
     end
@@ -278,7 +637,7 @@ httpd:route({path = '/api/metrics', method = 'POST'}, function(req)
         fiber.time()
     }
 
-    return json_response(req, {
+    return render_response(req, {
         id = metric.id,
         name = metric.name,
         value = metric.value,
@@ -287,76 +646,168 @@ httpd:route({path = '/api/metrics', method = 'POST'}, function(req)
 end)
 
 -- Get metrics by name
-httpd:route({path = '/api/metrics/:name', method = 'GET'}, function(req)
+route({path = '/api/metrics/:name', method = 'GET'}, function(req)
     local name = req:stash('name')
     local limit = tonumber(req:query_param('limit')) or 100
 
-    local metrics = {}
-    for _, metric in box.space.metrics.index.name_time:pairs({name}, {iterator = 'REQ'}) do
-        if metric.name ~= name then break end
-        table.insert(metrics, {
-            id = metric.id,
-            name = metric.name,
-            value = metric.value,
-            timestamp = metric.timestamp
-        })
-        if #metrics >= limit then break end
-    end
-
-    return json_response(req, metrics)
+    local key = 'metrics:' .. name .. ':' .. limit
+    return cached_response(req, key, {'metrics'}, function()
+        local metrics = {}
+        for _, metric in box.space.metrics.index.name_time:pairs({name}, {iterator = 'REQ'}) do
+            if metric.name ~= name then break end
+            table.insert(metrics, {
+                id = metric.id,
+                name = metric.name,
+                value = metric.value,
+                timestamp = metric.timestamp
+            })
+            if #metrics >= limit then break end
+        end
+        return metrics
+    end)
 end)
 
 -- Database stats
-httpd:route({path = '/api/stats', method = 'GET'}, function(req)
-    local stats = {
-        users_count = box.space.users:count(),
-        sessions_count = box.space.sessions:count(),
-        metrics_count = box.space.metrics:count(),
-        memory = {
-            used = box.slab.info().arena_used,
-            size = box.slab.info().arena_size
-        },
-        uptime = fiber.time() - start_time
-    }
-    return json_response(req, stats)
+-- Memory and uptime are captured when the body is built; the cached copy is
+-- refreshed only when one of the spaces changes.
+route({path = '/api/stats', method = 'GET'}, function(req)
+    return cached_response(req, 'stats', {'users', 'sessions', 'metrics'}, function()
+        local slab = box.slab.info()
+        return {
+            users_count = box.space.users:count(),
+            sessions_count = box.space.sessions:count(),
+            metrics_count = box.space.metrics:count(),
+            memory = {
+                used = slab.arena_used,
+                size = slab.arena_size
+            },
+            uptime = fiber.time() - start_time
+        }
+    end)
 end)
 
 -- Batch insert example
-httpd:route({path = '/api/users/batch', method = 'POST'}, function(req)
-    local body = req:json()
-    if not body or not body.users or type(body.users) ~= 'table' then
-        return error_response(req, 'Users array required', 400)
+-- Rows are committed in chunks of `chunk_size` (default BATCH_CHUNK_SIZE) with a
+-- fiber yield between chunks, so a large import does not hold the TX thread.
+-- `on_conflict` is 'skip' (default) or 'update' for upsert-by-email semantics.
+-- The response carries counts and per-chunk timings plus the id range each chunk
+-- inserted (ids within a chunk are contiguous), never the rows themselves.
+local BATCH_CHUNK_SIZE = 1000
+
+local function positive_integer(value)
+    local n = tonumber(value)
+    if n == nil or n < 1 or n ~= math.floor(n) then
+        return nil
     end
+    return n
+end
 
-    local inserted = {}
-    box.begin()
-    for _, user_data in ipairs(body.users) do
-        if user_data.name and user_data.email then
-            -- Check if email exists
-            local existing = box.space.users.index.email:get(user_data.email)
+local function apply_user_chunk(rows, first, last, on_conflict, result)
+    local users = box.space.users
+    for i = first, last do
+        local user_data = rows[i]
+        if type(user_data) == 'table' and user_data.name and user_data.email then
+            local existing = users.index.email:get(user_data.email)
             if not existing then
                 counter.users = counter.users + 1
-                local user = box.space.users:insert{
+                local user = users:insert{
                     counter.users,
                     user_data.name,
                     user_data.email,
                     user_data.age or 0,
                     fiber.time()
                 }
-                table.insert(inserted, {
-                    id = user.id,
-                    name = user.name,
-                    email = user.email
+                result.first_id = result.first_id or user.id
+                result.last_id = user.id
+                result.inserted = result.inserted + 1
+            elseif on_conflict == 'update' then
+                users:update(existing.id, {
+                    {'=', 2, user_data.name},
+                    {'=', 4, user_data.age or existing.age}
                 })
+                result.updated = result.updated + 1
+            else
+                result.skipped = result.skipped + 1
             end
+        else
+            result.skipped = result.skipped + 1
         end
     end
-    box.commit()
+end
 
-    return json_response(req, {
-        inserted = #inserted,
-        users = inserted
-    }, 201)
+route({path = '/api/users/batch', method = 'POST'}, function(req)
+    local body = read_body(req)
+    if not body or not body.users or type(body.users) ~= 'table' then
+        return error_response(req, 'Users array required', 400)
+    end
+
+    local chunk_size = BATCH_CHUNK_SIZE
+    if body.chunk_size ~= nil then
+        chunk_size = positive_integer(body.chunk_size)
+        if chunk_size == nil then
+            return error_response(req, 'chunk_size must be a positive integer', 400)
+        end
+    end
+    local on_conflict = body.on_conflict or 'skip'
+    if on_conflict ~= 'skip' and on_conflict ~= 'update' then
+        return error_response(req, "on_conflict must be 'skip' or 'update'", 400)
+    end
+
+    local rows = body.users
+    local result = {inserted = 0, updated = 0, skipped = 0, chunks = {}}
+
+    for first = 1, #rows, chunk_size do
+        local last = math.min(first + chunk_size - 1, #rows)
+        local chunk = {inserted = 0, updated = 0, skipped = 0}
+        local started = clock.monotonic()
+        local ok, err = pcall(box.atomic, apply_user_chunk, rows, first, last, on_conflict, chunk)
+        table.insert(result.chunks, {
+            rows = last - first + 1,
+            elapsed_ms = (clock.monotonic() - started) * 1000,
+            first_id = ok and chunk.first_id or nil,
+            last_id = ok and chunk.last_id or nil
+        })
+        if not ok then
+            -- Earlier chunks stay committed; report how far the import got
+            result.error = tostring(err)
+            result.failed_chunk = #result.chunks
+            return render_response(req, result, 500)
+        end
+
+        result.inserted = result.inserted + chunk.inserted
+        result.updated = result.updated + chunk.updated
+        result.skipped = result.skipped + chunk.skipped
+        -- Let other fibers run between chunks
+        fiber.yield()
+    end
+
+    return render_response(req, result, 201)
+end)
+
+-- Batch delete of an id range, e.g. the ranges a batch insert reported.
+-- Same chunking as the insert, so cleaning up a large import does not stall reads.
+route({path = '/api/users/batch/delete', method = 'POST'}, function(req)
+    local body = read_body(req)
+    local from_id = body and positive_integer(body.from_id)
+    local to_id = body and positive_integer(body.to_id)
+    if from_id == nil or to_id == nil or to_id < from_id then
+        return error_response(req, 'from_id and to_id must be positive integers, from_id <= to_id', 400)
+    end
+
+    local deleted = 0
+    for first = from_id, to_id, BATCH_CHUNK_SIZE do
+        local last = math.min(first + BATCH_CHUNK_SIZE - 1, to_id)
+        box.atomic(function()
+            for id = first, last do
+                if box.space.users:delete(id) ~= nil then
+                    deleted = deleted + 1
+                end
+            end
+        end)
+        fiber.yield()
+    end
+
+    return render_response(req, {deleted = deleted})
 end)
 
 -- Start the server
@@ -365,6 +816,7 @@ httpd:start()
 print('Tarantool HTTP server started on port 8080')
 print('API endpoints:')
 print('  GET    /health')
+print('  GET    /metrics')
 print('  GET    /api/users')
 print('  GET    /api/users/:id')
 print('  POST   /api/users')
@@ -372,9 +824,13 @@ print('  PUT    /api/users/:id')
 print('  DELETE /api/users/:id')
 print('  GET    /api/users/search?email=pattern')
 print('  POST   /api/users/batch')
+print('  POST   /api/users/batch/delete')
 print('  POST   /api/metrics')
 print('  GET    /api/metrics/:name')
 print('  GET    /api/stats')
 
+print(string.format('Route instrumentation overhead: %.2f us/request',
+    instrumentation_overhead * 1e6))
+
 -- Keep the server running
 require('console').start()
\ No newline at end of file
@@ -4,11 +4,56 @@
 -- Provides message append, retrieval, and stats via call API
 
 local fiber = require('fiber')
+local clock = require('clock')
+
+-- Движок хранения спейса dialogs: memtx (всё в RAM) или vinyl (LSM на диске)
+local DIALOG_ENGINE = os.getenv('DIALOG_ENGINE') or 'memtx'
+if DIALOG_ENGINE ~= 'memtx' and DIALOG_ENGINE ~= 'vinyl' then
+    error('DIALOG_ENGINE must be memtx or vinyl, got ' .. DIALOG_ENGINE)
+end
+
+-- Профили WAL и checkpoint, выбираются переменной DIALOG_PROFILE
+local PROFILES = {
+    -- каждая запись дожидается fsync, частые checkpoint'ы
+    durable = {
+        wal_mode = 'fsync',
+        wal_max_size = 64 * 1024 * 1024,
+        checkpoint_interval = 300,
+        checkpoint_count = 4,
+    },
+    -- write без fsync (ОС сбрасывает сама), значения близки к дефолтным
+    balanced = {
+        wal_mode = 'write',
+        wal_max_size = 256 * 1024 * 1024,
+        checkpoint_interval = 3600,
+        checkpoint_count = 2,
+    },
+    -- без WAL: данные переживают рестарт только через snapshot
+    throughput = {
+        wal_mode = 'none',
+        wal_max_size = 1024 * 1024 * 1024,
+        checkpoint_interval = 7200,
+        checkpoint_count = 1,
+    },
+}
+
+local DIALOG_PROFILE = os.getenv('DIALOG_PROFILE') or 'balanced'
+local profile = PROFILES[DIALOG_PROFILE]
+if profile == nil then
+    error('unknown DIALOG_PROFILE ' .. DIALOG_PROFILE .. ' (durable, balanced, throughput)')
+end
 
 -- Базовая конфигурация Tarantool
 box.cfg{
     listen = '0.0.0.0:3301',
     memtx_memory = 256 * 1024 * 1024, -- 256MB
+    -- память под L0 и кэш vinyl; остальное живёт на диске
+    vinyl_memory = tonumber(os.getenv('VINYL_MEMORY')) or 128 * 1024 * 1024,
+    vinyl_cache = tonumber(os.getenv('VINYL_CACHE')) or 64 * 1024 * 1024,
+    wal_mode = profile.wal_mode,
+    wal_max_size = profile.wal_max_size,
+    checkpoint_interval = profile.checkpoint_interval,
+    checkpoint_count = profile.checkpoint_count,
 }
 
 ----------------------------------------------------------------------
@@ -34,8 +79,10 @@ end)
 
 box.once('dialog_migration', function()
     -- основное хранилище сообщений диалогов
+    -- движок выбирается один раз, при первом bootstrap
     local dialogs = box.schema.space.create('dialogs', {
         if_not_exists = true,
+        engine = DIALOG_ENGINE,
         format = {
             {name = 'dialog_id',  type = 'unsigned'},
             {name = 'message_id', type = 'unsigned'},
@@ -140,11 +187,59 @@ function dialog_stats(dialog_id)
     }
 end
 
+-- Статистика движка: для vinyl — счётчики dump/compaction для оценки
+-- write amplification, для memtx — занятая память
+function dialog_engine_stats()
+    local space = box.space.dialogs
+    local stats = {
+        engine = space.engine,
+        tuples = space.index.primary:len(),
+        bsize = space:bsize(),
+    }
+
+    if space.engine == 'vinyl' then
+        local vinyl = box.stat.vinyl()
+        stats.dump_input = vinyl.scheduler.dump_input
+        stats.dump_output = vinyl.scheduler.dump_output
+        stats.compaction_input = vinyl.scheduler.compaction_input
+        stats.compaction_output = vinyl.scheduler.compaction_output
+        stats.compaction_queue = vinyl.scheduler.compaction_queue
+        stats.tasks_inprogress = vinyl.scheduler.tasks_inprogress
+        stats.disk_bytes = vinyl.disk.data
+        stats.memory_level0 = vinyl.memory.level0
+    else
+        stats.memory = box.slab.info().items_used
+    end
+
+    return stats
+end
+
+-- Принудительный checkpoint (для vinyl — ещё и dump L0 на диск)
+function dialog_checkpoint()
+    local started = clock.monotonic()
+    box.snapshot()
+    return clock.monotonic() - started
+end
+
+-- Активный профиль WAL/checkpoint и состояние checkpoint'а
+function dialog_wal_stats()
+    return {
+        profile = DIALOG_PROFILE,
+        wal_mode = box.cfg.wal_mode,
+        wal_max_size = box.cfg.wal_max_size,
+        checkpoint_interval = box.cfg.checkpoint_interval,
+        checkpoint_count = box.cfg.checkpoint_count,
+        checkpoint_in_progress = box.info.gc().checkpoint_is_in_progress,
+    }
+end
+
 ----------------------------------------------------------------------
 -- Регистрация функций как UDF и grant execute
 ----------------------------------------------------------------------
 
-for _, func_name in ipairs({'add_message', 'get_dialog', 'dialog_stats'}) do
+for _, func_name in ipairs({'add_message', 'get_dialog', 'dialog_stats',
+                            'dialog_engine_stats', 'dialog_checkpoint',
+                            'dialog_wal_stats'}) do
     -- регистрируем функцию в _func
     box.schema.func.create(func_name, { if_not_exists = true })
 
@@ -2,11 +2,13 @@
 from __future__ import annotations
 
 import argparse
+import random
 import sqlite3
 import statistics
+import threading
 import time
 from dataclasses import dataclass
-from typing import Iterable, List
+from typing import Dict, Iterable, List
 
 import tarantool
 
@@ -62,6 +64,15 @@ class TarantoolDialogStore:
     def get_dialog(self, dialog_id: int, limit: int) -> Iterable:
         return self.conn.call("get_dialog", [dialog_id, limit]).data[0]
 
+    def engine_stats(self) -> Dict:
+        return self.conn.call("dialog_engine_stats").data[0]
+
+    def checkpoint(self) -> float:
+        return self.conn.call("dialog_checkpoint").data[0]
+
+    def wal_stats(self) -> Dict:
+        return self.conn.call("dialog_wal_stats").data[0]
+
     def cleanup(self) -> None:
         self.conn.close()
 
@@ -103,6 +114,163 @@ def run_benchmark(store, messages: int, reads: int, dialog_id: int = 1) -> Bench
     )
 
 
+@dataclass
+class EngineResult:
+    engine: str
+    write_qps: float
+    write_p99_idle_ms: float
+    write_p99_compaction_ms: float
+    hot_read_p50_ms: float
+    cold_read_p50_ms: float
+    cold_read_p99_ms: float
+    write_amplification: float
+    disk_mb: float
+
+
+def percentile(values: List[float], q: float) -> float:
+    if not values:
+        return 0.0
+    ordered = sorted(values)
+    return ordered[min(int(len(ordered) * q), len(ordered) - 1)]
+
+
+def run_engine_benchmark(
+    store: TarantoolDialogStore,
+    dialogs: int,
+    messages: int,
+    body_size: int,
+    hot_dialogs: int,
+    reads: int,
+) -> EngineResult:
+    """Fill many dialogs, then compare hot (cached) and cold dialog reads."""
+    body = "x" * body_size
+    before = store.engine_stats()
+
+    # Write latencies are split by whether a dump/compaction task was running
+    idle: List[float] = []
+    compacting: List[float] = []
+    busy = False
+    start = time.perf_counter()
+    for i in range(messages):
+        if i % 1000 == 0:
+            busy = store.engine_stats().get("tasks_inprogress", 0) > 0
+        t0 = time.perf_counter()
+        store.add_message(i % dialogs + 1, f"user-{i % 4}", body)
+        (compacting if busy else idle).append((time.perf_counter() - t0) * 1000)
+    write_elapsed = time.perf_counter() - start
+
+    # Flush L0 so dump/compaction counters cover the whole write phase
+    store.checkpoint()
+    after = store.engine_stats()
+
+    hot_ids = list(range(1, min(hot_dialogs, dialogs) + 1))
+    for dialog_id in hot_ids:
+        store.get_dialog(dialog_id, 50)
+    hot: List[float] = []
+    for i in range(reads):
+        t0 = time.perf_counter()
+        store.get_dialog(hot_ids[i % len(hot_ids)], 50)
+        hot.append((time.perf_counter() - t0) * 1000)
+
+    # Each cold dialog is read exactly once
+    cold_pool = range(len(hot_ids) + 1, dialogs + 1)
+    cold: List[float] = []
+    for dialog_id in random.sample(cold_pool, min(reads, len(cold_pool))):
+        t0 = time.perf_counter()
+        store.get_dialog(dialog_id, 50)
+        cold.append((time.perf_counter() - t0) * 1000)
+
+    write_amp = 0.0
+    dumped = after.get("dump_input", 0) - before.get("dump_input", 0)
+    if dumped:
+        written = (after["dump_output"] - before["dump_output"]
+                   + after["compaction_output"] - before["compaction_output"])
+        write_amp = written / dumped
+
+    store.cleanup()
+
+    return EngineResult(
+        engine=after["engine"],
+        write_qps=messages / write_elapsed,
+        write_p99_idle_ms=percentile(idle, 0.99),
+        write_p99_compaction_ms=percentile(compacting, 0.99),
+        hot_read_p50_ms=percentile(hot, 0.5),
+        cold_read_p50_ms=percentile(cold, 0.5),
+        cold_read_p99_ms=percentile(cold, 0.99),
+        write_amplification=write_amp,
+        disk_mb=after.get("disk_bytes", 0) / 1024 / 1024,
+    )
+
+
+@dataclass
+class CheckpointResult:
+    profile: str
+    wal_mode: str
+    write_qps: float
+    checkpoints: int
+    checkpoint_avg_s: float
+    p50_ms: float
+    p99_outside_ms: float
+    p99_during_ms: float
+    max_during_ms: float
+    spikes: int
+
+
+def run_checkpoint_benchmark(
+    store: TarantoolDialogStore,
+    checkpointer: TarantoolDialogStore,
+    messages: int,
+    checkpoint_every: float,
+) -> CheckpointResult:
+    """Write steadily while another connection triggers checkpoints."""
+    wal = store.wal_stats()
+    windows: List[tuple] = []
+    done = threading.Event()
+
+    def checkpoint_loop() -> None:
+        while not done.wait(checkpoint_every):
+            started = time.perf_counter()
+            checkpointer.checkpoint()
+            windows.append((started, time.perf_counter()))
+
+    thread = threading.Thread(target=checkpoint_loop, daemon=True)
+    samples: List[tuple] = []
+    thread.start()
+    start = time.perf_counter()
+    for i in range(messages):
+        t0 = time.perf_counter()
+        store.add_message(i % 100 + 1, f"user-{i % 4}", f"checkpoint #{i}")
+        samples.append((t0, (time.perf_counter() - t0) * 1000))
+    elapsed = time.perf_counter() - start
+    done.set()
+    thread.join()
+    store.cleanup()
+    checkpointer.cleanup()
+
+    # A write counts as "during" if it started inside a checkpoint window
+    during: List[float] = []
+    outside: List[float] = []
+    for t0, latency in samples:
+        if any(begin <= t0 <= end for begin, end in windows):
+            during.append(latency)
+        else:
+            outside.append(latency)
+
+    p50 = percentile([latency for _, latency in samples], 0.5)
+    return CheckpointResult(
+        profile=wal["profile"],
+        wal_mode=wal["wal_mode"],
+        write_qps=messages / elapsed,
+        checkpoints=len(windows),
+        checkpoint_avg_s=statistics.mean([end - begin for begin, end in windows]) if windows else 0.0,
+        p50_ms=p50,
+        p99_outside_ms=percentile(outside, 0.99),
+        p99_during_ms=percentile(during, 0.99),
+        max_during_ms=max(during, default=0.0),
+        spikes=sum(1 for _, latency in samples if latency > 10 * p50),
+    )
+
+
 def main() -> None:
     parser = argparse.ArgumentParser(description=__doc__)
     parser.add_argument("--host", default="127.0.0.1", help="Tarantool host")
@@ -111,8 +279,64 @@ def main() -> None:
     parser.add_argument("--reads", type=int, default=200, help="Dialog fetches to measure")
     parser.add_argument("--user", default="app", help="Tarantool user")
     parser.add_argument("--password", default="pass", help="Tarantool password")
+    parser.add_argument("--skip-baseline", action="store_true",
+                        help="Only run the storage engine benchmark")
+    parser.add_argument("--dialogs", type=int, default=1000,
+                        help="Dialogs in the engine benchmark")
+    parser.add_argument("--engine-messages", type=int, default=20000,
+                        help="Messages written in the engine benchmark")
+    parser.add_argument("--body-size", type=int, default=256,
+                        help="Message body size in bytes (raise to exceed RAM)")
+    parser.add_argument("--hot-dialogs", type=int, default=10,
+                        help="Dialogs read repeatedly as the hot set")
+    parser.add_argument("--engine-reads", type=int, default=500,
+                        help="Hot and cold dialog reads to measure")
+    parser.add_argument("--checkpoint-messages", type=int, default=20000,
+                        help="Messages written in the checkpoint benchmark")
+    parser.add_argument("--checkpoint-every", type=float, default=2.0,
+                        help="Seconds between forced checkpoints")
     args = parser.parse_args()
 
+    def connect() -> TarantoolDialogStore:
+        return TarantoolDialogStore(args.host, args.port, args.user, args.password)
+
+    checkpoints = run_checkpoint_benchmark(
+        connect(), connect(),
+        messages=args.checkpoint_messages,
+        checkpoint_every=args.checkpoint_every,
+    )
+
+    print(f"\nWAL profile: {checkpoints.profile} (wal_mode={checkpoints.wal_mode})")
+    print("=======================")
+    print(f"write_qps={checkpoints.write_qps:.1f} checkpoints={checkpoints.checkpoints} "
+          f"avg_checkpoint={checkpoints.checkpoint_avg_s:.3f}s")
+    print(f"p50={checkpoints.p50_ms:.3f}ms p99 outside={checkpoints.p99_outside_ms:.3f}ms "
+          f"during checkpoint={checkpoints.p99_during_ms:.3f}ms "
+          f"max during={checkpoints.max_during_ms:.3f}ms spikes(>10×p50)={checkpoints.spikes}")
+
+    engine = run_engine_benchmark(
+        connect(),
+        dialogs=args.dialogs,
+        messages=args.engine_messages,
+        body_size=args.body_size,
+        hot_dialogs=args.hot_dialogs,
+        reads=args.engine_reads,
+    )
+
+    print(f"\nStorage engine: {engine.engine}")
+    print("=======================")
+    print(f"write_qps={engine.write_qps:.1f} "
+          f"write_p99 idle={engine.write_p99_idle_ms:.3f}ms "
+          f"during dump/compaction={engine.write_p99_compaction_ms:.3f}ms")
+    print(f"hot read p50={engine.hot_read_p50_ms:.3f}ms  "
+          f"cold read p50={engine.cold_read_p50_ms:.3f}ms p99={engine.cold_read_p99_ms:.3f}ms")
+    if engine.engine == "vinyl":
+        print(f"write amplification=×{engine.write_amplification:.2f} "
+              f"disk={engine.disk_mb:.1f} MB")
+
+    if args.skip_baseline:
+        return
+
     baseline = run_benchmark(SQLiteDialogStore(), messages=args.messages, reads=args.reads)
     migrated = run_benchmark(
         TarantoolDialogStore(args.host, args.port, args.user, args.password),
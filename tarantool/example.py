@@ -3,9 +3,13 @@
 Tarantool example - In-memory computing platform with Lua
 """
 
+import os
+import socket
 import tarantool
+import threading
 import time
 import json
+import msgpack  # installed with the tarantool connector
 
 # Connect to Tarantool
 conn = tarantool.connect("localhost", 3301, user="guest")
@@ -131,52 +135,119 @@ def demo_fibers():
     results = conn.eval(fiber_code)
     print(f"Fiber results: {results}")
 
-def demo_queues():
-    """Message queue functionality"""
-    print("\n=== Message Queues ===\n")
+QUEUE_LUA = os.path.join(os.path.dirname(os.path.abspath(__file__)), "queue.lua")
 
-    # Create queue space
-    conn.eval("""
-        if not box.space.queue then
-            local queue = box.schema.space.create('queue')
-            queue:format({
-                {name = 'id', type = 'unsigned'},
-                {name = 'status', type = 'string'},
-                {name = 'data', type = 'string'}
-            })
-            queue:create_index('primary', {parts = {'id'}})
-            queue:create_index('status', {parts = {'status'}, unique = false})
-        end
-    """)
+def load_queue_module(connection):
+    """Install the queue stored procedures from queue.lua"""
+    with open(QUEUE_LUA) as f:
+        connection.eval(f.read())
 
-    # Queue operations
-    conn.eval("""
-        function enqueue(data)
-            local queue = box.space.queue
-            local id = queue:len() + 1
-            queue:insert{id, 'pending', data}
-            return id
-        end
+def call_one(connection, func, *args):
+    """Call a stored procedure and return its single result (or None)"""
+    data = connection.call(func, list(args)).data
+    return data[0] if data else None
 
-        function dequeue()
-            local queue = box.space.queue
-            local task = queue.index.status:select('pending', {limit = 1})
-            if #task > 0 then
-                queue:update(task[1][1], {{'=', 2, 'processing'}})
-                return task[1]
-            end
-            return nil
-        end
-    """)
+def demo_queues():
+    """Message queue functionality"""
+    print("\n=== Message Queues ===\n")
 
-    # Use queue
-    for i in range(3):
-        conn.call('enqueue', [f'Task {i+1}'])
+    load_queue_module(conn)
+
+    # Ids come from a sequence, so they never repeat after deletes
+    ids = [call_one(conn, 'queue_put', f'Task {i+1}') for i in range(4)]
+    print(f"Enqueued tasks: {ids}")
+
+    # take moves a task to 'taken' atomically and records the consumer
+    task = call_one(conn, 'queue_take', 'worker-1', 0, 30)
+    print(f"Taken: {task}")
+    call_one(conn, 'queue_ack', task[0], 'worker-1')
+    print(f"Acked task {task[0]}")
+
+    task = call_one(conn, 'queue_take', 'worker-1', 0, 30)
+    call_one(conn, 'queue_release', task[0], 'worker-1')
+    print(f"Released task {task[0]} back to ready")
+
+    task = call_one(conn, 'queue_take', 'worker-2', 0, 30)
+    call_one(conn, 'queue_bury', task[0], 'worker-2')
+    print(f"Buried task {task[0]}")
+
+    # A task not acked within its TTR goes back to ready
+    task = call_one(conn, 'queue_take', 'worker-3', 0, 0.2)
+    print(f"Taken task {task[0]} with TTR 0.2s, not acking...")
+    time.sleep(0.5)
+    print(f"Queue stats after TTR: {call_one(conn, 'queue_stats')}")
+
+    # Empty the queue so nothing outlives the demo: kick the buried task back
+    # to ready, then take and ack everything that is left
+    call_one(conn, 'queue_kick', 1)
+    drained = 0
+    while True:
+        task = call_one(conn, 'queue_take', 'drain', 0, 30)
+        if task is None:
+            break
+        call_one(conn, 'queue_ack', task[0], 'drain')
+        drained += 1
+    print(f"Drained {drained} remaining tasks: {call_one(conn, 'queue_stats')}")
+
+    # Blocking take: waits on a fiber.cond until a task arrives or timeout
+    start = time.time()
+    task = call_one(conn, 'queue_take', 'worker-4', 0.5, 30)
+    print(f"Blocking take on empty queue -> {task} after {time.time() - start:.2f}s")
+
+def demo_queue_benchmark(consumers=32, producers=4, tasks=20000):
+    """Producer/consumer throughput and latency with blocking takes"""
+    print("\n=== Queue Benchmark ===\n")
+
+    load_queue_module(conn)
+    latencies = []
+    lock = threading.Lock()
+    producers_done = threading.Event()
+
+    def producer(index):
+        c = tarantool.connect("localhost", 3301, user="guest")
+        for i in range(index, tasks, producers):
+            c.call('queue_put', [{'n': i, 'ts': time.time()}])
+        c.close()
+
+    def consumer(name):
+        c = tarantool.connect("localhost", 3301, user="guest")
+        local = []
+        while True:
+            task = call_one(c, 'queue_take', name, 0.2, 30)
+            if task is None:
+                if producers_done.is_set():
+                    break
+                continue
+            c.call('queue_ack', [task[0], name])
+            if isinstance(task[2], dict):  # skip tasks someone else left in the queue
+                local.append(time.time() - task[2]['ts'])
+        c.close()
+        with lock:
+            latencies.extend(local)
+
+    consumer_threads = [threading.Thread(target=consumer, args=(f'bench-{i}',))
+                        for i in range(consumers)]
+    producer_threads = [threading.Thread(target=producer, args=(i,))
+                        for i in range(producers)]
 
-    print("Enqueued 3 tasks")
+    start = time.time()
+    for t in consumer_threads + producer_threads:
+        t.start()
+    for t in producer_threads:
+        t.join()
+    producers_done.set()
+    for t in consumer_threads:
+        t.join()
+    elapsed = time.time() - start
 
-    task = conn.call('dequeue')
-    print(f"Dequeued task: {task}")
+    latencies.sort()
+    if latencies:
+        p50 = latencies[len(latencies) // 2] * 1000
+        p99 = latencies[int(len(latencies) * 0.99)] * 1000
+        print(f"{producers} producers, {consumers} consumers, {len(latencies)} tasks "
+              f"in {elapsed:.2f} seconds")
+        print(f"Throughput: {len(latencies)/elapsed:.0f} tasks/sec")
+        print(f"Put->ack latency: p50={p50:.2f}ms p99={p99:.2f}ms")
 
 def demo_performance():
     """Performance benchmarking"""
@@ -205,6 +276,133 @@ def demo_performance():
     print(f"Inserted 10,000 records in {elapsed:.3f} seconds")
     print(f"Throughput: {10000/elapsed:.0f} ops/sec")
 
+BULK_ROWS = int(os.environ.get("BULK_ROWS", 1_000_000))
+BULK_BATCH = 1000
+
+BULK_LUA = """
+    local msgpack = require('msgpack')
+
+    if not box.space.bulk then
+        local bulk = box.schema.space.create('bulk')
+        bulk:create_index('primary')
+    end
+
+    -- N tuples per call, one transaction per call
+    function bulk_insert(tuples)
+        box.atomic(function()
+            for _, t in ipairs(tuples) do
+                box.space.bulk:insert(t)
+            end
+        end)
+        return #tuples
+    end
+
+    -- One payload of concatenated MessagePack tuples, decoded incrementally
+    function bulk_insert_stream(payload, batch)
+        local pos, count = 1, 0
+        while pos <= #payload do
+            box.begin()
+            for _ = 1, batch do
+                if pos > #payload then break end
+                local t
+                t, pos = msgpack.decode(payload, pos)
+                box.space.bulk:insert(t)
+                count = count + 1
+            end
+            box.commit()
+        end
+        return count
+    end
+
+    return box.space.bulk.id
+"""
+
+def iproto_pipelined_insert(space_id, rows, window):
+    """Raw IPROTO INSERT requests, `window` in flight before reading replies"""
+    sock = socket.create_connection(("localhost", 3301))
+    greeting = b''
+    while len(greeting) < 128:  # the greeting may arrive in pieces
+        chunk = sock.recv(128 - len(greeting))
+        if not chunk:
+            raise ConnectionError("connection closed during the IPROTO greeting")
+        greeting += chunk
+    if not greeting.startswith(b'Tarantool'):
+        raise ConnectionError(f"unexpected IPROTO greeting: {greeting[:64]!r}")
+    # guest needs no auth, so the salt on the second line is not used
+    unpacker = msgpack.Unpacker(raw=False)
+
+    for first in range(0, rows, window):
+        last = min(first + window, rows)
+        packets = []
+        for i in range(first, last):
+            # header {REQUEST_TYPE: INSERT, SYNC: i}, body {SPACE_ID, TUPLE}
+            body = msgpack.packb({0x00: 2, 0x01: i}) + \
+                msgpack.packb({0x10: space_id, 0x21: [i, f'data_{i}']})
+            packets.append(b'\xce' + len(body).to_bytes(4, 'big') + body)
+        sock.sendall(b''.join(packets))
+
+        # each reply is three objects: length, header, body
+        pending = (last - first) * 3
+        while pending:
+            unpacker.feed(sock.recv(1 << 20))
+            for obj in unpacker:
+                if pending % 3 == 2 and obj.get(0x00, 0) != 0:
+                    raise RuntimeError(f"insert failed: {obj}")
+                pending -= 1
+    sock.close()
+
+def demo_bulk_load(rows=BULK_ROWS, batch=BULK_BATCH):
+    """Loading data from Python: per-row, batched call, pipelined, streamed"""
+    print("\n=== Client-Driven Bulk Load ===\n")
+
+    space_id = conn.eval(BULK_LUA).data[0]
+    space = conn.space('bulk')
+
+    def per_row():
+        for i in range(rows):
+            space.insert((i, f'data_{i}'))
+
+    def batched_call():
+        for first in range(0, rows, batch):
+            tuples = [(i, f'data_{i}') for i in range(first, min(first + batch, rows))]
+            conn.call('bulk_insert', [tuples])
+
+    def pipelined():
+        iproto_pipelined_insert(space_id, rows, batch)
+
+    def streamed():
+        # one payload per 100k rows keeps a single request well under iproto limits
+        for first in range(0, rows, 100_000):
+            payload = b''.join(msgpack.packb((i, f'data_{i}'))
+                               for i in range(first, min(first + 100_000, rows)))
+            conn.call('bulk_insert_stream', [payload, batch])
+
+    methods = [
+        ("per-row insert", per_row),
+        (f"call x{batch} tuples", batched_call),
+        (f"pipelined (window {batch})", pipelined),
+        ("streamed msgpack", streamed),
+    ]
+
+    print(f"{'method':26} {'rows/sec':>10} {'client us/row':>14} {'server us/row':>14}")
+    for name, load in methods:
+        conn.eval("box.space.bulk:truncate()")
+        server_cpu = conn.eval("return require('clock').proc()").data[0]
+        client_cpu = time.process_time()
+        start = time.perf_counter()
+
+        load()
+
+        elapsed = time.perf_counter() - start
+        client_cpu = time.process_time() - client_cpu
+        server_cpu = conn.eval("return require('clock').proc()").data[0] - server_cpu
+        loaded = conn.eval("return box.space.bulk:len()").data[0]
+
+        print(f"{name:26} {loaded/elapsed:10.0f} {client_cpu/loaded*1e6:14.2f} "
+              f"{server_cpu/loaded*1e6:14.2f}")
+
+    conn.eval("box.space.bulk:truncate()")
+
 if __name__ == "__main__":
     try:
         # Test connection
@@ -216,7 +414,9 @@ if __name__ == "__main__":
         demo_lua_procedures()
         demo_fibers()
         demo_queues()
+        demo_queue_benchmark()
         demo_performance()
+        demo_bulk_load()
 
         print("\n" + "=" * 50)
         print("Tarantool: In-Memory Computing Platform")
@@ -4,10 +4,20 @@ Tarantool HTTP Server example - REST API demonstration
 """
 
 import requests
+import msgpack
 import json
+import threading
 import time
 
 BASE_URL = "http://localhost:8080"
+MSGPACK = "application/msgpack"
+
+def decode_users(response):
+    """Decode a /api/users page from either JSON or raw-tuple MessagePack"""
+    if response.headers.get("Content-Type", "").startswith(MSGPACK):
+        fields = response.headers["X-Tuple-Format"].split(",")
+        return [dict(zip(fields, row)) for row in msgpack.unpackb(response.content)]
+    return response.json()
 
 def demo_health_check():
     """Check server health"""
@@ -83,6 +93,61 @@ def demo_batch_operations():
         result = response.json()
         print(f"Batch inserted {result['inserted']} users")
 
+    # Re-submit the same users with upsert semantics, 4 rows per transaction
+    batch_users["on_conflict"] = "update"
+    batch_users["chunk_size"] = 4
+    response = requests.post(f"{BASE_URL}/api/users/batch", json=batch_users)
+    if response.status_code == 201:
+        result = response.json()
+        print(f"Upsert batch: inserted={result['inserted']} updated={result['updated']} "
+              f"chunks={[round(c['elapsed_ms'], 2) for c in result['chunks']]} ms")
+
+def demo_batch_chunk_tuning():
+    """Chunk size vs latency of concurrent reads during a large import"""
+    print("\n=== Batch Chunk Size Tuning ===\n")
+
+    rows = 20000
+    run_id = int(time.time())
+
+    for chunk_size in (100, 1000, 5000, rows):
+        users = [
+            {"name": f"Import{i}", "email": f"import{i}-{chunk_size}-{run_id}@bulk.com", "age": i % 90}
+            for i in range(rows)
+        ]
+        payload = msgpack.packb({"users": users, "chunk_size": chunk_size})
+        result = {}
+
+        def importer():
+            response = requests.post(
+                f"{BASE_URL}/api/users/batch",
+                data=payload,
+                headers={"Content-Type": MSGPACK, "Accept": MSGPACK}
+            )
+            result.update(msgpack.unpackb(response.content))
+
+        thread = threading.Thread(target=importer)
+        session = requests.Session()
+        latencies = []
+        thread.start()
+        while thread.is_alive():
+            start = time.perf_counter()
+            session.get(f"{BASE_URL}/health")
+            latencies.append((time.perf_counter() - start) * 1000)
+        thread.join()
+
+        latencies.sort()
+        chunks = result.get("chunks", [])
+        chunk_avg = sum(c["elapsed_ms"] for c in chunks) / len(chunks) if chunks else 0
+        p99 = latencies[int(len(latencies) * 0.99)] if latencies else 0
+        print(f"chunk_size={chunk_size:6} chunks={len(chunks):4} avg_chunk={chunk_avg:7.2f}ms "
+              f"reads={len(latencies):5} read_p99={p99:7.2f}ms")
+
+        # Remove the import again: each chunk reports the id range it inserted
+        ids = [c[key] for c in chunks for key in ("first_id", "last_id") if c.get(key)]
+        if ids:
+            requests.post(f"{BASE_URL}/api/users/batch/delete",
+                          json={"from_id": min(ids), "to_id": max(ids)})
+
 def demo_metrics():
     """Metrics collection"""
     print("\n=== Metrics Collection ===\n")
@@ -134,6 +199,128 @@ def demo_performance():
     print(f"\n100 reads in {read_time:.3f} seconds")
     print(f"Read throughput: {100/read_time:.0f} ops/sec")
 
+def demo_conditional_get():
+    """ETag / If-None-Match revalidation for polling clients"""
+    print("\n=== Conditional GET (ETag) ===\n")
+
+    response = requests.get(f"{BASE_URL}/api/stats")
+    etag = response.headers.get("ETag")
+    print(f"ETag for /api/stats: {etag}")
+
+    response = requests.get(f"{BASE_URL}/api/stats", headers={"If-None-Match": etag})
+    print(f"Revalidation with If-None-Match -> {response.status_code}")
+
+    # Compare full responses against 304 revalidations
+    polls = 200
+    session = requests.Session()
+
+    start_time = time.time()
+    for _ in range(polls):
+        session.get(f"{BASE_URL}/api/stats")
+    full_time = time.time() - start_time
+
+    start_time = time.time()
+    not_modified = 0
+    for _ in range(polls):
+        response = session.get(f"{BASE_URL}/api/stats", headers={"If-None-Match": etag})
+        if response.status_code == 304:
+            not_modified += 1
+    conditional_time = time.time() - start_time
+
+    print(f"\n{polls} full polls in {full_time:.3f} seconds ({polls/full_time:.0f} req/sec)")
+    print(f"{polls} conditional polls in {conditional_time:.3f} seconds "
+          f"({polls/conditional_time:.0f} req/sec, {not_modified} x 304)")
+
+    # Any write bumps the space version and invalidates the ETag
+    requests.post(f"{BASE_URL}/api/metrics", json={"name": "etag_probe", "value": 1})
+    response = requests.get(f"{BASE_URL}/api/stats", headers={"If-None-Match": etag})
+    print(f"After a write -> {response.status_code} (new ETag: {response.headers.get('ETag')})")
+
+def demo_msgpack():
+    """MessagePack content negotiation vs JSON"""
+    print("\n=== MessagePack vs JSON ===\n")
+
+    # MessagePack request body
+    response = requests.post(
+        f"{BASE_URL}/api/users",
+        data=msgpack.packb({"name": "Msgpack", "email": "msgpack@example.com", "age": 40}),
+        headers={"Content-Type": MSGPACK, "Accept": MSGPACK}
+    )
+    if response.status_code in (201, 409):
+        print(f"POST with msgpack body -> {response.status_code}: {msgpack.unpackb(response.content)}")
+
+    # Make sure there is a large page to compare
+    page_size = 5000
+    existing = len(decode_users(requests.get(f"{BASE_URL}/api/users")))
+    for start in range(existing, page_size, 1000):
+        batch = [
+            {"name": f"Page{i}", "email": f"page{i}@msgpack.com", "age": i % 90}
+            for i in range(start, min(start + 1000, page_size))
+        ]
+        requests.post(
+            f"{BASE_URL}/api/users/batch",
+            data=msgpack.packb({"users": batch}),
+            headers={"Content-Type": MSGPACK}
+        )
+
+    # Client side: request round trip and decode. Server side: handler CPU
+    # (build + encode the body) from the X-Server-Cpu-Us header
+    session = requests.Session()
+    rounds = 20
+    for label, accept in (("JSON", "application/json"), ("MessagePack", MSGPACK)):
+        transfer_time = 0.0
+        decode_time = 0.0
+        server_cpu_us = 0.0
+        size = 0
+        rows = 0
+        for _ in range(rounds):
+            start = time.perf_counter()
+            response = session.get(f"{BASE_URL}/api/users",
+                                   params={"limit": page_size},
+                                   headers={"Accept": accept})
+            body = response.content
+            transfer_time += time.perf_counter() - start
+            server_cpu_us += float(response.headers.get("X-Server-Cpu-Us", 0))
+
+            start = time.perf_counter()
+            rows = len(decode_users(response))
+            decode_time += time.perf_counter() - start
+            size = len(body)
+
+        print(f"{label:12} rows={rows} payload={size / 1024:.1f} KB "
+              f"server_cpu={server_cpu_us / rounds / 1000:.2f}ms "
+              f"request={transfer_time / rounds * 1000:.2f}ms "
+              f"decode={decode_time / rounds * 1000:.2f}ms")
+
+def demo_prometheus_metrics():
+    """Per-route counters and latency histograms from /metrics"""
+    print("\n=== Prometheus /metrics ===\n")
+
+    response = requests.get(f"{BASE_URL}/metrics")
+    counts = {}
+    sums = {}
+    errors = {}
+    for line in response.text.splitlines():
+        if line.startswith("#") or not line:
+            continue
+        name_labels, value = line.rsplit(" ", 1)
+        if name_labels.startswith("tarantool_http_requests_total"):
+            counts[name_labels.split("{", 1)[1]] = float(value)
+        elif name_labels.startswith("tarantool_http_request_errors_total"):
+            errors[name_labels.split("{", 1)[1]] = float(value)
+        elif name_labels.startswith("tarantool_http_request_duration_seconds_sum"):
+            sums[name_labels.split("{", 1)[1]] = float(value)
+        elif name_labels.startswith("tarantool_http_instrumentation_overhead_seconds"):
+            print(f"Instrumentation overhead: {float(value) * 1e6:.2f} us/request\n")
+
+    print(f"{'route':45} {'requests':>9} {'errors':>7} {'avg':>10}")
+    for labels, count in counts.items():
+        if not count:
+            continue
+        route = labels.rstrip("}").replace('method="', "").replace('",path="', " ").rstrip('"')
+        avg_us = sums.get(labels, 0) / count * 1e6
+        print(f"{route:45} {count:9.0f} {errors.get(labels, 0):7.0f} {avg_us:8.1f}us")
+
 def demo_stats():
     """Database statistics"""
     print("\n=== Database Statistics ===\n")
@@ -174,17 +361,23 @@ def main():
         demo_health_check()
         demo_user_crud()
         demo_batch_operations()
+        demo_batch_chunk_tuning()
         demo_metrics()
         demo_performance()
+        demo_conditional_get()
+        demo_msgpack()
         demo_stats()
+        demo_prometheus_metrics()
 
         print("\n==================================================")
         print("Tarantool HTTP Server: REST API with In-Memory DB")
         print("\nKey features demonstrated:")
-        print("• RESTful API with JSON")
+        print("• RESTful API with JSON and MessagePack")
         print("• CRUD operations")
         print("• Batch operations")
         print("• Metrics collection")
+        print("• Prometheus /metrics with per-route latency histograms")
+        print("• Conditional GET with ETag / 304 Not Modified")
         print("• High-performance in-memory storage")
 
     except Exception as e:
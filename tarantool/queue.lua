@@ -0,0 +1,176 @@
+-- Task queue on top of a memtx space
+-- Loaded by example.py through conn.eval(); safe to evaluate repeatedly.
+--
+-- Task lifecycle:
+--   queue_put      -> ready
+--   queue_take     ready  -> taken (by consumer, until TTR deadline)
+--   queue_ack      taken  -> deleted
+--   queue_release  taken  -> ready
+--   queue_bury     taken  -> buried
+--   queue_kick     buried -> ready
+-- Taken tasks whose TTR expires are returned to ready by a watchdog fiber.
+
+local fiber = require('fiber')
+local log = require('log')
+
+local DEFAULT_TTR = 30        -- seconds a consumer may hold a task
+local WATCHDOG_INTERVAL = 0.1 -- seconds between TTR scans
+
+box.schema.sequence.create('task_seq', {if_not_exists = true, min = 1})
+
+if not box.space.tasks then
+    local tasks = box.schema.space.create('tasks')
+    tasks:format({
+        {name = 'id', type = 'unsigned'},
+        {name = 'status', type = 'string'},
+        {name = 'data', type = 'any'},
+        {name = 'consumer', type = 'string'},
+        {name = 'deadline', type = 'number'},   -- TTR deadline, 0 unless taken
+        {name = 'created_at', type = 'number'},
+    })
+    tasks:create_index('primary', {parts = {'id'}})
+    -- FIFO order inside each status
+    tasks:create_index('status', {parts = {'status', 'id'}})
+    tasks:create_index('deadline', {parts = {'status', 'deadline'}, unique = false})
+end
+
+-- State shared between reloads: the wake-up condition and the watchdog fiber
+task_queue = task_queue or {}
+task_queue.cond = task_queue.cond or fiber.cond()
+
+local function wakeup()
+    task_queue.cond:signal()
+end
+
+local function check_owner(id, consumer)
+    local task = box.space.tasks:get(id)
+    if task == nil then
+        error(string.format('task %d not found', id))
+    end
+    if task.status ~= 'taken' or task.consumer ~= consumer then
+        error(string.format('task %d is not taken by %s', id, consumer))
+    end
+    return task
+end
+
+function queue_put(data)
+    local id = box.sequence.task_seq:next()
+    box.space.tasks:insert{id, 'ready', data, '', 0, fiber.time()}
+    wakeup()
+    return id
+end
+
+-- Select and update happen without a yield in between, so a task is never
+-- handed to two consumers.
+local function try_take(consumer, ttr)
+    return box.atomic(function()
+        local task = box.space.tasks.index.status:min({'ready'})
+        if task == nil or task.status ~= 'ready' then
+            return nil
+        end
+        return box.space.tasks:update(task.id, {
+            {'=', 'status', 'taken'},
+            {'=', 'consumer', consumer},
+            {'=', 'deadline', fiber.time() + ttr},
+        })
+    end)
+end
+
+-- Blocks for up to `timeout` seconds (0 = do not wait) until a task is ready
+function queue_take(consumer, timeout, ttr)
+    timeout = timeout or 0
+    ttr = ttr or DEFAULT_TTR
+    local deadline = fiber.clock() + timeout
+
+    while true do
+        local task = try_take(consumer, ttr)
+        if task ~= nil then
+            return task
+        end
+        local remaining = deadline - fiber.clock()
+        if remaining <= 0 then
+            return nil
+        end
+        task_queue.cond:wait(remaining)
+    end
+end
+
+function queue_ack(id, consumer)
+    check_owner(id, consumer)
+    return box.space.tasks:delete(id)
+end
+
+function queue_release(id, consumer)
+    check_owner(id, consumer)
+    local task = box.space.tasks:update(id, {
+        {'=', 'status', 'ready'},
+        {'=', 'consumer', ''},
+        {'=', 'deadline', 0},
+    })
+    wakeup()
+    return task
+end
+
+function queue_bury(id, consumer)
+    check_owner(id, consumer)
+    return box.space.tasks:update(id, {
+        {'=', 'status', 'buried'},
+        {'=', 'consumer', ''},
+        {'=', 'deadline', 0},
+    })
+end
+
+function queue_kick(count)
+    local buried = box.space.tasks.index.status:select({'buried'}, {limit = count or 1})
+    for _, task in ipairs(buried) do
+        box.space.tasks:update(task.id, {{'=', 'status', 'ready'}})
+        wakeup()
+    end
+    return #buried
+end
+
+function queue_stats()
+    local stats = {}
+    for _, status in ipairs({'ready', 'taken', 'buried'}) do
+        stats[status] = box.space.tasks.index.status:count({status})
+    end
+    return stats
+end
+
+-- Return tasks whose TTR expired to the ready state
+local function requeue_expired()
+    local now = fiber.time()
+    local expired = {}
+    for _, task in box.space.tasks.index.deadline:pairs({'taken'}, {iterator = 'EQ'}) do
+        if task.deadline > now then
+            break
+        end
+        table.insert(expired, task.id)
+    end
+    for _, id in ipairs(expired) do
+        box.space.tasks:update(id, {
+            {'=', 'status', 'ready'},
+            {'=', 'consumer', ''},
+            {'=', 'deadline', 0},
+        })
+        wakeup()
+    end
+    return #expired
+end
+
+if task_queue.watchdog ~= nil and task_queue.watchdog:status() ~= 'dead' then
+    task_queue.watchdog:cancel()
+end
+
+task_queue.watchdog = fiber.create(function()
+    fiber.name('queue_ttr')
+    while true do
+        fiber.sleep(WATCHDOG_INTERVAL)
+        local ok, err = pcall(requeue_expired)
+        if not ok then
+            log.error('queue TTR watchdog: %s', err)
+        end
+    end
+end)
+
+return true
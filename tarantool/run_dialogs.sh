@@ -14,26 +14,26 @@ fi
 SCRIPT_DIR=$(cd "$(dirname "$0")" && pwd)
 CONTAINER_NAME="tarantool-dialogs"
 
-# отдельный venv именно под этот проект
-VENV_DIR="${SCRIPT_DIR}/.venv_dialogs"
-VENV_PYTHON="${VENV_DIR}/bin/python3"
-
-# Чистим предыдущий контейнер
-if docker ps -a --format '{{.Names}}' | grep -q "^${CONTAINER_NAME}$"; then
-  docker rm -f "${CONTAINER_NAME}" > /dev/null
+# memtx (по умолчанию) или vinyl; DIALOG_MEMORY_LIMIT (например 512m) ограничивает
+# память контейнера, чтобы прогнать vinyl на наборе данных больше RAM
+DIALOG_ENGINE="${DIALOG_ENGINE:-memtx}"
+DOCKER_MEMORY_ARGS=()
+if [ -n "${DIALOG_MEMORY_LIMIT:-}" ]; then
+  DOCKER_MEMORY_ARGS=(--memory "${DIALOG_MEMORY_LIMIT}")
 fi
 
-echo "Starting Tarantool 2.11 with dialog_app.lua..."
-docker run -d \
-  --name "${CONTAINER_NAME}" \
-  -p 3301:3301 \
-  -v "${SCRIPT_DIR}/dialog_app.lua:/opt/tarantool/init.lua:ro" \
-  --entrypoint tarantool \
-  tarantool/tarantool:2.11 \
-  /opt/tarantool/init.lua > /dev/null
+# Профиль WAL/checkpoint: durable, balanced (по умолчанию), throughput
+# или all — прогнать бенчмарк последовательно на каждом профиле
+DIALOG_PROFILE="${DIALOG_PROFILE:-balanced}"
+if [ "${DIALOG_PROFILE}" = "all" ]; then
+  PROFILES=(durable balanced throughput)
+else
+  PROFILES=("${DIALOG_PROFILE}")
+fi
 
-# даём серверу время подняться и выполнить init.lua
-sleep 4
+# отдельный venv именно под этот проект
+VENV_DIR="${SCRIPT_DIR}/.venv_dialogs"
+VENV_PYTHON="${VENV_DIR}/bin/python3"
 
 # пересоздаём venv, чтобы не ловить старый мусор
 rm -rf "${VENV_DIR}"
@@ -48,10 +48,40 @@ fi
 # ставим зависимости через python из venv
 "${VENV_PYTHON}" -m pip install -q --upgrade pip tarantool
 
-# запускаем бенчмарк, явно передавая пользователя app/pass
-"${VENV_PYTHON}" "${SCRIPT_DIR}/dialog_benchmark.py" \
-  --user app \
-  --password pass
+start_container() {
+  local profile=$1
+
+  # Чистим предыдущий контейнер
+  if docker ps -a --format '{{.Names}}' | grep -q "^${CONTAINER_NAME}$"; then
+    docker rm -f "${CONTAINER_NAME}" > /dev/null
+  fi
+
+  echo "Starting Tarantool 2.11 with dialog_app.lua (engine: ${DIALOG_ENGINE}, profile: ${profile})..."
+  docker run -d \
+    --name "${CONTAINER_NAME}" \
+    -p 3301:3301 \
+    -e DIALOG_ENGINE="${DIALOG_ENGINE}" \
+    -e DIALOG_PROFILE="${profile}" \
+    ${DOCKER_MEMORY_ARGS[@]+"${DOCKER_MEMORY_ARGS[@]}"} \
+    -v "${SCRIPT_DIR}/dialog_app.lua:/opt/tarantool/init.lua:ro" \
+    --entrypoint tarantool \
+    tarantool/tarantool:2.11 \
+    /opt/tarantool/init.lua > /dev/null
+
+  # даём серверу время подняться и выполнить init.lua
+  sleep 4
+}
+
+for profile in "${PROFILES[@]}"; do
+  start_container "${profile}"
+
+  # запускаем бенчмарк, явно передавая пользователя app/pass
+  # дополнительные аргументы скрипта передаются бенчмарку как есть
+  "${VENV_PYTHON}" "${SCRIPT_DIR}/dialog_benchmark.py" \
+    --user app \
+    --password pass \
+    "$@"
+done
 
 echo
 read -p "Keep the Tarantool dialog container running? (y/N): " -r ANSWER
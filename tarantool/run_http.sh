@@ -43,7 +43,7 @@ if docker ps | grep -q tarantool-http; then
         python3 -m venv venv
     fi
     source venv/bin/activate
-    pip install -q requests
+    pip install -q requests msgpack
 
     # Run HTTP example
     echo "Running HTTP API examples..."
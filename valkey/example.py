@@ -5,11 +5,27 @@ Valkey is a BSD-licensed fork of Redis, API-compatible
 """
 
 import json
+import os
+import sys
 import time
 import redis  # Valkey is Redis-compatible, uses same client
 
+# Valkey speaks the same RESP and commands, so the benchmark, cache and
+# limiter modules from ../redis run against it unchanged
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), '..', 'redis'))
+from codec import Codec, print_results, run_codec_benchmark
+from key_cleanup import unlink_matching
+from near_cache import NearCache, print_near_cache_results, run_near_cache_benchmark
+from rate_limiter import RateLimiter, print_limiter_results, run_limiter_benchmark
+from resp_bench import BenchConfig, print_report, run_benchmark
+from script_registry import ScriptRegistry
+from server_sampler import print_summary, sample_under_load
+
 # Connect to Valkey (same as Redis)
 r = redis.Redis(host='localhost', port=6379, db=0, decode_responses=True)
+scripts = ScriptRegistry(r)
+# Binary connection for codec-encoded values (header byte + payload)
+rb = redis.Redis(host='localhost', port=6379, db=0)
 
 def demo_compatibility():
     """Demonstrate Redis compatibility"""
@@ -54,9 +70,8 @@ def demo_performance_features():
     print(f"Set 10,000 keys via pipeline in {elapsed:.3f} seconds")
     print(f"Throughput: {10000/elapsed:.0f} ops/sec")
 
-    # Clean up
-    for i in range(10000):
-        r.delete(f'bench:key:{i}')
+    # Clean up: SCAN + pipelined UNLINK instead of one DEL per round trip
+    print(unlink_matching(r, 'bench:key:*'))
 
 def demo_enhanced_commands():
     """Demonstrate any enhanced or new commands"""
@@ -138,6 +153,11 @@ def demo_monitoring():
         print(f"  System: {info['used_cpu_sys']}")
         print(f"  User: {info['used_cpu_user']}")
 
+    # Continuous sampling: rates from INFO deltas, new SLOWLOG entries,
+    # LATENCY LATEST, one JSON line per sample when output= is set
+    print()
+    print_summary(sample_under_load(r, duration=3, interval=0.5))
+
 def demo_advanced_patterns():
     """Advanced usage patterns"""
     print("\n=== Advanced Patterns ===\n")
@@ -154,32 +174,31 @@ def demo_advanced_patterns():
         # Do work...
         print("Performing critical work...")
 
-        # Release lock safely
-        lua_script = """
-        if redis.call('get', KEYS[1]) == ARGV[1] then
-            return redis.call('del', KEYS[1])
-        else
-            return 0
-        end
-        """
-        released = r.eval(lua_script, 1, lock_key, lock_value)
+        # Release lock safely: release_lock.lua, preloaded and called via EVALSHA
+        released = scripts.call('release_lock', keys=[lock_key], args=[lock_value])
         print(f"Lock release: {'Success' if released else 'Failed'}")
 
-    # Rate limiting pattern
-    rate_limit_key = 'rate:user:123'
-    r.delete(rate_limit_key)  # Clean slate
+    # Rate limiting: sliding window counter in one EVALSHA per decision, no
+    # 2x burst at fixed-window edges (ratelimit_*.lua, preloaded by scripts.load())
+    limiter = RateLimiter(r, limit=10, window=60, algorithm='sliding_window', scripts=scripts)
+    limiter.reset('user:123')
 
     print("\nRate limiting (10 requests per minute):")
     for i in range(12):
-        pipe = r.pipeline()
-        pipe.incr(rate_limit_key)
-        pipe.expire(rate_limit_key, 60)
-        current_count = pipe.execute()[0]
-
-        if current_count <= 10:
-            print(f"  Request {i+1}: Allowed (count: {current_count})")
+        decision = limiter.allow('user:123')
+        if decision.allowed:
+            print(f"  Request {i+1}: Allowed (remaining: {decision.remaining})")
         else:
-            print(f"  Request {i+1}: Rate limited!")
+            print(f"  Request {i+1}: Rate limited! (retry in {decision.retry_after_ms / 1000:.1f}s)")
+
+    # Batch API: many clients checked in one script call
+    decisions = limiter.allow_many([f'user:{n}' for n in range(200, 205)])
+    print(f"Batch check: {sum(d.allowed for d in decisions)}/{len(decisions)} allowed")
+    for n in range(200, 205):
+        limiter.reset(f'user:{n}')
+
+    print("\nLimiter algorithms (decisions/sec, memory per tracked client):")
+    print_limiter_results(run_limiter_benchmark(r, clients=1000, decisions=2000))
 
 def demo_clustering():
     """Cluster-related features"""
@@ -202,43 +221,60 @@ def demo_clustering():
     print("  CLUSTER SLOTS - Show slot assignments")
     print("  CLUSTER FAILOVER - Manual failover")
 
+def demo_value_codecs():
+    """Compact object storage with header-tagged codecs"""
+    print("\n=== Value Codecs ===\n")
+
+    codec = Codec('msgpack' if 'msgpack' in Codec.available() else 'pickle', compress_threshold=1024)
+    session = {'user_id': 42, 'cart': [{'sku': f'sku-{i}', 'qty': 1} for i in range(100)]}
+    rb.setex('session:42', 3600, codec.encode(session))
+    print(f"SETEX session:42 ({codec.name}) -> {len(rb.get('session:42'))} bytes "
+          f"vs {len(json.dumps(session))} bytes as JSON")
+    print(f"Decoded cart items: {len(codec.decode(rb.get('session:42'))['cart'])}")
+    r.delete('session:42')
+
+    print("\nEncode/decode cost and MEMORY USAGE per key:")
+    print_results(run_codec_benchmark(rb, iterations=500))
+
+def demo_near_cache():
+    """Client-side caching: RESP3 CLIENT TRACKING invalidates the local copy"""
+    print("\n=== Client-Side Near-Cache ===\n")
+
+    cache = NearCache(max_entries=1000)
+    r.set('config:limits', '100')
+    print(f"First read (server): {cache.get('config:limits')}")
+    print(f"Second read (local): {cache.get('config:limits')}")
+    r.set('config:limits', '200')
+    time.sleep(0.05)
+    print(f"After write, invalidated: {cache.get('config:limits')}  {cache.stats}")
+    cache.close()
+    r.delete('config:limits')
+
+    print_near_cache_results(run_near_cache_benchmark(duration=3))
+
 def benchmark_comparison():
-    """Simple benchmark comparison"""
+    """Multi-client benchmark; resp_bench.py runs unchanged against Redis and Dragonfly"""
     print("\n=== Performance Benchmark ===\n")
 
-    operations = [
-        ("SET", lambda i: r.set(f'perf:key:{i}', f'value_{i}')),
-        ("GET", lambda i: r.get(f'perf:key:{i}')),
-        ("INCR", lambda i: r.incr(f'perf:counter:{i}')),
-        ("LPUSH", lambda i: r.lpush(f'perf:list:{i%100}', f'item_{i}')),
-        ("SADD", lambda i: r.sadd(f'perf:set:{i%100}', f'member_{i}'))
-    ]
-
-    results = {}
-    iterations = 1000
-
-    for op_name, op_func in operations:
-        start = time.time()
-        for i in range(iterations):
-            op_func(i)
-        elapsed = time.time() - start
-        results[op_name] = iterations / elapsed
-
-    print("Operations per second:")
-    for op_name, ops_per_sec in results.items():
-        print(f"  {op_name:8} {ops_per_sec:>10.0f} ops/sec")
+    # 8 connections, mixed commands over a 10k keyspace, values 32-512 bytes;
+    # pipeline depth 1 shows round-trip bound throughput, 16 the server's
+    for pipeline in (1, 16):
+        config = BenchConfig(clients=8, pipeline=pipeline, keyspace=10000, value_size='32-512',
+                             mix='get=60,set=20,incr=5,lpush=5,sadd=5,hset=5', duration=3, prefix='perf:')
+        stats, elapsed = run_benchmark(config)
+        print(f"8 clients, pipeline {pipeline}:")
+        print_report(stats, elapsed)
+        print()
 
     # Cleanup
-    for i in range(iterations):
-        r.delete(f'perf:key:{i}', f'perf:counter:{i}')
-    for i in range(100):
-        r.delete(f'perf:list:{i}', f'perf:set:{i}')
+    print(unlink_matching(r, 'perf:*'))
 
 if __name__ == "__main__":
     try:
         # Test connection
         r.ping()
         print("Connected to Valkey successfully!")
+        scripts.load()
         print("=" * 50)
         print()
 
@@ -250,6 +286,8 @@ if __name__ == "__main__":
         demo_open_source_benefits()
         demo_monitoring()
         demo_advanced_patterns()
+        demo_value_codecs()
+        demo_near_cache()
         demo_clustering()
         benchmark_comparison()
 